@@ -0,0 +1,44 @@
+import os
+import threading
+import anthropic
+from langchain_anthropic import ChatAnthropic
+
+MODEL_NAME = "claude-3-7-sonnet-20250219"
+
+_lock = threading.Lock()
+_anthropic_client = None
+_chat_model = None
+
+
+def get_anthropic_client():
+    """
+    Return the process-wide Anthropic client
+
+    All agents share this client, and with it one keep-alive HTTP connection
+    pool to the Anthropic API.
+
+    Returns:
+        anthropic.Anthropic: Shared client
+    """
+    global _anthropic_client
+    with _lock:
+        if _anthropic_client is None:
+            _anthropic_client = anthropic.Anthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
+        return _anthropic_client
+
+
+def get_chat_model():
+    """
+    Return the process-wide LangChain chat model
+
+    ChatAnthropic lazily builds its own sync and async HTTP clients, so sharing
+    one instance keeps a single connection pool per mode across all chains.
+
+    Returns:
+        ChatAnthropic: Shared chat model
+    """
+    global _chat_model
+    with _lock:
+        if _chat_model is None:
+            _chat_model = ChatAnthropic(model_name=MODEL_NAME, anthropic_api_key=os.getenv("ANTHROPIC_API_KEY"))
+        return _chat_model
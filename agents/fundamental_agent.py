@@ -1,21 +1,25 @@
 import os
-import anthropic
-from langchain_anthropic import ChatAnthropic
+import asyncio
 from langchain.chains import LLMChain
 from langchain.prompts import PromptTemplate
+from agents.clients import get_anthropic_client, get_chat_model
 import pandas as pd
-from utils.common import fetch_company_info, fetch_financial_data, calculate_fundamental_ratios
+from utils.common import fetch_fundamental_snapshot, fetch_reference_data
+from utils.llm_cache import run_chain_cached, arun_chain_cached
 
 class FundamentalAnalysisAgent:
     def __init__(self):
         """Initialize the fundamental analysis agent with Claude"""
         self.api_key = os.getenv("ANTHROPIC_API_KEY")
         
-        # Initialize direct Anthropic client
-        self.client = anthropic.Anthropic(api_key=self.api_key)
+        # Fundamentals change slowly, so narratives can be reused for a day
+        self.cache_ttl = float(os.getenv("FUNDAMENTAL_CACHE_TTL", "86400"))
+        
+        # Shared Anthropic client (one connection pool for all agents)
+        self.client = get_anthropic_client()
         
         # Initialize LangChain components
-        self.llm = ChatAnthropic(model_name="claude-3-7-sonnet-20250219", anthropic_api_key=self.api_key)
+        self.llm = get_chat_model()
         
         # Prompt for fundamental analysis
         self.analysis_prompt = PromptTemplate(
@@ -87,84 +91,168 @@ class FundamentalAnalysisAgent:
         # Convert to string representation
         return formatted_df.to_string()
     
-    def analyze(self, ticker):
+    def prepare_analysis(self, ticker, snapshot=None):
+        """
+        Fetch data and compute everything the analysis needs short of the LLM call
+        
+        Args:
+            ticker (str): Stock ticker symbol
+            snapshot (FundamentalSnapshot): Snapshot fetched by the caller (e.g. for a batch), fetched here when None
+            
+        Returns:
+            dict: Company header, key metrics and prompt inputs, or an error result
+        """
+        # Statements come from the stored fiscal-period snapshot, price-driven info is current
+        if snapshot is None:
+            snapshot = fetch_fundamental_snapshot(ticker)
+        
+        if snapshot is None or not snapshot.info:
+            return {
+                "status": "error",
+                "message": f"Could not fetch company information for {ticker}."
+            }
+        
+        company_info = snapshot.info
+        income_stmt, balance_sheet, cash_flow = snapshot.income_statement, snapshot.balance_sheet, snapshot.cash_flow
+        financial_ratios = snapshot.ratios
+        
+        # Header fields come from the reference index, falling back to the info payload
+        reference = fetch_reference_data([ticker]).get(ticker) or {}
+        company_name = reference.get('name') or company_info.get('shortName')
+        sector = reference.get('sector') or company_info.get('sector', 'N/A')
+        industry = reference.get('industry') or company_info.get('industry', 'N/A')
+        
+        # Format company info for readability
+        company_info_str = "\n".join([
+            f"Name: {company_name or 'N/A'}",
+            f"Sector: {sector}",
+            f"Industry: {industry}",
+            f"Market Cap: ${company_info.get('marketCap', 0)/1e9:.2f}B",
+            f"Current Price: ${company_info.get('currentPrice', 'N/A')}",
+            f"52-Week High: ${company_info.get('fiftyTwoWeekHigh', 'N/A')}",
+            f"52-Week Low: ${company_info.get('fiftyTwoWeekLow', 'N/A')}",
+            f"Business Summary: {company_info.get('longBusinessSummary', 'N/A')}",
+            f"Latest Fiscal Period: {snapshot.fiscal_period or 'N/A'}",
+            f"Statements Fetched: {snapshot.fetched_at[:10]}",
+            f"Market Data As Of: {snapshot.info_as_of[:16].replace('T', ' ')} UTC"
+        ])
+        
+        # Format financial ratios
+        financial_ratios_str = "\n".join([f"{k}: {v}" for k, v in financial_ratios.items()])
+        
+        # Format financial statements
+        income_statement_str = self.format_financial_table(income_stmt)
+        balance_sheet_str = self.format_financial_table(balance_sheet)
+        cash_flow_str = self.format_financial_table(cash_flow)
+        
+        # Get key metrics
+        key_metrics = {
+            "P/E Ratio": financial_ratios.get("P/E", "N/A"),
+            "P/B Ratio": financial_ratios.get("P/B", "N/A"),
+            "Profit Margin": financial_ratios.get("Profit Margin", "N/A"),
+            "Debt to Equity": financial_ratios.get("Debt to Equity", "N/A"),
+            "ROE": financial_ratios.get("ROE", "N/A"),
+            "Current Price": company_info.get("currentPrice", "N/A"),
+            "Market Cap": f"${company_info.get('marketCap', 0)/1e9:.2f}B"
+        }
+        
+        return {
+            "status": "success",
+            "ticker": ticker,
+            "company_name": company_name or ticker,
+            "sector": sector,
+            "industry": industry,
+            "fiscal_period": snapshot.fiscal_period,
+            "as_of": snapshot.info_as_of,
+            "statements_as_of": snapshot.fetched_at,
+            "key_metrics": key_metrics,
+            "prompt_inputs": {
+                "ticker": ticker,
+                "company_info": company_info_str,
+                "financial_ratios": financial_ratios_str,
+                "income_statement": income_statement_str,
+                "balance_sheet": balance_sheet_str,
+                "cash_flow": cash_flow_str
+            }
+        }
+    
+    def compile_results(self, prepared, analysis):
+        """
+        Combine prepared data and the LLM narrative into the final result
+        
+        Args:
+            prepared (dict): Output of prepare_analysis
+            analysis (str): Narrative from Claude
+            
+        Returns:
+            dict: Fundamental analysis results
+        """
+        return {
+            "status": "success",
+            "ticker": prepared["ticker"],
+            "company_name": prepared["company_name"],
+            "sector": prepared["sector"],
+            "industry": prepared["industry"],
+            "fiscal_period": prepared["fiscal_period"],
+            "as_of": prepared["as_of"],
+            "statements_as_of": prepared["statements_as_of"],
+            "key_metrics": prepared["key_metrics"],
+            "analysis": analysis
+        }
+    
+    def analyze(self, ticker, snapshot=None):
         """
         Perform fundamental analysis on a stock
         
         Args:
             ticker (str): Stock ticker symbol
+            snapshot (FundamentalSnapshot): Snapshot fetched by the caller (e.g. for a batch), fetched here when None
             
         Returns:
             dict: Fundamental analysis results
         """
         try:
-            # Fetch all necessary data
-            company_info = fetch_company_info(ticker)
-            income_stmt, balance_sheet, cash_flow = fetch_financial_data(ticker)
-            financial_ratios = calculate_fundamental_ratios(ticker)
-            
-            if not company_info:
-                return {
-                    "status": "error",
-                    "message": f"Could not fetch company information for {ticker}."
-                }
-            
-            # Format company info for readability
-            company_info_str = "\n".join([
-                f"Name: {company_info.get('shortName', 'N/A')}",
-                f"Sector: {company_info.get('sector', 'N/A')}",
-                f"Industry: {company_info.get('industry', 'N/A')}",
-                f"Market Cap: ${company_info.get('marketCap', 0)/1e9:.2f}B",
-                f"Current Price: ${company_info.get('currentPrice', 'N/A')}",
-                f"52-Week High: ${company_info.get('fiftyTwoWeekHigh', 'N/A')}",
-                f"52-Week Low: ${company_info.get('fiftyTwoWeekLow', 'N/A')}",
-                f"Business Summary: {company_info.get('longBusinessSummary', 'N/A')}"
-            ])
-            
-            # Format financial ratios
-            financial_ratios_str = "\n".join([f"{k}: {v}" for k, v in financial_ratios.items()])
-            
-            # Format financial statements
-            income_statement_str = self.format_financial_table(income_stmt)
-            balance_sheet_str = self.format_financial_table(balance_sheet)
-            cash_flow_str = self.format_financial_table(cash_flow)
+            prepared = self.prepare_analysis(ticker, snapshot)
+            if prepared["status"] == "error":
+                return prepared
             
             # Get analysis from Claude
-            analysis = self.analysis_chain.run(
-                ticker=ticker,
-                company_info=company_info_str,
-                financial_ratios=financial_ratios_str,
-                income_statement=income_statement_str,
-                balance_sheet=balance_sheet_str,
-                cash_flow=cash_flow_str
-            )
-            
-            # Get key metrics
-            key_metrics = {
-                "P/E Ratio": financial_ratios.get("P/E", "N/A"),
-                "P/B Ratio": financial_ratios.get("P/B", "N/A"),
-                "Profit Margin": financial_ratios.get("Profit Margin", "N/A"),
-                "Debt to Equity": financial_ratios.get("Debt to Equity", "N/A"),
-                "ROE": financial_ratios.get("ROE", "N/A"),
-                "Current Price": company_info.get("currentPrice", "N/A"),
-                "Market Cap": f"${company_info.get('marketCap', 0)/1e9:.2f}B"
-            }
+            analysis = run_chain_cached(self.analysis_chain, "fundamental", self.cache_ttl, **prepared["prompt_inputs"])
             
-            # Compile results
-            results = {
-                "status": "success",
-                "ticker": ticker,
-                "company_name": company_info.get("shortName", ticker),
-                "sector": company_info.get("sector", "N/A"),
-                "industry": company_info.get("industry", "N/A"),
-                "key_metrics": key_metrics,
-                "analysis": analysis
+            return self.compile_results(prepared, analysis)
+        except Exception as e:
+            print(f"Error in fundamental analysis: {e}")
+            return {
+                "status": "error",
+                "message": f"An error occurred during fundamental analysis: {str(e)}"
             }
+    
+    async def aanalyze(self, ticker, snapshot=None):
+        """
+        Perform fundamental analysis without blocking the event loop
+        
+        The yfinance fetches run in a worker thread; the LLM call uses the
+        chain's async client.
+        
+        Args:
+            ticker (str): Stock ticker symbol
+            snapshot (FundamentalSnapshot): Snapshot fetched by the caller (e.g. for a batch), fetched here when None
+            
+        Returns:
+            dict: Fundamental analysis results
+        """
+        try:
+            prepared = await asyncio.to_thread(self.prepare_analysis, ticker, snapshot)
+            if prepared["status"] == "error":
+                return prepared
             
-            return results
+            # Get analysis from Claude
+            analysis = await arun_chain_cached(self.analysis_chain, "fundamental", self.cache_ttl, **prepared["prompt_inputs"])
+            
+            return self.compile_results(prepared, analysis)
         except Exception as e:
             print(f"Error in fundamental analysis: {e}")
             return {
                 "status": "error",
                 "message": f"An error occurred during fundamental analysis: {str(e)}"
-            } 
\ No newline at end of file
+            }
@@ -1,29 +1,38 @@
 import os
-import anthropic
-from langchain_anthropic import ChatAnthropic
+import asyncio
 from langchain.chains import LLMChain
 from langchain.prompts import PromptTemplate
+from agents.clients import get_anthropic_client, get_chat_model
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
-import plotly.graph_objects as go
-import plotly.express as px
-from utils.common import fetch_stock_data, fetch_company_info
+from utils.common import fetch_stock_data_bulk, fetch_reference_data, build_price_panel
+from utils.llm_cache import run_chain_cached, arun_chain_cached
+from utils.charts import get_chart_renderer, render_correlation_heatmap, render_sector_pie
+from utils.risk import compute_var_es, format_var_es, rolling_risk, serialize_rolling_risk, summarize_rolling_risk
+from utils.correlation import correlation_summary, format_correlation_digest
+from utils.optimizer import optimize_portfolio, format_allocations, shrunk_covariance
 
 class RiskAnalysisAgent:
     def __init__(self):
         """Initialize the risk analysis agent with Claude"""
         self.api_key = os.getenv("ANTHROPIC_API_KEY")
         
-        # Initialize direct Anthropic client
-        self.client = anthropic.Anthropic(api_key=self.api_key)
+        # Portfolio narratives are reused for an hour
+        self.cache_ttl = float(os.getenv("RISK_CACHE_TTL", "3600"))
+        
+        # Beyond this many tickers a heatmap is unreadable, so only the correlation digest is built
+        self.heatmap_max_tickers = int(os.getenv("RISK_HEATMAP_MAX_TICKERS", "50"))
+        
+        # Shared Anthropic client (one connection pool for all agents)
+        self.client = get_anthropic_client()
         
         # Initialize LangChain components
-        self.llm = ChatAnthropic(model_name="claude-3-7-sonnet-20250219", anthropic_api_key=self.api_key)
+        self.llm = get_chat_model()
         
         # Prompt for risk analysis
         self.analysis_prompt = PromptTemplate(
-            input_variables=["tickers", "portfolio_summary", "risk_metrics", "correlation_data", "sector_exposure"],
+            input_variables=["tickers", "portfolio_summary", "risk_metrics", "correlation_data", "sector_exposure", "allocation_data"],
             template="""
             You are a risk management specialist analyzing a stock portfolio. Analyze the following portfolio data and provide a comprehensive risk assessment:
             
@@ -42,6 +51,9 @@ class RiskAnalysisAgent:
             ## Sector Exposure
             {sector_exposure}
             
+            ## Optimized Allocations
+            {allocation_data}
+            
             Based on this data, provide:
             1. Risk Assessment: Evaluate the overall portfolio risk level (low, medium, high)
             2. Diversification Analysis: Assess how well-diversified the portfolio is
@@ -50,7 +62,7 @@ class RiskAnalysisAgent:
             5. Volatility Analysis: Evaluate the portfolio's historical volatility
             6. Drawdown Risk: Identify maximum potential drawdowns based on historical data
             7. Risk Reduction Recommendations: Suggest ways to reduce portfolio risk
-            8. Optimal Asset Allocation: Recommend a more balanced allocation if needed
+            8. Optimal Asset Allocation: Compare the current allocation with the optimized allocations above and recommend a more balanced allocation if needed
             
             Format your analysis as a structured report that a portfolio manager could use to make informed risk management decisions.
             """
@@ -58,39 +70,47 @@ class RiskAnalysisAgent:
         
         self.analysis_chain = LLMChain(llm=self.llm, prompt=self.analysis_prompt)
     
-    def calculate_portfolio_metrics(self, stock_data, weights=None):
+    def calculate_portfolio_metrics(self, stock_data, weights=None, include_correlation_matrix=False):
         """
         Calculate portfolio risk metrics
         
         Args:
             stock_data (dict): Dictionary of stock data frames
-            weights (list): Portfolio weights
+            weights (list or dict): Portfolio weights, aligned with stock_data or keyed by ticker
+            include_correlation_matrix (bool): Keep the full correlation matrix even for large universes
             
         Returns:
             dict: Portfolio metrics
         """
-        # Prepare returns data
-        returns_data = {}
-        for ticker, data in stock_data.items():
-            if data is not None and not data.empty:
-                returns_data[ticker] = data['Close'].pct_change().dropna()
-        
-        # If any stock has no data, return error
-        if not returns_data:
+        # Align closes on the union of dates
+        closes = build_price_panel(stock_data)
+        
+        # If no stock has data, return error
+        if closes.empty:
             return None
         
-        # Combine returns into a single dataframe
-        returns_df = pd.DataFrame(returns_data)
+        # Each return is taken against the ticker's previous available close, so calendar gaps don't drop it
+        returns_df = (closes / closes.ffill().shift(1) - 1).dropna(how='all')
+        
+        # Weights keyed by ticker are aligned with the returns and normalized
+        if isinstance(weights, dict):
+            aligned = [max(float(weights.get(ticker, 0.0)), 0.0) for ticker in returns_df.columns]
+            weights = [weight / sum(aligned) for weight in aligned] if sum(aligned) > 0 else None
         
         # If weights not provided, assume equal weighting
         if weights is None:
-            weights = [1/len(returns_data)] * len(returns_data)
+            weights = [1/len(returns_df.columns)] * len(returns_df.columns)
         
         # Calculate portfolio return
         portfolio_returns = returns_df.dot(weights)
         
         # Calculate metrics
         metrics = {}
+        metrics['weights'] = dict(zip(returns_df.columns, weights))
+        
+        # Complete-case returns panel and covariance, shared with the optimizer
+        metrics['returns'] = returns_df.dropna()
+        metrics['covariance'] = shrunk_covariance(metrics['returns']) if len(metrics['returns']) > 1 else None
         
         # Annualized return (assuming daily data)
         metrics['annualized_return'] = portfolio_returns.mean() * 252 * 100  # in percent
@@ -110,17 +130,40 @@ class RiskAnalysisAgent:
         # Value at Risk (95% confidence)
         metrics['var_95'] = portfolio_returns.quantile(0.05) * 100  # in percent
         
-        # Calculate correlation matrix
-        metrics['correlation_matrix'] = returns_df.corr()
+        # Historical, parametric and Monte Carlo VaR/ES across confidence levels and horizons
+        metrics['var_es'] = compute_var_es(returns_df, weights)
         
-        # Calculate average correlation
-        corr_matrix = metrics['correlation_matrix'].values
-        corr_matrix = np.triu(corr_matrix, k=1)  # Upper triangular matrix excluding diagonal
-        non_zero_elements = corr_matrix[corr_matrix != 0]
-        metrics['average_correlation'] = non_zero_elements.mean() if len(non_zero_elements) > 0 else 0
+        # Rolling volatility, Sharpe, drawdown and VaR series
+        metrics['rolling'] = rolling_risk(portfolio_returns.dropna())
+        
+        # Correlation digest (top pairs, per-ticker summaries); the full matrix only when needed
+        keep_matrix = include_correlation_matrix or len(returns_df.columns) <= self.heatmap_max_tickers
+        correlation = correlation_summary(returns_df, include_matrix=keep_matrix)
+        metrics['correlation_matrix'] = correlation.pop('matrix', None)
+        metrics['correlation'] = correlation
+        
+        # Average over every defined pair, genuine zero correlations included
+        metrics['average_correlation'] = correlation['average_correlation']
         
         return metrics
     
+    @staticmethod
+    def format_correlation_matrix(corr_matrix):
+        """
+        Serialize a correlation matrix for the API
+        
+        Args:
+            corr_matrix (pd.DataFrame): Correlation matrix
+            
+        Returns:
+            dict: Ticker order and rows of values (None where undefined)
+        """
+        values = corr_matrix.to_numpy().round(4)
+        return {
+            "tickers": [str(ticker) for ticker in corr_matrix.columns],
+            "values": [[None if np.isnan(value) else float(value) for value in row] for row in values]
+        }
+    
     def generate_correlation_heatmap(self, corr_matrix):
         """
         Generate a correlation heatmap
@@ -131,159 +174,246 @@ class RiskAnalysisAgent:
         Returns:
             str: HTML for the heatmap
         """
-        fig = px.imshow(
-            corr_matrix,
-            color_continuous_scale='RdBu_r',
-            labels=dict(color="Correlation"),
-            title="Stock Correlation Heatmap"
-        )
-        
-        fig.update_layout(
-            height=600,
-            width=700,
-        )
-        
-        return fig.to_html(full_html=False, include_plotlyjs='cdn')
+        return get_chart_renderer().render(render_correlation_heatmap, corr_matrix)
     
-    def generate_sector_breakdown(self, tickers):
+    def generate_sector_breakdown(self, tickers, reference=None):
         """
         Generate sector breakdown for a list of tickers
         
         Args:
             tickers (list): List of stock tickers
+            reference (dict): Ticker -> reference record fetched by the caller, looked up here when None
             
         Returns:
             tuple: (sector_breakdown, sector_chart_html)
         """
+        # One index lookup for the whole portfolio; only unknown tickers go upstream
+        if reference is None:
+            reference = fetch_reference_data(tickers)
         sector_counts = {}
         
         for ticker in tickers:
-            info = fetch_company_info(ticker)
-            if info and 'sector' in info:
-                sector = info['sector']
-                if sector in sector_counts:
-                    sector_counts[sector] += 1
-                else:
-                    sector_counts[sector] = 1
-            else:
-                if 'Unknown' in sector_counts:
-                    sector_counts['Unknown'] += 1
-                else:
-                    sector_counts['Unknown'] = 1
+            sector = (reference.get(ticker) or {}).get('sector') or 'Unknown'
+            sector_counts[sector] = sector_counts.get(sector, 0) + 1
         
         # Calculate percentages
         total = sum(sector_counts.values())
         sector_percentages = {sector: (count / total) * 100 for sector, count in sector_counts.items()}
         
-        # Create pie chart
-        fig = px.pie(
-            values=list(sector_percentages.values()),
-            names=list(sector_percentages.keys()),
-            title="Portfolio Sector Allocation"
-        )
+        # Render the pie chart (cached per allocation)
+        return sector_percentages, get_chart_renderer().render(render_sector_pie, sector_percentages)
+    
+    def prepare_analysis(self, tickers, period="1y", progress_callback=None, include_correlation_matrix=False,
+                         weights=None, max_weight=None, stock_data=None, reference=None):
+        """
+        Fetch data and compute everything the analysis needs short of the LLM call
         
-        fig.update_layout(
-            height=500,
-            width=700
+        Args:
+            tickers (list): List of stock tickers
+            period (str): Time period to analyze
+            progress_callback (callable): Called as ``progress_callback(fraction, message)`` between stages
+            include_correlation_matrix (bool): Return the full correlation matrix as well as the digest
+            weights (dict): Current portfolio weights by ticker, equal weights if None
+            max_weight (float): Maximum weight per position for the optimized allocations
+            stock_data (dict): Ticker -> price data fetched by the caller, fetched here when None
+            reference (dict): Ticker -> reference record fetched by the caller, looked up here when None
+            
+        Returns:
+            dict: Metrics, charts and prompt inputs, or an error result
+        """
+        report = progress_callback or (lambda progress, message=None: None)
+        
+        if not tickers:
+            return {
+                "status": "error",
+                "message": "No tickers provided for analysis."
+            }
+        
+        # Fetch stock data for all tickers concurrently unless the caller already has it
+        report(0.0, "Fetching price history")
+        if stock_data is None:
+            stock_data = fetch_stock_data_bulk(tickers, period=period)
+        report(0.3, "Calculating portfolio metrics")
+        
+        # Calculate portfolio metrics
+        metrics = self.calculate_portfolio_metrics(stock_data, weights, include_correlation_matrix=include_correlation_matrix)
+        
+        if not metrics:
+            return {
+                "status": "error",
+                "message": "Could not calculate portfolio metrics."
+            }
+        
+        # Generate correlation heatmap
+        report(0.4, "Building charts and sector breakdown")
+        corr_matrix = metrics['correlation_matrix']
+        corr_heatmap = None
+        if corr_matrix is not None and len(corr_matrix) <= self.heatmap_max_tickers:
+            corr_heatmap = self.generate_correlation_heatmap(corr_matrix)
+        
+        # Get sector breakdown
+        sector_breakdown, sector_chart = self.generate_sector_breakdown(tickers, reference)
+        
+        # Optimized allocations from the same returns panel and covariance
+        optimization = {}
+        if metrics['covariance'] is not None:
+            optimization = optimize_portfolio(metrics['returns'], max_weight, covariance=metrics['covariance'])
+        
+        # Format portfolio summary
+        allocation = "Equal-weighted" if weights is None else ", ".join(
+            f"{ticker} {weight:.1%}" for ticker, weight in metrics['weights'].items()
         )
+        portfolio_summary = f"""
+        Number of Stocks: {len(tickers)}
+        Stocks: {', '.join(tickers)}
+        Analysis Period: {period}
+        Current Allocation: {allocation}
+        """
+        
+        # Format risk metrics
+        risk_metrics = f"""
+        Annualized Return: {metrics['annualized_return']:.2f}%
+        Annualized Volatility: {metrics['annualized_volatility']:.2f}%
+        Sharpe Ratio: {metrics['sharpe_ratio']:.2f}
+        Maximum Drawdown: {metrics['max_drawdown']:.2f}%
+        Value at Risk (95%): {metrics['var_95']:.2f}%
+        Average Correlation: {metrics['average_correlation']:.2f}
+        """
         
-        return sector_percentages, fig.to_html(full_html=False, include_plotlyjs='cdn')
+        # VaR/ES table (VaR and ES as returns, negative numbers are losses)
+        if metrics['var_es']:
+            risk_metrics += format_var_es(metrics['var_es'])
+        
+        # Trend of the rolling metrics
+        rolling_summary = summarize_rolling_risk(metrics['rolling'])
+        if rolling_summary:
+            risk_metrics += "\n\nRolling Trends:\n" + rolling_summary
+        
+        # Format correlation data (a digest whose size does not grow with the square of the universe)
+        correlation_data = format_correlation_digest(metrics['correlation'])
+        
+        # Format sector exposure
+        sector_exposure = "\n".join([f"{sector}: {percentage:.2f}%" for sector, percentage in sector_breakdown.items()])
+        
+        return {
+            "status": "success",
+            "tickers": tickers,
+            "period": period,
+            "metrics": {
+                "annualized_return": f"{metrics['annualized_return']:.2f}%",
+                "annualized_volatility": f"{metrics['annualized_volatility']:.2f}%",
+                "sharpe_ratio": f"{metrics['sharpe_ratio']:.2f}",
+                "max_drawdown": f"{metrics['max_drawdown']:.2f}%",
+                "var_95": f"{metrics['var_95']:.2f}%",
+                "average_correlation": f"{metrics['average_correlation']:.2f}"
+            },
+            "var_es": metrics['var_es'],
+            "correlation": metrics['correlation'],
+            "optimization": optimization,
+            "rolling": serialize_rolling_risk(metrics['rolling']),
+            "charts": {
+                "correlation_heatmap": corr_heatmap,
+                "sector_chart": sector_chart
+            },
+            "correlation_matrix": self.format_correlation_matrix(corr_matrix) if include_correlation_matrix else None,
+            "prompt_inputs": {
+                "tickers": ', '.join(tickers),
+                "portfolio_summary": portfolio_summary,
+                "risk_metrics": risk_metrics,
+                "correlation_data": correlation_data,
+                "sector_exposure": sector_exposure,
+                "allocation_data": format_allocations(optimization)
+            }
+        }
     
-    def analyze(self, tickers, period="1y"):
+    def compile_results(self, prepared, analysis):
+        """
+        Combine prepared data and the LLM narrative into the final result
+        
+        Args:
+            prepared (dict): Output of prepare_analysis
+            analysis (str): Narrative from Claude
+            
+        Returns:
+            dict: Risk analysis results
+        """
+        results = {key: value for key, value in prepared.items() if key != "prompt_inputs"}
+        results["analysis"] = analysis
+        return results
+    
+    def analyze(self, tickers, period="1y", progress_callback=None, include_correlation_matrix=False,
+                weights=None, max_weight=None, stock_data=None, reference=None):
         """
         Perform risk analysis on a portfolio
         
         Args:
             tickers (list): List of stock tickers
             period (str): Time period to analyze
+            progress_callback (callable): Called as ``progress_callback(fraction, message)`` between stages
+            include_correlation_matrix (bool): Return the full correlation matrix as well as the digest
+            weights (dict): Current portfolio weights by ticker, equal weights if None
+            max_weight (float): Maximum weight per position for the optimized allocations
+            stock_data (dict): Ticker -> price data fetched by the caller, fetched here when None
+            reference (dict): Ticker -> reference record fetched by the caller, looked up here when None
             
         Returns:
             dict: Risk analysis results
         """
         try:
-            if not tickers:
-                return {
-                    "status": "error",
-                    "message": "No tickers provided for analysis."
-                }
-            
-            # Fetch stock data for all tickers
-            stock_data = {}
-            for ticker in tickers:
-                data = fetch_stock_data(ticker, period=period)
-                stock_data[ticker] = data
-            
-            # Calculate portfolio metrics
-            metrics = self.calculate_portfolio_metrics(stock_data)
-            
-            if not metrics:
-                return {
-                    "status": "error",
-                    "message": "Could not calculate portfolio metrics."
-                }
-            
-            # Generate correlation heatmap
-            corr_heatmap = self.generate_correlation_heatmap(metrics['correlation_matrix'])
-            
-            # Get sector breakdown
-            sector_breakdown, sector_chart = self.generate_sector_breakdown(tickers)
-            
-            # Format portfolio summary
-            portfolio_summary = f"""
-            Number of Stocks: {len(tickers)}
-            Stocks: {', '.join(tickers)}
-            Analysis Period: {period}
-            """
-            
-            # Format risk metrics
-            risk_metrics = f"""
-            Annualized Return: {metrics['annualized_return']:.2f}%
-            Annualized Volatility: {metrics['annualized_volatility']:.2f}%
-            Sharpe Ratio: {metrics['sharpe_ratio']:.2f}
-            Maximum Drawdown: {metrics['max_drawdown']:.2f}%
-            Value at Risk (95%): {metrics['var_95']:.2f}%
-            Average Correlation: {metrics['average_correlation']:.2f}
-            """
+            prepared = self.prepare_analysis(
+                tickers, period, progress_callback, include_correlation_matrix, weights, max_weight, stock_data, reference
+            )
+            if prepared["status"] == "error":
+                return prepared
             
-            # Format correlation data
-            correlation_data = metrics['correlation_matrix'].to_string()
+            # Get analysis from Claude
+            if progress_callback:
+                progress_callback(0.8, "Generating risk assessment")
+            analysis = run_chain_cached(self.analysis_chain, "risk", self.cache_ttl, **prepared["prompt_inputs"])
             
-            # Format sector exposure
-            sector_exposure = "\n".join([f"{sector}: {percentage:.2f}%" for sector, percentage in sector_breakdown.items()])
+            return self.compile_results(prepared, analysis)
+        except Exception as e:
+            print(f"Error in risk analysis: {e}")
+            return {
+                "status": "error",
+                "message": f"An error occurred during risk analysis: {str(e)}"
+            }
+    
+    async def aanalyze(self, tickers, period="1y", include_correlation_matrix=False, weights=None, max_weight=None,
+                       stock_data=None, reference=None):
+        """
+        Perform risk analysis without blocking the event loop
+        
+        Price fetching, metrics and charts run in a worker thread; the LLM
+        call uses the chain's async client.
+        
+        Args:
+            tickers (list): List of stock tickers
+            period (str): Time period to analyze
+            include_correlation_matrix (bool): Return the full correlation matrix as well as the digest
+            weights (dict): Current portfolio weights by ticker, equal weights if None
+            max_weight (float): Maximum weight per position for the optimized allocations
+            stock_data (dict): Ticker -> price data fetched by the caller, fetched here when None
+            reference (dict): Ticker -> reference record fetched by the caller, looked up here when None
             
-            # Get analysis from Claude
-            analysis = self.analysis_chain.run(
-                tickers=', '.join(tickers),
-                portfolio_summary=portfolio_summary,
-                risk_metrics=risk_metrics,
-                correlation_data=correlation_data,
-                sector_exposure=sector_exposure
+        Returns:
+            dict: Risk analysis results
+        """
+        try:
+            prepared = await asyncio.to_thread(
+                self.prepare_analysis, tickers, period, None, include_correlation_matrix, weights, max_weight, stock_data,
+                reference
             )
+            if prepared["status"] == "error":
+                return prepared
             
-            # Compile results
-            results = {
-                "status": "success",
-                "tickers": tickers,
-                "period": period,
-                "metrics": {
-                    "annualized_return": f"{metrics['annualized_return']:.2f}%",
-                    "annualized_volatility": f"{metrics['annualized_volatility']:.2f}%",
-                    "sharpe_ratio": f"{metrics['sharpe_ratio']:.2f}",
-                    "max_drawdown": f"{metrics['max_drawdown']:.2f}%",
-                    "var_95": f"{metrics['var_95']:.2f}%",
-                    "average_correlation": f"{metrics['average_correlation']:.2f}"
-                },
-                "analysis": analysis,
-                "charts": {
-                    "correlation_heatmap": corr_heatmap,
-                    "sector_chart": sector_chart
-                }
-            }
+            # Get analysis from Claude
+            analysis = await arun_chain_cached(self.analysis_chain, "risk", self.cache_ttl, **prepared["prompt_inputs"])
             
-            return results
+            return self.compile_results(prepared, analysis)
         except Exception as e:
             print(f"Error in risk analysis: {e}")
             return {
                 "status": "error",
                 "message": f"An error occurred during risk analysis: {str(e)}"
-            } 
\ No newline at end of file
+            }
@@ -1,21 +1,54 @@
 import os
-import anthropic
-from langchain_anthropic import ChatAnthropic
+import asyncio
 from langchain.chains import LLMChain
 from langchain.prompts import PromptTemplate
+from agents.clients import get_anthropic_client, get_chat_model
+import time
+import json
+import re
+import hashlib
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 import pandas as pd
 from utils.common import fetch_news_articles
+from utils.news_store import cluster_near_duplicates
+from utils.llm_cache import run_chain_cached, arun_chain_cached, chain_cache_key, get_llm_cache
 
 class SentimentAnalysisAgent:
-    def __init__(self):
-        """Initialize the sentiment analysis agent with Claude and NewsAPI"""
+    # Rough output allowance per article in batched mode, used to size batches
+    BATCH_OUTPUT_TOKENS_PER_ARTICLE = 120
+    
+    def __init__(self, max_concurrency=None, article_timeout=None, max_articles=None,
+                 scoring_mode=None, batch_token_budget=None, batch_timeout=None):
+        """
+        Initialize the sentiment analysis agent with Claude and NewsAPI
+        
+        Args:
+            max_concurrency (int): Maximum number of articles scored at the same time
+            article_timeout (float): Seconds to wait for a single article's score before skipping it
+            max_articles (int): Default number of articles analyzed per request
+            scoring_mode (str): "single" (one LLM request per article) or "batch" (several articles per request)
+            batch_token_budget (int): Estimated prompt tokens allowed for the articles in one batch
+            batch_timeout (float): Seconds allowed for scoring all articles of one request
+        """
         self.api_key = os.getenv("ANTHROPIC_API_KEY")
         
-        # Initialize direct Anthropic client
-        self.client = anthropic.Anthropic(api_key=self.api_key)
+        # Article scoring limits
+        self.max_concurrency = max_concurrency or int(os.getenv("SENTIMENT_MAX_CONCURRENCY", "8"))
+        self.article_timeout = article_timeout or float(os.getenv("SENTIMENT_ARTICLE_TIMEOUT", "60"))
+        self.max_articles = max_articles or int(os.getenv("SENTIMENT_MAX_ARTICLES", "10"))
+        self.scoring_mode = scoring_mode or os.getenv("SENTIMENT_SCORING_MODE", "single")
+        self.batch_token_budget = batch_token_budget or int(os.getenv("SENTIMENT_BATCH_TOKEN_BUDGET", "6000"))
+        self.batch_timeout = batch_timeout or float(os.getenv("SENTIMENT_BATCH_TIMEOUT", "180"))
+        
+        # An article's score never changes, so per-article completions are kept indefinitely
+        self.article_cache_ttl = None
+        self.summary_cache_ttl = float(os.getenv("SENTIMENT_SUMMARY_CACHE_TTL", "1800"))
+        
+        # Shared Anthropic client (one connection pool for all agents)
+        self.client = get_anthropic_client()
         
         # Initialize LangChain components for structured sentiment analysis
-        self.llm = ChatAnthropic(model_name="claude-3-7-sonnet-20250219", anthropic_api_key=self.api_key)
+        self.llm = get_chat_model()
         
         # Prompt for detailed sentiment analysis
         self.sentiment_prompt = PromptTemplate(
@@ -47,6 +80,35 @@ class SentimentAnalysisAgent:
         
         self.sentiment_chain = LLMChain(llm=self.llm, prompt=self.sentiment_prompt)
         
+        # Prompt for scoring several articles in one request
+        self.batch_sentiment_prompt = PromptTemplate(
+            input_variables=["articles"],
+            template="""
+            You are a financial sentiment analyst. Analyze each of the following news articles about a company and provide sentiment analysis for every article:
+            
+            {articles}
+            
+            For each article provide:
+            1. Sentiment score: A numerical score from -1.0 (extremely negative) to 1.0 (extremely positive)
+            2. Confidence: A numerical score from 0.0 to 1.0 indicating how confident you are in your assessment
+            3. Key sentiment drivers: What specific information led to this sentiment assessment? (one sentence)
+            4. Potential market impact: How might this news affect the company's stock price? (one sentence)
+            
+            Format your response as a JSON array with exactly one object per article, using each article's id:
+            [
+              {{
+                "id": "<article id>",
+                "sentiment_score": <score>,
+                "confidence": <confidence>,
+                "key_drivers": "<key drivers>",
+                "market_impact": "<potential market impact>"
+              }}
+            ]
+            """
+        )
+        
+        self.batch_sentiment_chain = LLMChain(llm=self.llm, prompt=self.batch_sentiment_prompt)
+        
         # Prompt for overall sentiment summary
         self.summary_prompt = PromptTemplate(
             input_variables=["ticker", "sentiment_analyses"],
@@ -69,6 +131,43 @@ class SentimentAnalysisAgent:
         
         self.summary_chain = LLMChain(llm=self.llm, prompt=self.summary_prompt)
     
+    @staticmethod
+    def parse_article_result(result):
+        """
+        Parse the model's JSON sentiment record, falling back to neutral defaults
+        
+        Args:
+            result (str): Raw model output
+            
+        Returns:
+            dict: sentiment_score, confidence, key_drivers and market_impact
+        """
+        try:
+            # Try to extract JSON if it's embedded in text
+            json_match = re.search(r'({.*})', result, re.DOTALL)
+            if json_match:
+                json_str = json_match.group(1)
+                return json.loads(json_str)
+        except Exception as e:
+            print(f"Error parsing JSON response: {e}")
+        
+        # Fallback to default values if JSON can't be parsed
+        return {
+            "sentiment_score": 0,
+            "confidence": 0.5,
+            "key_drivers": "Could not parse from model output",
+            "market_impact": "Could not parse from model output"
+        }
+    
+    @staticmethod
+    def article_prompt_inputs(article):
+        """Prompt inputs for scoring a single article"""
+        return {
+            "article_title": article.get('title', ''),
+            "article_description": article.get('description', ''),
+            "article_content": article.get('content', '')
+        }
+    
     def analyze_article(self, article):
         """
         Analyze the sentiment of a single news article
@@ -80,70 +179,477 @@ class SentimentAnalysisAgent:
             dict: Sentiment analysis results
         """
         try:
-            title = article.get('title', '')
-            description = article.get('description', '')
-            content = article.get('content', '')
-            
             # Get sentiment analysis from Claude
-            result = self.sentiment_chain.run(
-                article_title=title,
-                article_description=description,
-                article_content=content
+            result = run_chain_cached(
+                self.sentiment_chain,
+                "sentiment_article",
+                self.article_cache_ttl,
+                **self.article_prompt_inputs(article)
             )
+            return self.add_article_metadata(self.parse_article_result(result), article)
+        except Exception as e:
+            print(f"Error analyzing article: {e}")
+            return None
+    
+    async def aanalyze_article(self, article):
+        """
+        Async variant of analyze_article
+        
+        Args:
+            article (dict): News article data
             
-            # Parse JSON response more safely
-            try:
-                # First try using json.loads if it looks like JSON
-                import json
-                import re
-                
-                # Try to extract JSON if it's embedded in text
-                json_match = re.search(r'({.*})', result, re.DOTALL)
-                if json_match:
-                    json_str = json_match.group(1)
-                    analysis = json.loads(json_str)
-                else:
-                    # Fallback to default values if JSON can't be parsed
-                    analysis = {
-                        "sentiment_score": 0,
-                        "confidence": 0.5,
-                        "key_drivers": "Could not parse from model output",
-                        "market_impact": "Could not parse from model output"
-                    }
-            except Exception as e:
-                print(f"Error parsing JSON response: {e}")
-                # Fallback to default values
-                analysis = {
-                    "sentiment_score": 0,
-                    "confidence": 0.5,
-                    "key_drivers": "Could not parse from model output",
-                    "market_impact": "Could not parse from model output"
-                }
-            
-            # Add metadata
-            analysis['source'] = article.get('source', {}).get('name', 'Unknown')
-            analysis['title'] = title
-            analysis['url'] = article.get('url', '')
-            analysis['published_at'] = article.get('publishedAt', '')
-            
-            return analysis
+        Returns:
+            dict: Sentiment analysis results
+        """
+        try:
+            result = await arun_chain_cached(
+                self.sentiment_chain,
+                "sentiment_article",
+                self.article_cache_ttl,
+                **self.article_prompt_inputs(article)
+            )
+            return self.add_article_metadata(self.parse_article_result(result), article)
         except Exception as e:
             print(f"Error analyzing article: {e}")
             return None
     
-    def analyze(self, ticker, days_back=7):
+    @staticmethod
+    def article_id(article, index=None):
+        """
+        Stable short identifier for an article
+        
+        Derived from the URL, else the title, else description, publication
+        time and source together; articles with none of these fall back to
+        their position so they are never merged with each other.
+        
+        Args:
+            article (dict): News article data
+            index (int): Position of the article in its list, the last-resort key
+            
+        Returns:
+            str: 10-character hex id
+        """
+        key = article.get('url') or article.get('title') or "|".join([
+            article.get('description') or '',
+            article.get('publishedAt') or '',
+            (article.get('source') or {}).get('name') or ''
+        ]).strip("|")
+        if not key:
+            key = f"#{index}" if index is not None else ''
+        return hashlib.sha1(key.encode('utf-8')).hexdigest()[:10]
+    
+    @staticmethod
+    def add_article_metadata(analysis, article):
+        """Attach source/title/url/date metadata from the article to an analysis"""
+        analysis['source'] = (article.get('source') or {}).get('name', 'Unknown')
+        analysis['title'] = article.get('title', '')
+        analysis['url'] = article.get('url', '')
+        analysis['published_at'] = article.get('publishedAt', '')
+        analysis['cluster_size'] = article.get('cluster_size', 1)
+        return analysis
+    
+    @staticmethod
+    def select_representatives(articles):
+        """
+        Keep one article per near-duplicate cluster
+        
+        The same wire story syndicated across outlets is scored once; the
+        first article of each cluster represents it and records how many
+        articles it stands for in ``cluster_size``.
+        
+        Args:
+            articles (list): News article data
+            
+        Returns:
+            list: Representative articles in input order
+        """
+        seen, unique = set(), []
+        for article in articles:
+            # Exact repeats of a URL never reach the clustering
+            key = article.get('url') or id(article)
+            if key not in seen:
+                seen.add(key)
+                unique.append(article)
+        return [
+            dict(unique[members[0]], cluster_size=len(members))
+            for members in cluster_near_duplicates(unique)
+        ]
+    
+    @staticmethod
+    def format_batch_article(article_id, article):
+        """Render one article block for the batched prompt"""
+        return "\n".join([
+            f"[id: {article_id}]",
+            f"Title: {article.get('title') or ''}",
+            f"Description: {article.get('description') or ''}",
+            f"Content: {article.get('content') or ''}"
+        ])
+    
+    def build_batches(self, articles):
+        """
+        Pack articles into batches that stay under the prompt token budget
+        
+        Token counts are estimated at ~4 characters per token. Each batch is also
+        capped so the expected JSON output fits in the model's max_tokens.
+        
+        Args:
+            articles (list): News article data
+            
+        Returns:
+            list: Batches, each a list of (article_id, article) pairs
+        """
+        max_per_batch = max(1, (self.llm.max_tokens or 1024) // self.BATCH_OUTPUT_TOKENS_PER_ARTICLE)
+        batches = []
+        current, current_tokens = [], 0
+        seen = set()
+        
+        for index, article in enumerate(articles):
+            article_id = self.article_id(article, index)
+            if article_id in seen:
+                continue
+            seen.add(article_id)
+            
+            tokens = len(self.format_batch_article(article_id, article)) // 4 + 1
+            if current and (current_tokens + tokens > self.batch_token_budget or len(current) >= max_per_batch):
+                batches.append(current)
+                current, current_tokens = [], 0
+            current.append((article_id, article))
+            current_tokens += tokens
+        
+        if current:
+            batches.append(current)
+        return batches
+    
+    def format_batch_prompt(self, batch):
+        """Render the articles block for one batch"""
+        return "\n\n".join(self.format_batch_article(article_id, article) for article_id, article in batch)
+    
+    @staticmethod
+    def parse_batch_result(result):
+        """
+        Parse the model's JSON array of per-article records
+        
+        Args:
+            result (str): Raw model output
+            
+        Returns:
+            dict: Article id -> sentiment record
+        """
+        records = {}
+        json_match = re.search(r'(\[.*\])', result, re.DOTALL)
+        if json_match:
+            for record in json.loads(json_match.group(1)):
+                if isinstance(record, dict) and record.get('id') is not None:
+                    records[str(record.pop('id'))] = record
+        return records
+    
+    def batch_record_key(self, article):
+        """Cache key for one article's batch-scored record, independent of the batch it came in"""
+        key, _ = chain_cache_key(self.batch_sentiment_chain, {"articles": self.format_batch_article("", article)})
+        return key
+    
+    def cached_batch_records(self, batch):
+        """
+        Look up previously batch-scored articles
+        
+        Args:
+            batch (list): (article_id, article) pairs from build_batches
+            
+        Returns:
+            dict: Article id -> sentiment record for the cached articles
+        """
+        cache = get_llm_cache()
+        records = {}
+        for article_id, article in batch:
+            cached = cache.get(self.batch_record_key(article), self.article_cache_ttl, "sentiment_batch")
+            if cached is not None:
+                records[article_id] = json.loads(cached)
+        return records
+    
+    def store_batch_records(self, batch, records):
+        """Cache each article's record from a batch response on its own"""
+        cache = get_llm_cache()
+        model = getattr(self.llm, "model", None) or getattr(self.llm, "model_name", "")
+        for article_id, article in batch:
+            if article_id in records:
+                cache.set(self.batch_record_key(article), json.dumps(records[article_id]), model, "sentiment_batch")
+    
+    def analyze_article_batch(self, batch):
+        """
+        Analyze the sentiment of several articles in a single LLM request
+        
+        Records are cached per article, so only articles not scored before
+        are sent to the model however the batches overlap. Articles missing
+        from the model's response are scored individually.
+        
+        Args:
+            batch (list): (article_id, article) pairs from build_batches
+            
+        Returns:
+            list: Sentiment analysis results in batch order
+        """
+        records = self.cached_batch_records(batch)
+        uncached = [(article_id, article) for article_id, article in batch if article_id not in records]
+        if uncached:
+            try:
+                result = self.batch_sentiment_chain.run(articles=self.format_batch_prompt(uncached))
+                fresh = self.parse_batch_result(result)
+                self.store_batch_records(uncached, fresh)
+                records.update(fresh)
+            except Exception as e:
+                print(f"Error analyzing article batch: {e}")
+        
+        analyses = []
+        for article_id, article in batch:
+            if article_id in records:
+                analyses.append(self.add_article_metadata(dict(records[article_id]), article))
+            else:
+                analyses.append(self.analyze_article(article))
+        return analyses
+    
+    async def aanalyze_article_batch(self, batch):
+        """
+        Async variant of analyze_article_batch
+        
+        Args:
+            batch (list): (article_id, article) pairs from build_batches
+            
+        Returns:
+            list: Sentiment analysis results in batch order
+        """
+        records = await asyncio.to_thread(self.cached_batch_records, batch)
+        uncached = [(article_id, article) for article_id, article in batch if article_id not in records]
+        if uncached:
+            try:
+                result = await self.batch_sentiment_chain.arun(articles=self.format_batch_prompt(uncached))
+                fresh = self.parse_batch_result(result)
+                await asyncio.to_thread(self.store_batch_records, uncached, fresh)
+                records.update(fresh)
+            except Exception as e:
+                print(f"Error analyzing article batch: {e}")
+        
+        missing = [article for article_id, article in batch if article_id not in records]
+        fallbacks = iter(await asyncio.gather(*[self.aanalyze_article(article) for article in missing]))
+        return [
+            self.add_article_metadata(dict(records[article_id]), article) if article_id in records else next(fallbacks)
+            for article_id, article in batch
+        ]
+    
+    def run_with_timeouts(self, jobs, timeouts, on_complete=None):
+        """
+        Run jobs on a bounded worker pool, abandoning any that overrun
+        
+        Each job's timeout counts from the moment it starts running, and the
+        whole call is bounded by ``batch_timeout``: once it passes, jobs that
+        have not started are cancelled and running ones are abandoned. The
+        pool belongs to this call, so an abandoned request only ties up its
+        own thread and never a worker that another caller is queued behind.
+        
+        Args:
+            jobs (list): Zero-argument callables
+            timeouts (list): Timeout in seconds for each job
+            on_complete (callable): Called as ``on_complete(finished, total)`` whenever jobs finish or time out
+            
+        Returns:
+            list: Job results in order, None for jobs that failed or timed out
+        """
+        started = {}
+        results = [None] * len(jobs)
+        if not jobs:
+            return results
+        
+        def run(index, job):
+            started[index] = time.monotonic()
+            return job()
+        
+        deadline = time.monotonic() + self.batch_timeout
+        executor = ThreadPoolExecutor(max_workers=max(1, min(self.max_concurrency, len(jobs))), thread_name_prefix="sentiment")
+        try:
+            futures = {executor.submit(run, i, job): i for i, job in enumerate(jobs)}
+            pending = set(futures)
+            
+            while pending:
+                remaining = len(pending)
+                done, pending = wait(pending, timeout=0.5, return_when=FIRST_COMPLETED)
+                for future in done:
+                    try:
+                        results[futures[future]] = future.result()
+                    except Exception as e:
+                        print(f"Error in sentiment job: {e}")
+                
+                now = time.monotonic()
+                if now > deadline and pending:
+                    print(f"Sentiment batch deadline reached, dropping {len(pending)} of {len(jobs)} jobs")
+                    for future in pending:
+                        future.cancel()
+                    pending = set()
+                
+                for future in list(pending):
+                    index = futures[future]
+                    start = started.get(index)
+                    if start is not None and now - start > timeouts[index]:
+                        print(f"Timed out sentiment job {index + 1} of {len(jobs)}")
+                        pending.discard(future)
+                
+                if on_complete is not None and len(pending) != remaining:
+                    on_complete(len(jobs) - len(pending), len(jobs))
+        finally:
+            # Queued jobs are dropped; abandoned running ones finish in the background
+            executor.shutdown(wait=False, cancel_futures=True)
+        
+        return results
+    
+    def analyze_articles(self, articles, scoring_mode=None, on_complete=None):
+        """
+        Score articles concurrently with a bounded worker pool
+        
+        In "single" mode each article is its own LLM request with an
+        ``article_timeout`` budget. In "batch" mode articles are packed into
+        token-budgeted batches, each scored in one request with a budget of
+        ``article_timeout`` per article it contains.
+        
+        Args:
+            articles (list): News article data
+            scoring_mode (str): "single" or "batch", defaults to the agent setting
+            on_complete (callable): Progress hook, see run_with_timeouts
+            
+        Returns:
+            list: Sentiment analysis results in article order (failed or timed-out articles omitted)
+        """
+        scoring_mode = scoring_mode or self.scoring_mode
+        
+        if scoring_mode == "batch":
+            batches = self.build_batches(articles)
+            results = self.run_with_timeouts(
+                [lambda batch=batch: self.analyze_article_batch(batch) for batch in batches],
+                [self.article_timeout * len(batch) for batch in batches],
+                on_complete
+            )
+            return [analysis for batch in results if batch for analysis in batch if analysis]
+        
+        results = self.run_with_timeouts(
+            [lambda article=article: self.analyze_article(article) for article in articles],
+            [self.article_timeout] * len(articles),
+            on_complete
+        )
+        return [analysis for analysis in results if analysis]
+    
+    async def aanalyze_articles(self, articles, scoring_mode=None):
+        """
+        Async variant of analyze_articles
+        
+        At most ``max_concurrency`` requests are in flight at once, each
+        request is cancelled if it runs past its timeout, and everything still
+        queued or running is cancelled once ``batch_timeout`` has passed.
+        
+        Args:
+            articles (list): News article data
+            scoring_mode (str): "single" or "batch", defaults to the agent setting
+            
+        Returns:
+            list: Sentiment analysis results in article order (failed or timed-out articles omitted)
+        """
+        scoring_mode = scoring_mode or self.scoring_mode
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        
+        async def run(coro_factory, timeout):
+            async with semaphore:
+                try:
+                    return await asyncio.wait_for(coro_factory(), timeout)
+                except asyncio.TimeoutError:
+                    print("Timed out sentiment job")
+                    return None
+        
+        async def run_all(jobs):
+            tasks = [asyncio.ensure_future(run(coro_factory, timeout)) for coro_factory, timeout in jobs]
+            if not tasks:
+                return []
+            _, pending = await asyncio.wait(tasks, timeout=self.batch_timeout)
+            if pending:
+                print(f"Sentiment batch deadline reached, dropping {len(pending)} of {len(tasks)} jobs")
+                for task in pending:
+                    task.cancel()
+                await asyncio.gather(*pending, return_exceptions=True)
+            return [None if task.cancelled() or task.exception() else task.result() for task in tasks]
+        
+        if scoring_mode == "batch":
+            batches = self.build_batches(articles)
+            results = await run_all([
+                (lambda batch=batch: self.aanalyze_article_batch(batch), self.article_timeout * len(batch))
+                for batch in batches
+            ])
+            return [analysis for batch in results if batch for analysis in batch if analysis]
+        
+        results = await run_all([
+            (lambda article=article: self.aanalyze_article(article), self.article_timeout)
+            for article in articles
+        ])
+        return [analysis for analysis in results if analysis]
+    
+    @staticmethod
+    def format_sentiment_analyses(analyses):
+        """Render per-article analyses for the summary prompt"""
+        return "\n\n".join([
+            f"Article: {a.get('title', 'Unknown')}\nSource: {a.get('source', 'Unknown')}\nSentiment Score: {a.get('sentiment_score', 'N/A')}\nKey Drivers: {a.get('key_drivers', 'N/A')}"
+            for a in analyses
+        ])
+    
+    @staticmethod
+    def compile_results(ticker, analyses, summary):
+        """
+        Aggregate per-article analyses and the summary into the final result
+        
+        Args:
+            ticker (str): Stock ticker symbol
+            analyses (list): Per-article sentiment analyses
+            summary (str): Summary from Claude
+            
+        Returns:
+            dict: Sentiment analysis results
+        """
+        # Calculate summary metrics - safely filtering out None values and using defaults
+        sentiment_scores = [a.get('sentiment_score', 0) for a in analyses]
+        # Filter out None values
+        sentiment_scores = [score for score in sentiment_scores if score is not None]
+        
+        if sentiment_scores:
+            avg_sentiment = sum(sentiment_scores) / len(sentiment_scores)
+        else:
+            avg_sentiment = 0  # Default if no valid scores
+        
+        return {
+            "status": "success",
+            "ticker": ticker,
+            "average_sentiment": avg_sentiment,
+            "articles_analyzed": len(analyses),
+            "articles_covered": sum(a.get('cluster_size', 1) for a in analyses),
+            "summary": summary,
+            "detailed_analyses": analyses
+        }
+    
+    def analyze(self, ticker, days_back=7, max_articles=None, scoring_mode=None, progress_callback=None, articles=None):
         """
         Perform sentiment analysis on news articles related to a ticker
         
         Args:
             ticker (str): Stock ticker symbol
             days_back (int): Number of days to look back for news
+            max_articles (int): Maximum number of articles to analyze, defaults to the agent setting
+            scoring_mode (str): "single" or "batch", defaults to the agent setting
+            progress_callback (callable): Called as ``progress_callback(fraction, message)`` as work completes
+            articles (list): News articles fetched by the caller, fetched here when None
             
         Returns:
             dict: Sentiment analysis results
         """
-        # Get news articles
-        articles = fetch_news_articles(ticker, days_back)
+        max_articles = max_articles or self.max_articles
+        report = progress_callback or (lambda progress, message=None: None)
+        
+        # Get news articles unless the caller already has them; extra candidates
+        # leave room for near-duplicates to collapse before the max_articles cap
+        report(0.0, "Fetching news articles")
+        if articles is None:
+            articles = fetch_news_articles(ticker, days_back, page_size=max(max_articles * 5, 50))
         
         if not articles:
             return {
@@ -151,12 +657,13 @@ class SentimentAnalysisAgent:
                 "message": f"No news articles found for {ticker} in the past {days_back} days."
             }
         
-        # Analyze each article
-        analyses = []
-        for article in articles[:10]:  # Limit to 10 articles to save API calls
-            analysis = self.analyze_article(article)
-            if analysis:
-                analyses.append(analysis)
+        # Analyze one article per near-duplicate cluster concurrently, capped to save API calls
+        report(0.1, "Scoring articles")
+        analyses = self.analyze_articles(
+            self.select_representatives(articles)[:max_articles],
+            scoring_mode,
+            lambda finished, total: report(0.1 + 0.8 * finished / total, f"Scored {finished} of {total}")
+        )
         
         if not analyses:
             return {
@@ -164,39 +671,71 @@ class SentimentAnalysisAgent:
                 "message": "Failed to analyze any articles."
             }
         
-        # Calculate summary metrics - safely filtering out None values and using defaults
-        sentiment_scores = [a.get('sentiment_score', 0) for a in analyses]
-        # Filter out None values
-        sentiment_scores = [score for score in sentiment_scores if score is not None]
+        # Get summary from Claude
+        report(0.9, "Summarizing sentiment")
+        try:
+            summary = run_chain_cached(
+                self.summary_chain,
+                "sentiment_summary",
+                self.summary_cache_ttl,
+                ticker=ticker,
+                sentiment_analyses=self.format_sentiment_analyses(analyses)
+            )
+        except Exception as e:
+            print(f"Error generating summary: {e}")
+            summary = f"Could not generate summary. Error: {str(e)}"
         
-        if sentiment_scores:
-            avg_sentiment = sum(sentiment_scores) / len(sentiment_scores)
-        else:
-            avg_sentiment = 0  # Default if no valid scores
+        return self.compile_results(ticker, analyses, summary)
+    
+    async def aanalyze(self, ticker, days_back=7, max_articles=None, scoring_mode=None, articles=None):
+        """
+        Perform sentiment analysis without blocking the event loop
         
-        # Get summary from Claude
-        sentiment_analyses_text = "\n\n".join([
-            f"Article: {a.get('title', 'Unknown')}\nSource: {a.get('source', 'Unknown')}\nSentiment Score: {a.get('sentiment_score', 'N/A')}\nKey Drivers: {a.get('key_drivers', 'N/A')}"
-            for a in analyses
-        ])
+        The NewsAPI fetch runs in a worker thread; article scoring and the
+        summary use the chains' async client.
+        
+        Args:
+            ticker (str): Stock ticker symbol
+            days_back (int): Number of days to look back for news
+            max_articles (int): Maximum number of articles to analyze, defaults to the agent setting
+            scoring_mode (str): "single" or "batch", defaults to the agent setting
+            articles (list): News articles fetched by the caller, fetched here when None
+            
+        Returns:
+            dict: Sentiment analysis results
+        """
+        max_articles = max_articles or self.max_articles
+        
+        # Get news articles unless the caller already has them; extra candidates
+        # leave room for near-duplicates to collapse before the max_articles cap
+        if articles is None:
+            articles = await asyncio.to_thread(fetch_news_articles, ticker, days_back, max(max_articles * 5, 50))
+        
+        if not articles:
+            return {
+                "status": "error",
+                "message": f"No news articles found for {ticker} in the past {days_back} days."
+            }
+        
+        analyses = await self.aanalyze_articles(self.select_representatives(articles)[:max_articles], scoring_mode)
         
+        if not analyses:
+            return {
+                "status": "error",
+                "message": "Failed to analyze any articles."
+            }
+        
+        # Get summary from Claude
         try:
-            summary = self.summary_chain.run(
+            summary = await arun_chain_cached(
+                self.summary_chain,
+                "sentiment_summary",
+                self.summary_cache_ttl,
                 ticker=ticker,
-                sentiment_analyses=sentiment_analyses_text
+                sentiment_analyses=self.format_sentiment_analyses(analyses)
             )
         except Exception as e:
             print(f"Error generating summary: {e}")
             summary = f"Could not generate summary. Error: {str(e)}"
         
-        # Compile results
-        results = {
-            "status": "success",
-            "ticker": ticker,
-            "average_sentiment": avg_sentiment,
-            "articles_analyzed": len(analyses),
-            "summary": summary,
-            "detailed_analyses": analyses
-        }
-        
-        return results 
\ No newline at end of file
+        return self.compile_results(ticker, analyses, summary)
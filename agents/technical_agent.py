@@ -1,26 +1,33 @@
 import os
-import anthropic
-from langchain_anthropic import ChatAnthropic
+import asyncio
 from langchain.chains import LLMChain
 from langchain.prompts import PromptTemplate
+from agents.clients import get_anthropic_client, get_chat_model
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
-import plotly.graph_objects as go
 from utils.common import fetch_stock_data, calculate_technical_indicators
+from utils.llm_cache import run_chain_cached, arun_chain_cached
+from utils.charts import build_chart_series, get_chart_renderer, render_price_charts, DEFAULT_MAX_POINTS, PRICE_CHART_COLUMNS
 import io
 import base64
 
+# Indicator columns used by the chart, summary and key metrics
+AGENT_INDICATORS = ['SMA_20', 'SMA_50', 'MACD', 'MACD_Signal', 'RSI', 'BB_Upper', 'BB_Lower']
+
 class TechnicalAnalysisAgent:
     def __init__(self):
         """Initialize the technical analysis agent with Claude"""
         self.api_key = os.getenv("ANTHROPIC_API_KEY")
         
-        # Initialize direct Anthropic client
-        self.client = anthropic.Anthropic(api_key=self.api_key)
+        # Narratives go stale quickly as new bars arrive
+        self.cache_ttl = float(os.getenv("TECHNICAL_CACHE_TTL", "900"))
+        
+        # Shared Anthropic client (one connection pool for all agents)
+        self.client = get_anthropic_client()
         
         # Initialize LangChain components
-        self.llm = ChatAnthropic(model_name="claude-3-7-sonnet-20250219", anthropic_api_key=self.api_key)
+        self.llm = get_chat_model()
         
         # Prompt for technical analysis
         self.analysis_prompt = PromptTemplate(
@@ -62,120 +69,24 @@ class TechnicalAnalysisAgent:
         Returns:
             dict: HTML for the interactive chart
         """
-        fig = go.Figure()
-        
-        # Add candlestick chart
-        fig.add_trace(go.Candlestick(
-            x=df.index,
-            open=df['Open'],
-            high=df['High'],
-            low=df['Low'],
-            close=df['Close'],
-            name='Price'
-        ))
-        
-        # Add moving averages
-        fig.add_trace(go.Scatter(
-            x=df.index,
-            y=df['SMA_20'],
-            line=dict(color='blue', width=1),
-            name='SMA 20'
-        ))
-        
-        fig.add_trace(go.Scatter(
-            x=df.index,
-            y=df['SMA_50'],
-            line=dict(color='orange', width=1),
-            name='SMA 50'
-        ))
-        
-        # Add Bollinger Bands
-        fig.add_trace(go.Scatter(
-            x=df.index,
-            y=df['BB_Upper'],
-            line=dict(color='rgba(0,128,0,0.3)', width=1),
-            name='BB Upper'
-        ))
-        
-        fig.add_trace(go.Scatter(
-            x=df.index,
-            y=df['BB_Lower'],
-            line=dict(color='rgba(0,128,0,0.3)', width=1),
-            name='BB Lower',
-            fill='tonexty'
-        ))
-        
-        # Set layout
-        fig.update_layout(
-            title=f'Price Chart with Indicators',
-            yaxis_title='Price',
-            xaxis_title='Date',
-            height=600,
-            template='plotly_white'
-        )
-        
-        # Create a second chart for RSI
-        fig_rsi = go.Figure()
-        
-        fig_rsi.add_trace(go.Scatter(
-            x=df.index,
-            y=df['RSI'],
-            line=dict(color='purple', width=1),
-            name='RSI'
-        ))
-        
-        # Add overbought/oversold lines
-        fig_rsi.add_trace(go.Scatter(
-            x=df.index,
-            y=[70] * len(df),
-            line=dict(color='red', width=1, dash='dash'),
-            name='Overbought'
-        ))
-        
-        fig_rsi.add_trace(go.Scatter(
-            x=df.index,
-            y=[30] * len(df),
-            line=dict(color='green', width=1, dash='dash'),
-            name='Oversold'
-        ))
-        
-        fig_rsi.update_layout(
-            title='RSI Indicator',
-            yaxis_title='RSI',
-            xaxis_title='Date',
-            height=300,
-            template='plotly_white'
-        )
-        
-        # Create a third chart for MACD
-        fig_macd = go.Figure()
-        
-        fig_macd.add_trace(go.Scatter(
-            x=df.index,
-            y=df['MACD'],
-            line=dict(color='blue', width=1),
-            name='MACD'
-        ))
-        
-        fig_macd.add_trace(go.Scatter(
-            x=df.index,
-            y=df['MACD_Signal'],
-            line=dict(color='red', width=1),
-            name='Signal Line'
-        ))
-        
-        fig_macd.update_layout(
-            title='MACD Indicator',
-            yaxis_title='MACD',
-            xaxis_title='Date',
-            height=300,
-            template='plotly_white'
-        )
+        # Render in the chart worker pool; unchanged data reuses the cached HTML
+        columns = [column for column in PRICE_CHART_COLUMNS if column in df.columns]
+        return get_chart_renderer().render(render_price_charts, df[columns])
+    
+    def generate_chart_data(self, df, max_points=None):
+        """
+        Generate compact chart data for client-side rendering
         
+        Args:
+            df (pd.DataFrame): Stock data with technical indicators
+            max_points (int): Target points per chart panel after LTTB downsampling
+            
+        Returns:
+            dict: Columnar base64 float32 series per panel (price, rsi, macd)
+        """
         return {
-            'price_chart': fig.to_html(full_html=False, include_plotlyjs='cdn'),
-            'rsi_chart': fig_rsi.to_html(full_html=False, include_plotlyjs='cdn'),
-            'macd_chart': fig_macd.to_html(full_html=False, include_plotlyjs='cdn')
+            'format': 'data',
+            'series': build_chart_series(df, max_points=max_points or DEFAULT_MAX_POINTS)
         }
     
     def summarize_price_data(self, df):
@@ -282,71 +193,148 @@ class TechnicalAnalysisAgent:
         
         return summary
     
-    def analyze(self, ticker, period="1y"):
+    def prepare_analysis(self, ticker, period="1y", chart_format="html", max_points=None, data=None):
         """
-        Perform technical analysis on a stock
+        Fetch data and compute everything the analysis needs short of the LLM call
         
         Args:
             ticker (str): Stock ticker symbol
             period (str): Time period to analyze
+            chart_format (str): "html" for Plotly HTML charts, "data" for downsampled chart series
+            max_points (int): Target points per chart panel when chart_format is "data"
+            data (pd.DataFrame): Price data fetched by the caller (e.g. for a batch), fetched here when None
             
         Returns:
-            dict: Technical analysis results
+            dict: Key metrics, charts and prompt inputs, or an error result
         """
-        try:
-            # Fetch stock data
+        # Fetch stock data unless the caller already has it
+        if data is None:
             data = fetch_stock_data(ticker, period=period)
-            
-            if data is None or data.empty:
-                return {
-                    "status": "error",
-                    "message": f"Could not fetch stock data for {ticker}."
-                }
-            
-            # Calculate technical indicators
-            df_with_indicators = calculate_technical_indicators(data)
-            
-            # Generate price chart
+        
+        if data is None or data.empty:
+            return {
+                "status": "error",
+                "message": f"Could not fetch stock data for {ticker}."
+            }
+        
+        # Calculate technical indicators
+        df_with_indicators = calculate_technical_indicators(data, AGENT_INDICATORS)
+        
+        # Generate price chart
+        if chart_format == "data":
+            charts = self.generate_chart_data(df_with_indicators, max_points)
+        else:
             charts = self.generate_price_chart(df_with_indicators)
+        
+        # Create summaries
+        price_summary = self.summarize_price_data(data)
+        indicator_summary = self.summarize_indicators(df_with_indicators)
+        
+        # Calculate key metrics
+        last_row = df_with_indicators.iloc[-1]
+        key_metrics = {
+            "Current Price": f"${last_row['Close']:.2f}",
+            "RSI": f"{last_row['RSI']:.2f}",
+            "MACD": f"{last_row['MACD']:.3f}",
+            "20-day SMA": f"${last_row['SMA_20']:.2f}",
+            "50-day SMA": f"${last_row['SMA_50']:.2f}",
+            "Upper BB": f"${last_row['BB_Upper']:.2f}",
+            "Lower BB": f"${last_row['BB_Lower']:.2f}"
+        }
+        
+        return {
+            "status": "success",
+            "ticker": ticker,
+            "period": period,
+            "key_metrics": key_metrics,
+            "charts": charts,
+            "prompt_inputs": {
+                "ticker": ticker,
+                "period": period,
+                "price_data": price_summary,
+                "indicator_data": indicator_summary
+            }
+        }
+    
+    def compile_results(self, prepared, analysis):
+        """
+        Combine prepared data and the LLM narrative into the final result
+        
+        Args:
+            prepared (dict): Output of prepare_analysis
+            analysis (str): Narrative from Claude
             
-            # Create summaries
-            price_summary = self.summarize_price_data(data)
-            indicator_summary = self.summarize_indicators(df_with_indicators)
+        Returns:
+            dict: Technical analysis results
+        """
+        return {
+            "status": "success",
+            "ticker": prepared["ticker"],
+            "period": prepared["period"],
+            "key_metrics": prepared["key_metrics"],
+            "analysis": analysis,
+            "charts": prepared["charts"]
+        }
+    
+    def analyze(self, ticker, period="1y", chart_format="html", max_points=None, data=None):
+        """
+        Perform technical analysis on a stock
+        
+        Args:
+            ticker (str): Stock ticker symbol
+            period (str): Time period to analyze
+            chart_format (str): "html" for Plotly HTML charts, "data" for downsampled chart series
+            max_points (int): Target points per chart panel when chart_format is "data"
+            data (pd.DataFrame): Price data fetched by the caller (e.g. for a batch), fetched here when None
+            
+        Returns:
+            dict: Technical analysis results
+        """
+        try:
+            prepared = self.prepare_analysis(ticker, period, chart_format, max_points, data)
+            if prepared["status"] == "error":
+                return prepared
             
             # Get analysis from Claude
-            analysis = self.analysis_chain.run(
-                ticker=ticker,
-                period=period,
-                price_data=price_summary,
-                indicator_data=indicator_summary
-            )
+            analysis = run_chain_cached(self.analysis_chain, "technical", self.cache_ttl, **prepared["prompt_inputs"])
             
-            # Calculate key metrics
-            last_row = df_with_indicators.iloc[-1]
-            key_metrics = {
-                "Current Price": f"${last_row['Close']:.2f}",
-                "RSI": f"{last_row['RSI']:.2f}",
-                "MACD": f"{last_row['MACD']:.3f}",
-                "20-day SMA": f"${last_row['SMA_20']:.2f}",
-                "50-day SMA": f"${last_row['SMA_50']:.2f}",
-                "Upper BB": f"${last_row['BB_Upper']:.2f}",
-                "Lower BB": f"${last_row['BB_Lower']:.2f}"
+            return self.compile_results(prepared, analysis)
+        except Exception as e:
+            print(f"Error in technical analysis: {e}")
+            return {
+                "status": "error",
+                "message": f"An error occurred during technical analysis: {str(e)}"
             }
+    
+    async def aanalyze(self, ticker, period="1y", chart_format="html", max_points=None, data=None):
+        """
+        Perform technical analysis without blocking the event loop
+        
+        Data fetching and indicator/chart computation run in a worker thread;
+        the LLM call uses the chain's async client.
+        
+        Args:
+            ticker (str): Stock ticker symbol
+            period (str): Time period to analyze
+            chart_format (str): "html" for Plotly HTML charts, "data" for downsampled chart series
+            max_points (int): Target points per chart panel when chart_format is "data"
+            data (pd.DataFrame): Price data fetched by the caller (e.g. for a batch), fetched here when None
             
-            # Compile results
-            results = {
-                "status": "success",
-                "ticker": ticker,
-                "period": period,
-                "key_metrics": key_metrics,
-                "analysis": analysis,
-                "charts": charts
-            }
+        Returns:
+            dict: Technical analysis results
+        """
+        try:
+            prepared = await asyncio.to_thread(self.prepare_analysis, ticker, period, chart_format, max_points, data)
+            if prepared["status"] == "error":
+                return prepared
+            
+            # Get analysis from Claude
+            analysis = await arun_chain_cached(self.analysis_chain, "technical", self.cache_ttl, **prepared["prompt_inputs"])
             
-            return results
+            return self.compile_results(prepared, analysis)
         except Exception as e:
             print(f"Error in technical analysis: {e}")
             return {
                 "status": "error",
                 "message": f"An error occurred during technical analysis: {str(e)}"
-            } 
\ No newline at end of file
+            }
@@ -0,0 +1,47 @@
+import os
+import asyncio
+
+# Per-ticker analyses in flight at once within one batch request
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "4"))
+
+
+async def run_batch(tickers, analyze, concurrency=None):
+    """
+    Run an async per-ticker analysis over many tickers with a concurrency cap
+
+    Each ticker succeeds or fails on its own; one failure does not affect
+    the rest of the batch.
+
+    Args:
+        tickers (list): Stock ticker symbols (duplicates are analyzed once)
+        analyze (callable): ``await analyze(ticker)`` returning an analysis result dict
+        concurrency (int): Maximum analyses running at once, defaults to BATCH_CONCURRENCY
+
+    Returns:
+        dict: succeeded/failed counts, per-ticker results and per-ticker error messages
+    """
+    tickers = list(dict.fromkeys(tickers))
+    semaphore = asyncio.Semaphore(concurrency or BATCH_CONCURRENCY)
+
+    async def run_one(ticker):
+        async with semaphore:
+            try:
+                return ticker, await analyze(ticker)
+            except Exception as e:
+                print(f"Error in batch analysis for {ticker}: {e}")
+                return ticker, {"status": "error", "message": str(e)}
+
+    results, errors = {}, {}
+    for ticker, result in await asyncio.gather(*(run_one(ticker) for ticker in tickers)):
+        if result.get("status") == "error":
+            errors[ticker] = result.get("message", "Analysis failed")
+        else:
+            results[ticker] = result
+
+    return {
+        "status": "success",
+        "succeeded": len(results),
+        "failed": len(errors),
+        "results": results,
+        "errors": errors
+    }
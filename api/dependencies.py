@@ -0,0 +1,65 @@
+import threading
+import traceback
+
+from agents.sentiment_agent import SentimentAnalysisAgent
+from agents.fundamental_agent import FundamentalAnalysisAgent
+from agents.technical_agent import TechnicalAnalysisAgent
+from agents.risk_agent import RiskAnalysisAgent
+
+AGENT_CLASSES = {
+    "sentiment": SentimentAnalysisAgent,
+    "fundamental": FundamentalAnalysisAgent,
+    "technical": TechnicalAnalysisAgent,
+    "risk": RiskAnalysisAgent,
+}
+
+_agents_lock = threading.Lock()
+
+
+def create_agents(app):
+    """
+    Build one instance of every agent and keep it on the application state
+
+    Agents that fail to initialize are left out and retried on first use.
+
+    Args:
+        app (FastAPI): Application whose state holds the agents
+    """
+    app.state.agents = {}
+    for name in AGENT_CLASSES:
+        try:
+            get_agent(app, name)
+        except Exception as e:
+            print(f"Error initializing {name} agent: {str(e)}")
+            print(traceback.format_exc())
+
+
+def get_agent(app, name):
+    """
+    Return the application-lifetime instance of an agent, creating it if needed
+
+    Args:
+        app (FastAPI): Application whose state holds the agents
+        name (str): Agent name (sentiment, fundamental, technical, risk)
+
+    Returns:
+        Agent instance shared across requests
+    """
+    agents = getattr(app.state, "agents", None)
+    if agents is not None and name in agents:
+        return agents[name]
+    with _agents_lock:
+        if not hasattr(app.state, "agents"):
+            app.state.agents = {}
+        if name not in app.state.agents:
+            app.state.agents[name] = AGENT_CLASSES[name]()
+        return app.state.agents[name]
+
+
+def shutdown_agents(app):
+    """Release worker pools held by the shared agents"""
+    for agent in getattr(app.state, "agents", {}).values():
+        executor = getattr(agent, "executor", None)
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+    app.state.agents = {}
@@ -0,0 +1,143 @@
+import os
+import time
+import uuid
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+
+class Job:
+    """
+    State of one background analysis
+    """
+
+    def __init__(self, kind, params):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.params = params
+        self.status = "queued"
+        self.progress = 0.0
+        self.message = "Queued"
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.result = None
+        self.error = None
+
+    def report(self, progress, message=None):
+        """
+        Progress callback handed to the job body
+
+        Args:
+            progress (float): Fraction complete between 0 and 1
+            message (str): Optional human-readable stage description
+        """
+        self.progress = max(0.0, min(1.0, float(progress)))
+        if message:
+            self.message = message
+
+    def to_dict(self, include_result=True):
+        """Serialize the job for the API"""
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "progress": self.progress,
+            "message": self.message,
+            "params": self.params,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "result": self.result if include_result else None,
+            "error": self.error
+        }
+
+
+class JobManager:
+    """
+    Runs long analyses on a local worker pool and keeps their results for a while.
+
+    Finished jobs are retained for ``retention`` seconds and purged lazily
+    whenever jobs are submitted or looked up.
+    """
+
+    def __init__(self, max_workers=None, retention=None):
+        """
+        Initialize the job manager
+
+        Args:
+            max_workers (int): Number of analyses that run at the same time
+            retention (float): Seconds finished jobs are kept
+        """
+        self.max_workers = max_workers or int(os.getenv("JOB_WORKERS", "4"))
+        self.retention = retention or float(os.getenv("JOB_RETENTION_SECONDS", "3600"))
+        self.executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="job")
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, kind, params, body):
+        """
+        Enqueue a job
+
+        Args:
+            kind (str): Job type (risk, sentiment, technical, fundamental)
+            params (dict): Request parameters, echoed back in the job status
+            body (callable): ``body(job)`` returning an analysis result dict
+
+        Returns:
+            Job: The queued job
+        """
+        job = Job(kind, params)
+        with self._lock:
+            self._purge_expired()
+            self._jobs[job.id] = job
+        self.executor.submit(self._run, job, body)
+        return job
+
+    def _run(self, job, body):
+        job.status = "running"
+        job.started_at = time.time()
+        job.message = "Running"
+        try:
+            result = body(job)
+            if isinstance(result, dict) and result.get("status") == "error":
+                job.status = "failed"
+                job.error = result.get("message", f"{job.kind.capitalize()} analysis failed")
+            else:
+                job.status = "succeeded"
+                job.result = result
+                job.progress = 1.0
+            job.message = "Finished" if job.status == "succeeded" else "Failed"
+        except Exception as e:
+            print(f"Error in {job.kind} job {job.id}: {e}")
+            print(traceback.format_exc())
+            job.status = "failed"
+            job.error = str(e)
+            job.message = "Failed"
+        finally:
+            job.finished_at = time.time()
+
+    def get(self, job_id):
+        """Look up a job by id, or None if unknown or expired"""
+        with self._lock:
+            self._purge_expired()
+            return self._jobs.get(job_id)
+
+    def list(self):
+        """All retained jobs, newest first"""
+        with self._lock:
+            self._purge_expired()
+            return sorted(self._jobs.values(), key=lambda job: job.created_at, reverse=True)
+
+    def _purge_expired(self):
+        cutoff = time.time() - self.retention
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job.finished_at is not None and job.finished_at < cutoff
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    def shutdown(self):
+        """Stop accepting work and drop queued jobs"""
+        self.executor.shutdown(wait=False, cancel_futures=True)
@@ -1,9 +1,16 @@
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from dotenv import load_dotenv
+from contextlib import asynccontextmanager
 import os
 
-from api.routers import sentiment, fundamental, technical, risk
+from api.routers import sentiment, fundamental, technical, risk, jobs, screener, analyze
+from api.dependencies import create_agents, shutdown_agents
+from api.jobs import JobManager
+from utils.llm_cache import get_llm_cache
+from utils.charts import get_chart_renderer
+from utils.risk import shutdown_simulation_pool
+from utils.reference_data import get_reference_index
 
 # Load environment variables
 load_dotenv()
@@ -15,12 +22,25 @@ if not os.getenv("ANTHROPIC_API_KEY"):
 if not os.getenv("NEWSAPI_KEY"):
     print("Warning: NEWSAPI_KEY is missing. Sentiment analysis functionality will be limited.")
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Create the agents and job queue once at startup and share them across requests"""
+    create_agents(app)
+    app.state.jobs = JobManager()
+    yield
+    app.state.jobs.shutdown()
+    shutdown_agents(app)
+    get_chart_renderer().shutdown()
+    shutdown_simulation_pool()
+    get_reference_index().shutdown()
+
 # Create FastAPI app
 app = FastAPI(
     title="EquiFolio API",
     description="AI-powered financial analysis API for sentiment, fundamental, technical, and risk analysis",
     version="1.0.0",
-    debug=True  # Enable debug mode
+    debug=True,  # Enable debug mode
+    lifespan=lifespan
 )
 
 # Add CORS middleware for frontend integration
@@ -37,6 +57,9 @@ app.include_router(sentiment.router)
 app.include_router(fundamental.router)
 app.include_router(technical.router)
 app.include_router(risk.router)
+app.include_router(jobs.router)
+app.include_router(screener.router)
+app.include_router(analyze.router)
 
 @app.get("/")
 async def root():
@@ -50,5 +73,14 @@ async def root():
             {"path": "/fundamental", "description": "Fundamental analysis for stocks"},
             {"path": "/technical", "description": "Technical analysis for stocks"},
             {"path": "/risk", "description": "Portfolio risk analysis"},
+            {"path": "/jobs", "description": "Background analysis jobs"},
+            {"path": "/screener", "description": "Fundamental screener across a ticker universe"},
+            {"path": "/analyze", "description": "All four analyses for a ticker in one request"},
+            {"path": "/cache/stats", "description": "LLM response cache statistics"},
         ]
-    } 
\ No newline at end of file
+    } 
+
+@app.get("/cache/stats")
+async def cache_stats():
+    """LLM response cache hit/miss counters"""
+    return get_llm_cache().stats()
@@ -1,10 +1,12 @@
 from pydantic import BaseModel, Field
-from typing import List, Dict, Optional, Any, Union
+from typing import List, Dict, Optional, Any, Union, Literal
 
 # Request Models
 class SentimentRequest(BaseModel):
     ticker: str
     days_back: int = 7
+    max_articles: Optional[int] = Field(None, ge=1, le=100)
+    scoring_mode: Optional[Literal["single", "batch"]] = None
 
 class FundamentalRequest(BaseModel):
     ticker: str
@@ -12,10 +14,52 @@ class FundamentalRequest(BaseModel):
 class TechnicalRequest(BaseModel):
     ticker: str
     period: str = "1y"
+    chart_format: Literal["html", "data"] = "html"
+    max_points: Optional[int] = Field(None, ge=10, le=5000)
+
+class FundamentalBatchRequest(BaseModel):
+    tickers: List[str] = Field(..., min_length=1, max_length=100)
+    concurrency: Optional[int] = Field(None, ge=1, le=16)
+
+class TechnicalBatchRequest(BaseModel):
+    tickers: List[str] = Field(..., min_length=1, max_length=100)
+    period: str = "1y"
+    chart_format: Literal["html", "data"] = "html"
+    max_points: Optional[int] = Field(None, ge=10, le=5000)
+    concurrency: Optional[int] = Field(None, ge=1, le=16)
 
 class RiskRequest(BaseModel):
     tickers: List[str]
     period: str = "1y"
+    include_correlation_matrix: bool = False
+    weights: Optional[Dict[str, float]] = None
+    max_weight: Optional[float] = Field(None, gt=0, le=1)
+
+class AnalyzeRequest(BaseModel):
+    ticker: str
+    agents: List[Literal["sentiment", "fundamental", "technical", "risk"]] = ["sentiment", "fundamental", "technical", "risk"]
+    period: str = "1y"
+    risk_tickers: Optional[List[str]] = None
+    days_back: int = 7
+    max_articles: Optional[int] = Field(None, ge=1, le=100)
+    scoring_mode: Optional[Literal["single", "batch"]] = None
+    chart_format: Literal["html", "data"] = "html"
+    max_points: Optional[int] = Field(None, ge=10, le=5000)
+
+class ScreenerFilter(BaseModel):
+    field: str
+    op: Literal["gt", "gte", "lt", "lte", "eq", "ne", "between", "in", "not_in"] = "eq"
+    value: Union[float, str, List[Union[float, str]]]
+
+class ScreenerRequest(BaseModel):
+    filters: List[ScreenerFilter] = []
+    sort_by: Optional[str] = None
+    descending: bool = False
+    limit: int = Field(50, ge=1, le=5000)
+    fields: Optional[List[str]] = None
+
+class ScreenerUniverseRequest(BaseModel):
+    tickers: List[str] = Field(..., min_length=1)
 
 # Response Models
 class ErrorResponse(BaseModel):
@@ -56,13 +100,23 @@ class FundamentalResponse(BaseModel):
     company_name: str
     sector: str
     industry: str
+    fiscal_period: Optional[str] = None
+    as_of: Optional[str] = None
+    statements_as_of: Optional[str] = None
     key_metrics: Dict[str, Any]
     analysis: str
 
+class ChartSeries(BaseModel):
+    points: int
+    time: str
+    columns: Dict[str, str]
+
 class ChartData(BaseModel):
+    format: str = "html"
     price_chart: Optional[str] = None
     rsi_chart: Optional[str] = None
     macd_chart: Optional[str] = None
+    series: Optional[Dict[str, ChartSeries]] = None
 
 class TechnicalResponse(BaseModel):
     status: str = "success"
@@ -81,7 +135,7 @@ class RiskMetrics(BaseModel):
     average_correlation: str
 
 class RiskCharts(BaseModel):
-    correlation_heatmap: str
+    correlation_heatmap: Optional[str] = None
     sector_chart: str
 
 class RiskResponse(BaseModel):
@@ -89,5 +143,45 @@ class RiskResponse(BaseModel):
     tickers: List[str]
     period: str
     metrics: RiskMetrics
+    var_es: Optional[Dict[str, Any]] = None
+    correlation: Optional[Dict[str, Any]] = None
+    correlation_matrix: Optional[Dict[str, Any]] = None
+    optimization: Optional[Dict[str, Any]] = None
+    rolling: Optional[Dict[str, Any]] = None
     analysis: str
-    charts: RiskCharts 
\ No newline at end of file
+    charts: RiskCharts 
+
+class ScreenerResponse(BaseModel):
+    status: str = "success"
+    universe: int
+    matches: int
+    sort_by: Optional[str] = None
+    descending: bool = False
+    results: List[Dict[str, Any]]
+
+class BatchResponse(BaseModel):
+    status: str = "success"
+    succeeded: int
+    failed: int
+    results: Dict[str, Dict[str, Any]]
+    errors: Dict[str, str]
+
+class AnalyzeResponse(BaseModel):
+    status: str = "success"
+    ticker: str
+    results: Dict[str, Dict[str, Any]]
+    errors: Dict[str, str]
+    timings: Dict[str, float]
+
+class JobStatusResponse(BaseModel):
+    job_id: str
+    kind: str
+    status: str  # queued, running, succeeded, failed
+    progress: float = 0.0
+    message: Optional[str] = None
+    params: Dict[str, Any] = {}
+    created_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
@@ -0,0 +1,68 @@
+import time
+import asyncio
+import inspect
+
+
+class TaskGraph:
+    """
+    Small dependency graph of named tasks run concurrently on the event loop.
+
+    Every task starts as soon as the tasks it depends on have finished, so
+    independent branches overlap and the total latency approaches the
+    slowest path through the graph. Coroutine functions are awaited; plain
+    functions run in a worker thread. A task whose dependency failed is
+    skipped and reported as failed too.
+    """
+
+    def __init__(self):
+        self.tasks = {}
+
+    def add(self, name, func, deps=()):
+        """
+        Register a task
+
+        Args:
+            name (str): Unique task name
+            func (callable): ``func(**results_of_deps)``, sync or async
+            deps (tuple): Names of tasks whose results ``func`` receives as keyword arguments
+        """
+        missing = [dep for dep in deps if dep not in self.tasks]
+        if missing:
+            raise ValueError(f"Task {name} depends on unknown tasks: {', '.join(missing)}")
+        self.tasks[name] = (func, tuple(deps))
+
+    async def run(self):
+        """
+        Run every task
+
+        Returns:
+            tuple: (results, errors, timings) keyed by task name; timings are seconds
+        """
+        results, errors, timings = {}, {}, {}
+        futures = {}
+
+        async def run_task(name):
+            func, deps = self.tasks[name]
+            await asyncio.gather(*(futures[dep] for dep in deps))
+            failed = [dep for dep in deps if dep in errors]
+            if failed:
+                errors[name] = f"Skipped because {', '.join(failed)} failed"
+                return
+            inputs = {dep: results[dep] for dep in deps}
+            start = time.perf_counter()
+            try:
+                if inspect.iscoroutinefunction(func):
+                    results[name] = await func(**inputs)
+                else:
+                    results[name] = await asyncio.to_thread(func, **inputs)
+            except Exception as e:
+                print(f"Error in task {name}: {e}")
+                errors[name] = str(e)
+            finally:
+                timings[name] = round(time.perf_counter() - start, 3)
+
+        # Tasks are registered after their dependencies, so every future exists before it is awaited
+        for name in self.tasks:
+            futures[name] = asyncio.ensure_future(run_task(name))
+        await asyncio.gather(*futures.values())
+        return results, errors, timings
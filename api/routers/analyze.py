@@ -0,0 +1,107 @@
+from fastapi import APIRouter, HTTPException, Request
+from typing import Dict, Any
+
+from api.models import AnalyzeRequest, AnalyzeResponse, ErrorResponse
+from api.dependencies import get_agent
+from api.orchestrator import TaskGraph
+from utils.common import fetch_reference_data, fetch_stock_data_bulk, fetch_fundamental_snapshot, fetch_news_articles
+
+router = APIRouter(
+    prefix="/analyze",
+    tags=["analyze"],
+    responses={404: {"model": ErrorResponse}},
+)
+
+def build_analysis_graph(app, request: AnalyzeRequest) -> TaskGraph:
+    """
+    Plan the shared fetches and per-agent analyses for one composite request
+    
+    Each input is fetched once and handed to every task that needs it:
+    reference data (company name for the news query, risk sectors), price
+    history (technical and risk), the fundamentals snapshot and the news
+    articles. Agents start as soon as their own inputs are ready.
+    """
+    ticker = request.ticker
+    wanted = set(request.agents)
+    risk_tickers = list(dict.fromkeys(request.risk_tickers or [ticker]))
+    price_tickers = list(dict.fromkeys([ticker] + (risk_tickers if "risk" in wanted else [])))
+    
+    graph = TaskGraph()
+    
+    # Fetch stage
+    if wanted & {"sentiment", "risk"}:
+        graph.add("reference", lambda: fetch_reference_data(price_tickers))
+    if wanted & {"technical", "risk"}:
+        graph.add("prices", lambda: fetch_stock_data_bulk(price_tickers, period=request.period))
+    if "fundamental" in wanted:
+        graph.add("snapshot", lambda: fetch_fundamental_snapshot(ticker))
+    if "sentiment" in wanted:
+        def fetch_news(reference):
+            max_articles = request.max_articles or get_agent(app, "sentiment").max_articles
+            return fetch_news_articles(
+                ticker, request.days_back, page_size=max(max_articles * 5, 50),
+                company_name=(reference.get(ticker) or {}).get("name")
+            )
+        graph.add("news", fetch_news, deps=("reference",))
+    
+    # Compute and LLM stage, one task per agent
+    if "technical" in wanted:
+        async def technical(prices):
+            return await get_agent(app, "technical").aanalyze(
+                ticker, request.period, request.chart_format, request.max_points, data=prices.get(ticker)
+            )
+        graph.add("technical", technical, deps=("prices",))
+    if "fundamental" in wanted:
+        async def fundamental(snapshot):
+            return await get_agent(app, "fundamental").aanalyze(ticker, snapshot=snapshot)
+        graph.add("fundamental", fundamental, deps=("snapshot",))
+    if "sentiment" in wanted:
+        async def sentiment(news):
+            return await get_agent(app, "sentiment").aanalyze(
+                ticker, request.days_back, request.max_articles, request.scoring_mode, articles=news
+            )
+        graph.add("sentiment", sentiment, deps=("news",))
+    if "risk" in wanted:
+        async def risk(prices, reference):
+            return await get_agent(app, "risk").aanalyze(
+                risk_tickers, request.period, stock_data={t: prices.get(t) for t in risk_tickers},
+                reference={t: reference.get(t) for t in risk_tickers}
+            )
+        graph.add("risk", risk, deps=("prices", "reference"))
+    
+    return graph
+
+@router.post("/", response_model=AnalyzeResponse)
+async def analyze_ticker(request: AnalyzeRequest, http_request: Request) -> Dict[str, Any]:
+    """
+    Run sentiment, fundamental, technical and risk analysis for a ticker in one request
+    
+    Shared data is fetched once and the agents run concurrently, so the
+    latency approaches that of the slowest agent rather than the sum.
+    Sections that fail are reported in ``errors`` without failing the rest.
+    """
+    try:
+        results, errors, timings = await build_analysis_graph(http_request.app, request).run()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Composite analysis failed: {str(e)}")
+    
+    sections = {}
+    for name in request.agents:
+        result = results.get(name)
+        if result is None:
+            continue
+        if result.get("status") == "error":
+            errors[name] = result.get("message", f"{name.capitalize()} analysis failed")
+        else:
+            sections[name] = result
+    
+    if not sections:
+        raise HTTPException(status_code=404, detail="; ".join(f"{name}: {message}" for name, message in errors.items()))
+    
+    return {
+        "status": "success",
+        "ticker": request.ticker,
+        "results": sections,
+        "errors": errors,
+        "timings": timings
+    }
@@ -1,8 +1,13 @@
-from fastapi import APIRouter, HTTPException, Depends
+import asyncio
+from fastapi import APIRouter, HTTPException, Depends, Request
 from typing import Dict, Any
 
-from api.models import FundamentalRequest, FundamentalResponse, ErrorResponse
+from api.models import FundamentalRequest, FundamentalBatchRequest, FundamentalResponse, BatchResponse, ErrorResponse
 from agents.fundamental_agent import FundamentalAnalysisAgent
+from api.dependencies import get_agent
+from api.streaming import stream_agent_analysis, sse_response
+from api.batch import run_batch
+from utils.common import fetch_fundamental_snapshots
 
 router = APIRouter(
     prefix="/fundamental",
@@ -10,10 +15,10 @@ router = APIRouter(
     responses={404: {"model": ErrorResponse}},
 )
 
-def get_fundamental_agent():
-    """Dependency to get fundamental analysis agent instance"""
+def get_fundamental_agent(request: Request):
+    """Dependency to get the shared fundamental analysis agent instance"""
     try:
-        return FundamentalAnalysisAgent()
+        return get_agent(request.app, "fundamental")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to initialize fundamental agent: {str(e)}")
 
@@ -26,11 +31,43 @@ async def analyze_fundamentals(
     Analyze fundamental financial data for a stock ticker
     """
     try:
-        result = agent.analyze(request.ticker)
+        result = await agent.aanalyze(request.ticker)
         
         if result.get("status") == "error":
             raise HTTPException(status_code=404, detail=result.get("message", "Fundamental analysis failed"))
         
         return result
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Fundamental analysis failed: {str(e)}") 
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Fundamental analysis failed: {str(e)}") 
+
+@router.post("/batch", response_model=BatchResponse)
+async def analyze_fundamentals_batch(
+    request: FundamentalBatchRequest,
+    agent: FundamentalAnalysisAgent = Depends(get_fundamental_agent)
+) -> Dict[str, Any]:
+    """
+    Analyze fundamentals for many tickers in one request
+    
+    Snapshots for the whole batch are fetched up front with bounded
+    concurrency (which also keeps the reference index current); per-ticker analyses then run in parallel up to
+    the concurrency cap.
+    """
+    try:
+        snapshots = await asyncio.to_thread(fetch_fundamental_snapshots, request.tickers)
+        return await run_batch(
+            request.tickers,
+            lambda ticker: agent.aanalyze(ticker, snapshot=snapshots.get(ticker)),
+            request.concurrency
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Fundamental batch analysis failed: {str(e)}")
+
+@router.post("/stream")
+async def stream_fundamentals(
+    request: FundamentalRequest,
+    agent: FundamentalAnalysisAgent = Depends(get_fundamental_agent)
+):
+    """
+    Stream fundamental analysis: key metrics first, then the narrative token by token (SSE)
+    """
+    return sse_response(stream_agent_analysis(agent, "fundamental", request.ticker))
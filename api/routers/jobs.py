@@ -0,0 +1,99 @@
+from fastapi import APIRouter, HTTPException, Depends, Request
+from typing import Dict, Any, List
+
+from api.models import (
+    SentimentRequest, FundamentalRequest, TechnicalRequest, RiskRequest,
+    JobStatusResponse, ErrorResponse
+)
+from api.dependencies import get_agent
+
+router = APIRouter(
+    prefix="/jobs",
+    tags=["jobs"],
+    responses={404: {"model": ErrorResponse}},
+)
+
+def get_job_manager(request: Request):
+    """Dependency to get the application's background job manager"""
+    jobs = getattr(request.app.state, "jobs", None)
+    if jobs is None:
+        raise HTTPException(status_code=503, detail="Job queue is not running")
+    return jobs
+
+def get_job_agent(request: Request, name: str):
+    """Resolve a shared agent for a job body, surfacing init failures as HTTP errors"""
+    try:
+        return get_agent(request.app, name)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to initialize {name} agent: {str(e)}")
+
+@router.post("/risk", response_model=JobStatusResponse, status_code=202)
+async def submit_risk_job(request: RiskRequest, http_request: Request, jobs=Depends(get_job_manager)) -> Dict[str, Any]:
+    """
+    Queue a portfolio risk analysis and return its job ID
+    """
+    agent = get_job_agent(http_request, "risk")
+    job = jobs.submit(
+        "risk",
+        request.model_dump(),
+        lambda job: agent.analyze(
+            request.tickers, request.period, progress_callback=job.report,
+            include_correlation_matrix=request.include_correlation_matrix,
+            weights=request.weights, max_weight=request.max_weight
+        )
+    )
+    return job.to_dict()
+
+@router.post("/sentiment", response_model=JobStatusResponse, status_code=202)
+async def submit_sentiment_job(request: SentimentRequest, http_request: Request, jobs=Depends(get_job_manager)) -> Dict[str, Any]:
+    """
+    Queue a news sentiment analysis and return its job ID
+    """
+    agent = get_job_agent(http_request, "sentiment")
+    job = jobs.submit(
+        "sentiment",
+        request.model_dump(),
+        lambda job: agent.analyze(
+            request.ticker,
+            request.days_back,
+            request.max_articles,
+            request.scoring_mode,
+            progress_callback=job.report
+        )
+    )
+    return job.to_dict()
+
+@router.post("/technical", response_model=JobStatusResponse, status_code=202)
+async def submit_technical_job(request: TechnicalRequest, http_request: Request, jobs=Depends(get_job_manager)) -> Dict[str, Any]:
+    """
+    Queue a technical analysis and return its job ID
+    """
+    agent = get_job_agent(http_request, "technical")
+    job = jobs.submit("technical", request.model_dump(), lambda job: agent.analyze(request.ticker, request.period, request.chart_format, request.max_points))
+    return job.to_dict()
+
+@router.post("/fundamental", response_model=JobStatusResponse, status_code=202)
+async def submit_fundamental_job(request: FundamentalRequest, http_request: Request, jobs=Depends(get_job_manager)) -> Dict[str, Any]:
+    """
+    Queue a fundamental analysis and return its job ID
+    """
+    agent = get_job_agent(http_request, "fundamental")
+    job = jobs.submit("fundamental", request.model_dump(), lambda job: agent.analyze(request.ticker))
+    return job.to_dict()
+
+@router.get("/", response_model=List[JobStatusResponse])
+async def list_jobs(jobs=Depends(get_job_manager)) -> List[Dict[str, Any]]:
+    """
+    List retained jobs (newest first) without their results
+    """
+    return [job.to_dict(include_result=False) for job in jobs.list()]
+
+@router.get("/{job_id}", response_model=JobStatusResponse)
+async def get_job(job_id: str, jobs=Depends(get_job_manager)) -> Dict[str, Any]:
+    """
+    Report a job's status and progress, including its result once finished
+    """
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found or expired")
+    return job.to_dict()
@@ -1,8 +1,10 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Request
 from typing import Dict, Any
 
 from api.models import RiskRequest, RiskResponse, ErrorResponse
 from agents.risk_agent import RiskAnalysisAgent
+from api.dependencies import get_agent
+from api.streaming import stream_agent_analysis, sse_response
 
 router = APIRouter(
     prefix="/risk",
@@ -10,10 +12,10 @@ router = APIRouter(
     responses={404: {"model": ErrorResponse}},
 )
 
-def get_risk_agent():
-    """Dependency to get risk analysis agent instance"""
+def get_risk_agent(request: Request):
+    """Dependency to get the shared risk analysis agent instance"""
     try:
-        return RiskAnalysisAgent()
+        return get_agent(request.app, "risk")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to initialize risk agent: {str(e)}")
 
@@ -26,11 +28,28 @@ async def analyze_portfolio_risk(
     Analyze portfolio risk including correlations, volatility, and sector exposure
     """
     try:
-        result = agent.analyze(request.tickers, request.period)
+        result = await agent.aanalyze(
+            request.tickers, request.period, request.include_correlation_matrix,
+            request.weights, request.max_weight
+        )
         
         if result.get("status") == "error":
             raise HTTPException(status_code=404, detail=result.get("message", "Risk analysis failed"))
         
         return result
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Risk analysis failed: {str(e)}") 
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Risk analysis failed: {str(e)}") 
+
+@router.post("/stream")
+async def stream_portfolio_risk(
+    request: RiskRequest,
+    agent: RiskAnalysisAgent = Depends(get_risk_agent)
+):
+    """
+    Stream portfolio risk analysis: metrics and charts first, then the narrative token by token (SSE)
+    """
+    return sse_response(stream_agent_analysis(
+        agent, "risk", request.tickers, request.period,
+        include_correlation_matrix=request.include_correlation_matrix,
+        weights=request.weights, max_weight=request.max_weight
+    ))
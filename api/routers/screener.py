@@ -0,0 +1,59 @@
+from fastapi import APIRouter, HTTPException, Depends
+from typing import Dict, Any
+
+from api.models import ScreenerRequest, ScreenerResponse, ScreenerUniverseRequest, JobStatusResponse, ErrorResponse
+from api.routers.jobs import get_job_manager
+from utils.common import get_ticker_info
+from utils.screener import get_screener_table, NUMERIC_FIELDS, TEXT_FIELDS, OPERATORS
+
+router = APIRouter(
+    prefix="/screener",
+    tags=["screener"],
+    responses={404: {"model": ErrorResponse}},
+)
+
+@router.post("/", response_model=ScreenerResponse)
+async def screen_universe(request: ScreenerRequest) -> Dict[str, Any]:
+    """
+    Filter, sort and rank the stored ticker universe by fundamental ratios
+    
+    Fractions stay fractions (ROE above 15% is {"field": "roe", "op": "gt", "value": 0.15});
+    debt_to_equity is in percent as reported by Yahoo Finance.
+    """
+    try:
+        result = get_screener_table().screen(
+            filters=[condition.model_dump() for condition in request.filters],
+            sort_by=request.sort_by,
+            descending=request.descending,
+            limit=request.limit,
+            fields=request.fields
+        )
+    except (ValueError, TypeError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Screener query failed: {str(e)}")
+    return {"status": "success", **result}
+
+@router.get("/fields")
+async def screener_fields() -> Dict[str, Any]:
+    """
+    List the fields and operators the screener understands
+    """
+    return {
+        "numeric": list(NUMERIC_FIELDS),
+        "text": ["ticker", *TEXT_FIELDS],
+        "operators": list(OPERATORS),
+        "universe": len(get_screener_table())
+    }
+
+@router.post("/universe", response_model=JobStatusResponse, status_code=202)
+async def refresh_universe(request: ScreenerUniverseRequest, jobs=Depends(get_job_manager)) -> Dict[str, Any]:
+    """
+    Queue a job that fetches ratios for the given tickers into the screener table
+    """
+    def body(job):
+        counts = get_screener_table().refresh(request.tickers, get_ticker_info, progress_callback=job.report)
+        return {"status": "success", **counts}
+    
+    job = jobs.submit("screener", request.model_dump(), body)
+    return job.to_dict()
@@ -5,6 +5,7 @@ import sys
 
 from api.models import SentimentRequest, SentimentResponse, ErrorResponse
 from agents.sentiment_agent import SentimentAnalysisAgent
+from api.dependencies import get_agent
 
 router = APIRouter(
     prefix="/sentiment",
@@ -12,10 +13,10 @@ router = APIRouter(
     responses={404: {"model": ErrorResponse}},
 )
 
-def get_sentiment_agent():
-    """Dependency to get sentiment analysis agent instance"""
+def get_sentiment_agent(request: Request):
+    """Dependency to get the shared sentiment analysis agent instance"""
     try:
-        return SentimentAnalysisAgent()
+        return get_agent(request.app, "sentiment")
     except Exception as e:
         print(f"Error initializing sentiment agent: {str(e)}")
         print(traceback.format_exc())
@@ -31,7 +32,7 @@ async def analyze_sentiment(
     """
     try:
         print(f"Analyzing sentiment for {request.ticker} with days_back={request.days_back}")
-        result = agent.analyze(request.ticker, request.days_back)
+        result = await agent.aanalyze(request.ticker, request.days_back, request.max_articles, request.scoring_mode)
         
         if result.get("status") == "error":
             print(f"Error in sentiment analysis: {result.get('message')}")
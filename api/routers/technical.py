@@ -1,8 +1,13 @@
-from fastapi import APIRouter, HTTPException, Depends
+import asyncio
+from fastapi import APIRouter, HTTPException, Depends, Request
 from typing import Dict, Any
 
-from api.models import TechnicalRequest, TechnicalResponse, ErrorResponse
+from api.models import TechnicalRequest, TechnicalBatchRequest, TechnicalResponse, BatchResponse, ErrorResponse
 from agents.technical_agent import TechnicalAnalysisAgent
+from api.dependencies import get_agent
+from api.streaming import stream_agent_analysis, sse_response
+from api.batch import run_batch
+from utils.common import fetch_stock_data_bulk
 
 router = APIRouter(
     prefix="/technical",
@@ -10,10 +15,10 @@ router = APIRouter(
     responses={404: {"model": ErrorResponse}},
 )
 
-def get_technical_agent():
-    """Dependency to get technical analysis agent instance"""
+def get_technical_agent(request: Request):
+    """Dependency to get the shared technical analysis agent instance"""
     try:
-        return TechnicalAnalysisAgent()
+        return get_agent(request.app, "technical")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to initialize technical agent: {str(e)}")
 
@@ -26,11 +31,44 @@ async def analyze_technicals(
     Analyze technical indicators and chart patterns for a stock ticker
     """
     try:
-        result = agent.analyze(request.ticker, request.period)
+        result = await agent.aanalyze(request.ticker, request.period, request.chart_format, request.max_points)
         
         if result.get("status") == "error":
             raise HTTPException(status_code=404, detail=result.get("message", "Technical analysis failed"))
         
         return result
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Technical analysis failed: {str(e)}") 
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Technical analysis failed: {str(e)}") 
+
+@router.post("/batch", response_model=BatchResponse)
+async def analyze_technicals_batch(
+    request: TechnicalBatchRequest,
+    agent: TechnicalAnalysisAgent = Depends(get_technical_agent)
+) -> Dict[str, Any]:
+    """
+    Analyze technical indicators for many tickers in one request
+    
+    Prices for the whole batch are fetched up front with bounded concurrency;
+    per-ticker analyses then run in parallel up to the concurrency cap.
+    """
+    try:
+        stock_data = await asyncio.to_thread(fetch_stock_data_bulk, request.tickers, request.period)
+        return await run_batch(
+            request.tickers,
+            lambda ticker: agent.aanalyze(
+                ticker, request.period, request.chart_format, request.max_points, data=stock_data.get(ticker)
+            ),
+            request.concurrency
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Technical batch analysis failed: {str(e)}")
+
+@router.post("/stream")
+async def stream_technicals(
+    request: TechnicalRequest,
+    agent: TechnicalAnalysisAgent = Depends(get_technical_agent)
+):
+    """
+    Stream technical analysis: key metrics and charts first, then the narrative token by token (SSE)
+    """
+    return sse_response(stream_agent_analysis(agent, "technical", request.ticker, request.period, request.chart_format, request.max_points))
@@ -0,0 +1,69 @@
+import json
+import asyncio
+
+from fastapi.responses import StreamingResponse
+
+from utils.llm_cache import astream_chain_cached
+
+
+def sse_event(event, data):
+    """
+    Format one server-sent event
+
+    Args:
+        event (str): Event name
+        data: JSON-serializable payload
+
+    Returns:
+        str: SSE frame
+    """
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+async def stream_agent_analysis(agent, namespace, *args, **kwargs):
+    """
+    Stream an agent's analysis as server-sent events
+
+    Emits a ``metrics`` event with everything computed before the LLM call
+    (key metrics, charts, ...), then one ``token`` event per narrative chunk,
+    and finally ``done``. Failures are reported as an ``error`` event.
+
+    Args:
+        agent: Agent exposing prepare_analysis, analysis_chain and cache_ttl
+        namespace (str): LLM cache namespace for the agent
+        *args, **kwargs: Arguments for agent.prepare_analysis
+
+    Yields:
+        str: SSE frames
+    """
+    try:
+        prepared = await asyncio.to_thread(agent.prepare_analysis, *args, **kwargs)
+    except Exception as e:
+        print(f"Error preparing {namespace} analysis: {e}")
+        yield sse_event("error", {"message": f"{namespace.capitalize()} analysis failed: {str(e)}"})
+        return
+
+    if prepared.get("status") == "error":
+        yield sse_event("error", {"message": prepared.get("message", f"{namespace.capitalize()} analysis failed")})
+        return
+
+    yield sse_event("metrics", {key: value for key, value in prepared.items() if key != "prompt_inputs"})
+
+    try:
+        async for text in astream_chain_cached(agent.analysis_chain, namespace, agent.cache_ttl, **prepared["prompt_inputs"]):
+            yield sse_event("token", {"text": text})
+    except Exception as e:
+        print(f"Error streaming {namespace} analysis: {e}")
+        yield sse_event("error", {"message": f"{namespace.capitalize()} analysis failed: {str(e)}"})
+        return
+
+    yield sse_event("done", {"status": "success"})
+
+
+def sse_response(events):
+    """Wrap an async generator of SSE frames in a streaming response"""
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -11,6 +11,11 @@ from agents.risk_agent import RiskAnalysisAgent
 # Load environment variables
 load_dotenv()
 
+@st.cache_resource
+def get_agent(agent_class):
+    """Create each agent once per server process and reuse it across reruns"""
+    return agent_class()
+
 # App title and description
 st.set_page_config(page_title="EquiFolio", page_icon="📈", layout="wide")
 st.title("EquiFolio - Your Personal AI Quant")
@@ -38,7 +43,7 @@ if page == "Sentiment Analysis":
     
     # Initialize sentiment agent
     if os.getenv("ANTHROPIC_API_KEY") and os.getenv("NEWSAPI_KEY"):
-        agent = SentimentAnalysisAgent()
+        agent = get_agent(SentimentAnalysisAgent)
         
         if st.button("Analyze Sentiment"):
             with st.spinner(f"Analyzing sentiment for {ticker}..."):
@@ -52,7 +57,7 @@ elif page == "Fundamental Analysis":
     st.header("Fundamental Analysis")
     
     # Initialize fundamental agent
-    agent = FundamentalAnalysisAgent()
+    agent = get_agent(FundamentalAnalysisAgent)
     
     if st.button("Analyze Fundamentals"):
         with st.spinner(f"Analyzing fundamentals for {ticker}..."):
@@ -64,7 +69,7 @@ elif page == "Technical Analysis":
     st.header("Technical Analysis")
     
     # Initialize technical agent
-    agent = TechnicalAnalysisAgent()
+    agent = get_agent(TechnicalAnalysisAgent)
     
     period = st.sidebar.selectbox("Time Period", ["1mo", "3mo", "6mo", "1y", "2y", "5y"], index=3)
     
@@ -78,7 +83,7 @@ elif page == "Risk Analysis":
     st.header("Risk Analysis")
     
     # Initialize risk agent
-    agent = RiskAnalysisAgent()
+    agent = get_agent(RiskAnalysisAgent)
     
     # Allow multi-stock input for portfolio
     portfolio_tickers = st.sidebar.text_input("Enter Portfolio Tickers (comma-separated)", "AAPL, MSFT, GOOGL")
@@ -0,0 +1,82 @@
+"""
+Benchmark calculate_technical_indicators_panel against looping
+calculate_technical_indicators over every ticker.
+
+Usage:
+    python benchmarks/bench_indicator_panel.py --tickers 3000 --bars 756
+"""
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.common import calculate_technical_indicators
+from utils.indicators import INDICATOR_COLUMNS, calculate_technical_indicators_panel
+
+
+def make_panel(bars, tickers, seed=0):
+    """Random-walk closes with ragged (late-listed / delisted) histories"""
+    rng = np.random.default_rng(seed)
+    closes = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, (bars, tickers)), axis=0))
+    starts = rng.integers(0, bars // 4, tickers)
+    ends = bars - rng.integers(0, bars // 20 + 1, tickers)
+    for column, (start, end) in enumerate(zip(starts, ends)):
+        closes[:start, column] = np.nan
+        closes[end:, column] = np.nan
+    return closes
+
+
+def run_loop(closes):
+    results = []
+    for column in range(closes.shape[1]):
+        series = closes[:, column]
+        results.append(calculate_technical_indicators(pd.DataFrame({'Close': series[~np.isnan(series)]})))
+    return results
+
+
+def max_abs_error(closes, panel, looped):
+    worst = 0.0
+    for column, frame in enumerate(looped):
+        rows = ~np.isnan(closes[:, column])
+        for name in INDICATOR_COLUMNS:
+            expected = frame[name].to_numpy()
+            actual = panel[name][rows, column]
+            both = ~np.isnan(expected) & ~np.isnan(actual)
+            if (np.isnan(expected) != np.isnan(actual)).any():
+                raise AssertionError(f"NaN mismatch in {name} for column {column}")
+            if both.any():
+                worst = max(worst, float(np.max(np.abs(expected[both] - actual[both]))))
+    return worst
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tickers", type=int, default=3000)
+    parser.add_argument("--bars", type=int, default=756)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    closes = make_panel(args.bars, args.tickers, args.seed)
+
+    start = time.perf_counter()
+    looped = run_loop(closes)
+    loop_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    panel = calculate_technical_indicators_panel(closes)
+    panel_seconds = time.perf_counter() - start
+
+    print(f"{args.tickers} tickers x {args.bars} bars")
+    print(f"  loop over calculate_technical_indicators: {loop_seconds:8.3f}s")
+    print(f"  calculate_technical_indicators_panel:     {panel_seconds:8.3f}s")
+    print(f"  speedup: {loop_seconds / panel_seconds:.1f}x")
+    print(f"  max abs difference: {max_abs_error(closes, panel, looped):.2e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+import os
+import base64
+import multiprocessing
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.charts import ChartRenderer, build_chart_series, lttb_indices
+
+
+def render_pid(label):
+    """Chart stand-in reporting which process rendered it"""
+    return {"label": label, "pid": os.getpid()}
+
+
+def render_or_die(label):
+    """Kills the worker process it runs in; renders normally inline"""
+    if multiprocessing.parent_process() is not None:
+        os._exit(1)
+    return render_pid(label)
+
+
+@pytest.fixture
+def renderer():
+    renderer = ChartRenderer(max_workers=1)
+    yield renderer
+    renderer.shutdown()
+
+
+def test_renders_in_worker_and_caches(renderer):
+    first = renderer.render(render_pid, "a")
+    assert first["pid"] != os.getpid()
+    assert renderer.render(render_pid, "a") is first
+
+
+def test_dead_worker_pool_is_replaced(renderer):
+    renderer.render(render_pid, "warm up")
+    broken = renderer._executor
+
+    # The worker dies mid-render: the chart is rendered inline and the broken pool dropped
+    result = renderer.render(render_or_die, "crash")
+    assert result["pid"] == os.getpid()
+    assert renderer._executor is None
+
+    # The next render starts a fresh pool instead of reusing the dead one
+    result = renderer.render(render_pid, "after crash")
+    assert result["pid"] != os.getpid()
+    assert renderer._executor is not None and renderer._executor is not broken
+    assert renderer.max_workers == 1
+
+
+def test_inline_when_workers_disabled():
+    renderer = ChartRenderer(max_workers=0)
+    assert renderer.render(render_pid, "inline")["pid"] == os.getpid()
+    assert renderer._executor is None
+
+
+def decode(payload, dtype):
+    return np.frombuffer(base64.b64decode(payload), dtype=dtype)
+
+
+def test_lttb_keeps_endpoints_and_extremes():
+    x = np.arange(10_000, dtype=float)
+    y = np.sin(x / 500)
+    y[4321] = 25.0
+    y[7777] = -25.0
+    kept = lttb_indices(x, y, 200)
+    assert len(kept) == 200
+    assert kept[0] == 0 and kept[-1] == len(x) - 1
+    assert np.all(np.diff(kept) > 0)
+    assert {4321, 7777} <= set(kept.tolist())
+
+
+def test_lttb_returns_everything_below_threshold():
+    np.testing.assert_array_equal(lttb_indices(np.arange(50.0), np.ones(50), 100), np.arange(50))
+    np.testing.assert_array_equal(lttb_indices(np.arange(50.0), np.ones(50), 2), np.arange(50))
+
+
+def test_chart_series_round_trip():
+    index = pd.date_range("2024-01-01 09:30", periods=2_000, freq="min", tz="UTC")
+    frame = pd.DataFrame({"Close": np.linspace(100, 120, 2_000), "RSI": np.full(2_000, np.nan)}, index=index)
+    frame.loc[frame.index[1000:], "RSI"] = 55.0
+    series = build_chart_series(frame, max_points=100)
+
+    price = series["price"]
+    assert price["points"] == 100
+    times = decode(price["time"], "<f8")
+    # Millisecond timestamps survive intraday without rounding
+    assert times[0] == index[0].value // 10**6 and times[-1] == index[-1].value // 10**6
+    closes = decode(price["columns"]["Close"], "<f4")
+    assert closes[0] == pytest.approx(100) and closes[-1] == pytest.approx(120)
+    # Panels only sample bars where their primary series is defined
+    assert series["rsi"]["points"] == 100
+    assert np.all(decode(series["rsi"]["columns"]["RSI"], "<f4") == 55.0)
@@ -0,0 +1,65 @@
+import itertools
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.correlation import correlation_summary
+
+
+@pytest.fixture
+def returns_df():
+    rng = np.random.default_rng(3)
+    factor = rng.normal(0, 0.01, (400, 1))
+    values = factor * rng.uniform(0, 2, 30) + rng.normal(0, 0.01, (400, 30))
+    return pd.DataFrame(values, columns=[f"T{i:02d}" for i in range(30)])
+
+
+@pytest.mark.parametrize("block_size", [1, 7, 30, 512])
+def test_blocked_matrix_equals_pandas(returns_df, block_size):
+    summary = correlation_summary(returns_df, include_matrix=True, block_size=block_size, dtype=np.float64)
+    np.testing.assert_allclose(summary["matrix"].to_numpy(), returns_df.corr().to_numpy(), atol=1e-12)
+
+
+def test_blocked_matrix_with_missing_values_equals_pandas(returns_df):
+    ragged = returns_df.copy()
+    ragged.iloc[:120, 4] = np.nan
+    ragged.iloc[300:, 9] = np.nan
+    ragged.iloc[::17, 21] = np.nan
+    summary = correlation_summary(ragged, include_matrix=True, block_size=8, dtype=np.float64)
+    np.testing.assert_allclose(summary["matrix"].to_numpy(), ragged.corr().to_numpy(), atol=1e-12)
+
+
+def test_float32_stays_close_to_pandas(returns_df):
+    summary = correlation_summary(returns_df, include_matrix=True, block_size=8, dtype=np.float32)
+    np.testing.assert_allclose(summary["matrix"].to_numpy(), returns_df.corr().to_numpy(), atol=1e-5)
+
+
+def test_summary_statistics_match_full_matrix(returns_df):
+    expected = returns_df.corr()
+    pairs = {
+        (a, b): expected.loc[a, b]
+        for a, b in itertools.combinations(returns_df.columns, 2)
+    }
+    summary = correlation_summary(returns_df, top_k=5, block_size=4, dtype=np.float64)
+
+    assert summary["pairs"] == len(pairs)
+    assert summary["average_correlation"] == pytest.approx(np.mean(list(pairs.values())))
+    ranked = sorted(pairs.items(), key=lambda item: item[1])
+    assert [tuple(p["pair"]) for p in summary["most_correlated"]] == [pair for pair, _ in ranked[::-1][:5]]
+    assert [tuple(p["pair"]) for p in summary["least_correlated"]] == [pair for pair, _ in ranked[:5]]
+
+    others = expected.where(~np.eye(len(expected), dtype=bool))
+    stats = summary["per_ticker"]["T00"]
+    assert stats["average"] == pytest.approx(others["T00"].mean())
+    assert stats["max_partner"] == others["T00"].idxmax()
+    assert stats["min_partner"] == others["T00"].idxmin()
+
+
+def test_constant_series_has_no_correlation(returns_df):
+    frame = returns_df.iloc[:, :3].copy()
+    frame["FLAT"] = 0.0
+    summary = correlation_summary(frame, include_matrix=True, dtype=np.float64)
+    assert summary["matrix"]["FLAT"].isna().all()
+    assert summary["pairs"] == 3
+    assert summary["per_ticker"]["FLAT"]["average"] is None
@@ -0,0 +1,81 @@
+import pandas as pd
+import pytest
+
+from utils.fundamentals import FundamentalSnapshot, FundamentalStore, ratios_from_info
+
+
+def statement(period_ends):
+    columns = pd.to_datetime(period_ends)
+    return pd.DataFrame({column: [100.0 + i, 10.0] for i, column in enumerate(columns)}, index=["Total Revenue", "Net Income"])
+
+
+def snapshot(period_end, price=50.0, **kwargs):
+    return FundamentalSnapshot(
+        "acme",
+        {"currentPrice": price, "trailingPE": 20.0, "longName": "Acme Corp"},
+        income_statement=statement([period_end, "2020-12-31"]),
+        balance_sheet=statement([period_end]),
+        cash_flow=None,
+        **kwargs
+    )
+
+
+class Upstream:
+    def __init__(self, result):
+        self.result = result
+        self.calls = 0
+
+    def __call__(self, ticker):
+        self.calls += 1
+        return self.result
+
+
+@pytest.fixture
+def store(tmp_path):
+    return FundamentalStore(root=str(tmp_path), recheck_interval=3600)
+
+
+def test_snapshot_round_trips_through_json():
+    original = snapshot("2023-12-31")
+    restored = FundamentalSnapshot.from_json(original.to_json())
+    assert restored.ticker == "ACME"
+    assert restored.fiscal_period == "2023-12-31"
+    assert restored.info == original.info
+    pd.testing.assert_frame_equal(restored.income_statement, original.income_statement, check_freq=False)
+    assert restored.cash_flow is None
+
+
+def test_current_period_is_served_without_upstream(store):
+    # A period that ended recently: the next one cannot be reported yet
+    recent = (pd.Timestamp.now() - pd.DateOffset(months=2)).strftime("%Y-%m-%d")
+    upstream = Upstream(snapshot(recent))
+    assert store.get("ACME", upstream).fiscal_period == recent
+    assert store.get("ACME", upstream).fiscal_period == recent
+    assert upstream.calls == 1
+
+
+def test_due_period_is_rechecked_at_most_once_per_interval(store):
+    store.save(snapshot("2022-12-31", checked_at=(pd.Timestamp.now(tz="UTC") - pd.Timedelta(hours=2)).isoformat()))
+    upstream = Upstream(snapshot("2023-12-31"))
+    assert store.get("ACME", upstream).fiscal_period == "2023-12-31"
+    assert store.periods("ACME") == ["2022-12-31", "2023-12-31"]
+    # Older periods stay on disk
+    assert store.load("ACME", "2022-12-31").fiscal_period == "2022-12-31"
+
+    # The new period is overdue for its successor too, but was just checked
+    store.get("ACME", upstream)
+    assert upstream.calls == 1
+
+
+def test_failed_fetch_serves_stored_snapshot(store):
+    store.save(snapshot("2022-12-31", checked_at="2023-01-01T00:00:00+00:00"))
+    assert store.get("ACME", Upstream(None)).fiscal_period == "2022-12-31"
+
+
+def test_refresh_info_replaces_price_fields_and_stamps_time():
+    stored = snapshot("2023-12-31", price=50.0, fetched_at="2024-01-05T00:00:00+00:00")
+    assert stored.info_as_of == "2024-01-05T00:00:00+00:00"
+    stored.refresh_info({"currentPrice": 75.0, "trailingPE": 30.0})
+    assert stored.ratios == ratios_from_info({"currentPrice": 75.0, "trailingPE": 30.0})
+    assert pd.Timestamp(stored.info_as_of) > pd.Timestamp("2024-01-05", tz="UTC")
+    assert stored.fiscal_period == "2023-12-31"
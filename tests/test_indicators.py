@@ -0,0 +1,116 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.indicators import (
+    INDICATOR_COLUMNS,
+    IndicatorContext,
+    IndicatorEngine,
+    calculate_technical_indicators_panel,
+    compute_indicators,
+)
+
+
+def baseline_indicators(data):
+    """The original calculate_technical_indicators, kept as the reference implementation"""
+    df = data.copy()
+    df['SMA_20'] = df['Close'].rolling(window=20).mean()
+    df['SMA_50'] = df['Close'].rolling(window=50).mean()
+    df['SMA_200'] = df['Close'].rolling(window=200).mean()
+    df['EMA_12'] = df['Close'].ewm(span=12, adjust=False).mean()
+    df['EMA_26'] = df['Close'].ewm(span=26, adjust=False).mean()
+    df['MACD'] = df['EMA_12'] - df['EMA_26']
+    df['MACD_Signal'] = df['MACD'].ewm(span=9, adjust=False).mean()
+    delta = df['Close'].diff()
+    gain = delta.where(delta > 0, 0).rolling(window=14).mean()
+    loss = -delta.where(delta < 0, 0).rolling(window=14).mean()
+    df['RSI'] = 100 - (100 / (1 + gain / loss))
+    df['BB_Middle'] = df['Close'].rolling(window=20).mean()
+    std_dev = df['Close'].rolling(window=20).std()
+    df['BB_Upper'] = df['BB_Middle'] + (std_dev * 2)
+    df['BB_Lower'] = df['BB_Middle'] - (std_dev * 2)
+    return df
+
+
+@pytest.fixture
+def prices():
+    rng = np.random.default_rng(7)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, 300)))
+    index = pd.date_range("2024-01-01", periods=len(close), freq="B")
+    return pd.DataFrame({"Close": close, "Volume": rng.integers(1_000, 5_000, len(close))}, index=index)
+
+
+def test_engine_matches_batch(prices):
+    expected = baseline_indicators(prices)
+    engine = IndicatorEngine()
+    for position, close in enumerate(prices['Close']):
+        values = engine.update(close)
+        for column in INDICATOR_COLUMNS:
+            np.testing.assert_allclose(values[column], expected[column].iloc[position], rtol=1e-8, atol=1e-8, equal_nan=True)
+
+
+def test_engine_replace_last_revises_forming_bar(prices):
+    engine = IndicatorEngine.from_frame(prices['Close'].iloc[:-1])
+    engine.update(prices['Close'].iloc[-1] * 1.05)
+    values = engine.update(prices['Close'].iloc[-1], replace_last=True)
+    expected = baseline_indicators(prices).iloc[-1]
+    for column in INDICATOR_COLUMNS:
+        assert values[column] == pytest.approx(expected[column], rel=1e-8)
+
+
+def test_panel_matches_per_ticker_batch(prices):
+    closes = pd.DataFrame({
+        "AAA": prices['Close'],
+        "BBB": prices['Close'][::-1].to_numpy(),
+        # Shorter history: leading NaNs where the ticker has no bars
+        "CCC": prices['Close'].where(np.arange(len(prices)) >= 100),
+    })
+    panel = calculate_technical_indicators_panel(closes)
+    for ticker in closes:
+        history = closes[[ticker]].dropna().rename(columns={ticker: "Close"})
+        expected = baseline_indicators(history)
+        for column in INDICATOR_COLUMNS:
+            np.testing.assert_allclose(panel[column][ticker].loc[history.index], expected[column], rtol=1e-8, atol=1e-8, equal_nan=True)
+
+
+def test_panel_on_plain_array(prices):
+    closes = np.column_stack([prices['Close'].to_numpy(), prices['Close'].to_numpy() * 2])
+    panel = calculate_technical_indicators_panel(closes)
+    assert list(panel) == INDICATOR_COLUMNS
+    assert panel['RSI'].shape == closes.shape
+    # Scaling prices scales the price-level indicators and leaves RSI unchanged
+    np.testing.assert_allclose(panel['SMA_50'][:, 1], panel['SMA_50'][:, 0] * 2, equal_nan=True)
+    np.testing.assert_allclose(panel['RSI'][:, 1], panel['RSI'][:, 0], equal_nan=True)
+
+
+def test_registry_matches_baseline(prices):
+    expected = baseline_indicators(prices)
+    result = compute_indicators(prices)
+    assert list(result.columns) == list(expected.columns)
+    for column in INDICATOR_COLUMNS:
+        np.testing.assert_allclose(result[column], expected[column], rtol=1e-12, atol=1e-12, equal_nan=True)
+
+
+def test_subset_and_custom_windows(prices):
+    result = compute_indicators(prices, ['SMA_30', 'RSI_7'])
+    assert list(result.columns) == ['Close', 'Volume', 'SMA_30', 'RSI_7']
+    np.testing.assert_allclose(result['SMA_30'], prices['Close'].rolling(30).mean(), equal_nan=True)
+
+
+def test_shared_intermediates_are_computed_once(prices):
+    context = IndicatorContext(prices)
+    assert context.get('BB_Middle') is context.get('SMA_20')
+    context.get('MACD')
+    assert {'EMA_12', 'EMA_26'} <= set(context._memo)
+
+
+@pytest.mark.parametrize("name", ["EMA", "SMA", "STD"])
+def test_windowed_family_without_window_is_rejected(prices, name):
+    with pytest.raises(ValueError, match=f"{name} needs a window"):
+        compute_indicators(prices, [name])
+
+
+@pytest.mark.parametrize("name", ["FOO", "SMA_x", "EMA_"])
+def test_unknown_indicator_is_rejected(prices, name):
+    with pytest.raises(ValueError, match="Unknown indicator"):
+        compute_indicators(prices, [name])
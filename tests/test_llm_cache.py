@@ -0,0 +1,83 @@
+import time
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+import utils.llm_cache as llm_cache
+from utils.llm_cache import LLMCache, arun_chain_cached, chain_cache_key, run_chain_cached
+
+
+class FakePrompt:
+    def __init__(self, template):
+        self.template = template
+
+    def format(self, **inputs):
+        return self.template.format(**inputs)
+
+
+class FakeChain:
+    """LLMChain stand-in counting model calls"""
+
+    def __init__(self, model="model-a", temperature=0.0, template="Rate {text}"):
+        self.llm = SimpleNamespace(model=model, temperature=temperature, max_tokens=1024, top_p=None, top_k=None, stop_sequences=None)
+        self.prompt = FakePrompt(template)
+        self.calls = 0
+
+    def run(self, **inputs):
+        self.calls += 1
+        return f"completion {self.calls} for {self.prompt.format(**inputs)}"
+
+    async def arun(self, **inputs):
+        return self.run(**inputs)
+
+
+@pytest.fixture(autouse=True)
+def cache(tmp_path, monkeypatch):
+    cache = LLMCache(path=str(tmp_path / "llm_cache.sqlite"))
+    cache.enabled = True
+    monkeypatch.setattr(llm_cache, "_llm_cache", cache)
+    return cache
+
+
+def test_key_depends_on_prompt_model_and_sampling():
+    base = chain_cache_key(FakeChain(), {"text": "a"})[0]
+    assert chain_cache_key(FakeChain(), {"text": "a"})[0] == base
+    assert chain_cache_key(FakeChain(), {"text": "b"})[0] != base
+    assert chain_cache_key(FakeChain(model="model-b"), {"text": "a"})[0] != base
+    assert chain_cache_key(FakeChain(temperature=0.7), {"text": "a"})[0] != base
+    # Chains that render the same prompt share the completion
+    assert chain_cache_key(FakeChain(template="Rate {text}"), {"text": "a"})[0] == base
+
+
+def test_identical_requests_share_a_completion(cache):
+    chain = FakeChain()
+    first = run_chain_cached(chain, "test", None, text="a")
+    assert run_chain_cached(chain, "test", None, text="a") == first
+    assert asyncio.run(arun_chain_cached(chain, "test", None, text="a")) == first
+    assert chain.calls == 1
+    assert cache.stats()["namespaces"]["test"] == {"hits": 2, "misses": 1}
+
+
+def test_ttl_is_decided_by_the_reader(cache):
+    chain = FakeChain()
+    run_chain_cached(chain, "test", None, text="a")
+    key = chain_cache_key(chain, {"text": "a"})[0]
+    # Age the entry by an hour
+    with cache._lock:
+        cache._connection().execute("UPDATE responses SET created_at = ?", (time.time() - 3600,))
+    assert cache.get(key, ttl=None) is not None
+    assert cache.get(key, ttl=7200) is not None
+    assert cache.get(key, ttl=60) is None
+    run_chain_cached(chain, "test", 60, text="a")
+    assert chain.calls == 2
+
+
+def test_clear_by_namespace(cache):
+    chain = FakeChain()
+    run_chain_cached(chain, "keep", None, text="a")
+    run_chain_cached(chain, "drop", None, text="b")
+    cache.clear("drop")
+    run_chain_cached(chain, "keep", None, text="a")
+    run_chain_cached(chain, "drop", None, text="b")
+    assert chain.calls == 3
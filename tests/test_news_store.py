@@ -0,0 +1,111 @@
+import pandas as pd
+import pytest
+
+import utils.common as common
+from utils.news_store import NewsStore, cluster_near_duplicates
+
+
+def make_articles(now, count, step_minutes=30):
+    return [
+        {
+            "url": f"https://news.example/{i}",
+            "title": f"Headline number {i} about quarterly results",
+            "description": f"Story {i} body text",
+            "publishedAt": (now - pd.Timedelta(minutes=step_minutes * i)).strftime("%Y-%m-%dT%H:%M:%SZ"),
+        }
+        for i in range(count)
+    ]
+
+
+class FakeUpstream:
+    """NewsAPI-like source returning at most ``limit`` of the newest matching articles per call"""
+
+    def __init__(self, articles, limit):
+        self.articles = articles
+        self.limit = limit
+        self.calls = []
+
+    def __call__(self, since, until=None):
+        self.calls.append((since, until))
+        matching = [
+            article for article in self.articles
+            if pd.Timestamp(article["publishedAt"]) >= since and (until is None or pd.Timestamp(article["publishedAt"]) <= until)
+        ]
+        return matching[:self.limit], len(matching) <= self.limit
+
+
+@pytest.fixture
+def store(tmp_path):
+    return NewsStore(path=str(tmp_path / "news.sqlite"), sync_interval=0)
+
+
+def test_truncated_cold_sync_is_backfilled(store):
+    now = pd.Timestamp.now(tz="UTC")
+    # 7 days at one article per 30 minutes is 336 articles, more than one response holds
+    upstream = FakeUpstream(make_articles(now, 336), limit=100)
+    articles = store.get("ACME", 7, upstream)
+    # One head request plus one backfill below the oldest article received
+    assert len(upstream.calls) == 2
+    assert 100 < len(articles) < 336
+
+    for _ in range(3):
+        articles = store.get("ACME", 7, upstream)
+    assert len(articles) == 336
+    assert len({article["url"] for article in articles}) == 336
+
+
+def test_complete_sync_covers_window_and_only_fetches_new(store, monkeypatch):
+    now = pd.Timestamp.now(tz="UTC")
+    upstream = FakeUpstream(make_articles(now, 50), limit=100)
+    assert len(store.get("ACME", 7, upstream)) == 50
+    store.get("ACME", 7, upstream)
+    # Covered window: the second sync only asks for the recent overlap, with no backfill
+    assert len(upstream.calls) == 2
+    assert upstream.calls[1][1] is None
+    assert upstream.calls[1][0] > now - pd.Timedelta(days=1)
+
+
+def test_busy_incremental_sync_leaves_no_gap(store):
+    now = pd.Timestamp.now(tz="UTC")
+    upstream = FakeUpstream(make_articles(now, 20, step_minutes=600), limit=100)
+    store.get("ACME", 7, upstream)
+    # A burst larger than one response is published before the next sync
+    burst = [
+        dict(article, url=f"https://news.example/burst/{i}")
+        for i, article in enumerate(make_articles(pd.Timestamp.now(tz="UTC"), 150, step_minutes=0.2))
+    ]
+    upstream.articles = burst + upstream.articles
+    for _ in range(3):
+        articles = store.get("ACME", 7, upstream)
+    start = pd.Timestamp.now(tz="UTC") - pd.Timedelta(days=7)
+    expected = {article["url"] for article in upstream.articles if pd.Timestamp(article["publishedAt"]) >= start}
+    assert {article["url"] for article in articles} == expected
+
+
+def test_download_news_pages_until_complete(monkeypatch):
+    now = pd.Timestamp.now(tz="UTC")
+    available = make_articles(now, 250)
+
+    class Client:
+        def get_everything(self, page, page_size, **query):
+            chunk = available[(page - 1) * page_size:page * page_size]
+            return {"totalResults": len(available), "articles": chunk}
+
+    monkeypatch.setattr(common, "get_newsapi_client", lambda: Client())
+    articles, complete = common._download_news("ACME", now - pd.Timedelta(days=7), company_name="Acme")
+    assert complete and len(articles) == 250
+
+    monkeypatch.setattr(common, "NEWS_MAX_PAGES", 2)
+    articles, complete = common._download_news("ACME", now - pd.Timedelta(days=7), company_name="Acme")
+    assert not complete and len(articles) == 200
+
+
+def test_near_duplicates_are_clustered():
+    story = "Acme shares jump after the company reports record quarterly revenue and raises its full year guidance"
+    articles = [
+        {"title": "Acme beats estimates", "description": story},
+        {"title": "Acme beats estimates", "description": story + " on Tuesday"},
+        {"title": "Unrelated", "description": "Central bank leaves interest rates unchanged amid cooling inflation data"},
+        {"title": "Acme beats estimates", "description": story.replace("record", "all-time record")},
+    ]
+    assert cluster_near_duplicates(articles) == [[0, 1, 3], [2]]
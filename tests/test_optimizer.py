@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.optimizer import METHODS, hrp_weights, optimize_portfolio, project_capped_simplex, risk_parity_weights
+
+
+@pytest.fixture
+def returns_df():
+    rng = np.random.default_rng(21)
+    factor = rng.normal(0.0004, 0.01, (500, 1))
+    values = factor * rng.uniform(0.5, 1.5, 8) + rng.normal(rng.uniform(-0.0002, 0.001, 8), rng.uniform(0.005, 0.02, 8), (500, 8))
+    return pd.DataFrame(values, columns=[f"T{i}" for i in range(8)])
+
+
+@pytest.mark.parametrize("max_weight", [None, 0.3, 0.2, 0.05])
+def test_weights_are_fully_invested_and_capped(returns_df, max_weight):
+    result = optimize_portfolio(returns_df, max_weight=max_weight)
+    cap = result["max_weight"]
+    # A cap below 1/N is infeasible and raised to equal weight
+    assert cap == pytest.approx(1.0 if max_weight is None else max(max_weight, 1 / 8))
+    for method in METHODS:
+        weights = np.array(list(result[method]["weights"].values()))
+        assert weights.sum() == pytest.approx(1.0, abs=1e-5)
+        assert weights.min() >= -1e-9
+        assert weights.max() <= cap + 1e-6
+
+
+def test_max_sharpe_beats_min_variance_sharpe(returns_df):
+    result = optimize_portfolio(returns_df, max_weight=0.4)
+    assert result["max_sharpe"]["sharpe_ratio"] >= result["min_variance"]["sharpe_ratio"] - 1e-9
+    assert result["min_variance"]["volatility"] <= result["max_sharpe"]["volatility"] + 1e-9
+    assert result["min_variance"]["volatility"] == pytest.approx(result["frontier"][0]["volatility"], abs=1e-3)
+
+
+def test_projection_onto_capped_simplex():
+    rng = np.random.default_rng(0)
+    points = rng.normal(0, 1, (10, 50))
+    projected = project_capped_simplex(points, cap=0.25)
+    np.testing.assert_allclose(projected.sum(axis=0), 1.0, atol=1e-9)
+    assert projected.min() >= 0 and projected.max() <= 0.25 + 1e-12
+    # Points already feasible are left alone
+    feasible = np.full(10, 0.1)
+    np.testing.assert_allclose(project_capped_simplex(feasible, cap=0.25), feasible)
+
+
+def test_risk_parity_equalizes_risk_contributions(returns_df):
+    covariance = returns_df.cov().to_numpy()
+    weights = risk_parity_weights(covariance)
+    contributions = weights * (covariance @ weights)
+    assert weights.sum() == pytest.approx(1.0)
+    np.testing.assert_allclose(contributions / contributions.sum(), 1 / len(weights), rtol=1e-4)
+
+
+def test_hrp_on_uncorrelated_assets_is_inverse_variance():
+    variances = np.array([0.01, 0.04, 0.02, 0.08])
+    weights = hrp_weights(np.diag(variances))
+    expected = (1 / variances) / (1 / variances).sum()
+    np.testing.assert_allclose(weights, expected, rtol=1e-9)
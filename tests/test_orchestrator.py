@@ -0,0 +1,63 @@
+import time
+import asyncio
+
+import pytest
+
+from api.orchestrator import TaskGraph
+
+
+def test_dependencies_receive_results_and_branches_overlap():
+    graph = TaskGraph()
+
+    async def a():
+        await asyncio.sleep(0.2)
+        return 1
+
+    def b():
+        time.sleep(0.2)
+        return 2
+
+    def c():
+        time.sleep(0.2)
+        return 3
+
+    graph.add("a", a)
+    graph.add("b", b)
+    graph.add("c", c)
+
+    async def total(a, b, c):
+        return a + b + c
+
+    graph.add("total", total, deps=("a", "b", "c"))
+    start = time.perf_counter()
+    results, errors, timings = asyncio.run(graph.run())
+    elapsed = time.perf_counter() - start
+
+    assert results == {"a": 1, "b": 2, "c": 3, "total": 6}
+    assert errors == {}
+    assert set(timings) == {"a", "b", "c", "total"}
+    # a awaits while b and c sleep in worker threads, all at the same time
+    assert elapsed < 0.35
+
+
+def test_failure_skips_dependents_only():
+    graph = TaskGraph()
+
+    def broken():
+        raise RuntimeError("upstream down")
+
+    graph.add("broken", broken)
+    graph.add("fine", lambda: "ok")
+    graph.add("needs_broken", lambda broken: broken, deps=("broken",))
+    graph.add("needs_fine", lambda fine: fine.upper(), deps=("fine",))
+    results, errors, _ = asyncio.run(graph.run())
+
+    assert results == {"fine": "ok", "needs_fine": "OK"}
+    assert errors["broken"] == "upstream down"
+    assert errors["needs_broken"] == "Skipped because broken failed"
+
+
+def test_unknown_dependency_is_rejected():
+    graph = TaskGraph()
+    with pytest.raises(ValueError, match="unknown tasks: missing"):
+        graph.add("task", lambda missing: None, deps=("missing",))
@@ -0,0 +1,99 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("pyarrow")
+
+from utils.price_store import PriceStore, period_start
+
+
+class FakeHistory:
+    """yfinance-like history over a fixed set of daily bars"""
+
+    def __init__(self, bars):
+        self.bars = bars
+        self.calls = []
+
+    def __call__(self, period=None, start=None):
+        self.calls.append({"period": period, "start": start})
+        if start is not None:
+            return self.bars[self.bars.index >= pd.Timestamp(start, tz=self.bars.index.tz)].copy()
+        begin = period_start(period)
+        return self.bars.copy() if begin is None else self.bars[self.bars.index >= begin].copy()
+
+
+def daily_bars(days, end=None):
+    end = (end or pd.Timestamp.now(tz="UTC")).normalize()
+    index = pd.date_range(end=end, periods=days, freq="D", tz="UTC")
+    close = 100 + np.arange(days, dtype=float)
+    return pd.DataFrame({"Close": close, "Dividends": 0.0, "Stock Splits": 0.0}, index=index)
+
+
+@pytest.fixture
+def store(tmp_path):
+    return PriceStore(root=str(tmp_path), daily_max_age=0)
+
+
+def test_fresh_store_serves_locally(tmp_path):
+    store = PriceStore(root=str(tmp_path), daily_max_age=3600)
+    history = FakeHistory(daily_bars(60))
+    first = store.get("ACME", "1mo", "1d", history)
+    second = store.get("ACME", "1mo", "1d", history)
+    assert len(history.calls) == 1
+    pd.testing.assert_frame_equal(first, second, check_freq=False)
+
+
+def test_stale_store_fetches_only_the_tail(store):
+    bars = daily_bars(61)
+    history = FakeHistory(bars.iloc[:-1])
+    store.get("ACME", "1mo", "1d", history)
+
+    history.bars = bars
+    result = store.get("ACME", "1mo", "1d", history)
+    # The tail request starts at the second-to-last stored bar
+    assert history.calls[-1]["start"] == bars.index[-3].strftime("%Y-%m-%d")
+    assert result.index[-1] == bars.index[-1]
+    assert len(history.calls) == 2
+
+
+def test_revised_partial_bar_is_not_a_basis_change(store):
+    bars = daily_bars(60)
+    history = FakeHistory(bars)
+    store.get("ACME", "1mo", "1d", history)
+
+    revised = bars.copy()
+    revised.iloc[-1, revised.columns.get_loc("Close")] += 3
+    history.bars = revised
+    result = store.get("ACME", "1mo", "1d", history)
+    assert len(history.calls) == 2
+    assert result["Close"].iloc[-1] == revised["Close"].iloc[-1]
+
+
+def test_split_refetches_the_covered_range(store):
+    bars = daily_bars(60)
+    history = FakeHistory(bars.iloc[:-1])
+    store.get("ACME", "1mo", "1d", history)
+
+    # A 2:1 split on the newest bar halves every earlier adjusted close
+    split = bars.copy()
+    split["Close"] = split["Close"] / 2
+    split.iloc[-1, split.columns.get_loc("Stock Splits")] = 2.0
+    history.bars = split
+    result = store.get("ACME", "1mo", "1d", history)
+
+    assert len(history.calls) == 3
+    assert history.calls[-1]["start"] is not None
+    expected = split[split.index >= result.index[0]]
+    np.testing.assert_allclose(result["Close"], expected["Close"])
+
+
+def test_dividend_without_close_change_in_overlap_still_refetches(store):
+    bars = daily_bars(60)
+    history = FakeHistory(bars.iloc[:-1])
+    store.get("ACME", "1mo", "1d", history)
+
+    paid = bars.copy()
+    paid.iloc[-1, paid.columns.get_loc("Dividends")] = 0.5
+    history.bars = paid
+    store.get("ACME", "1mo", "1d", history)
+    assert len(history.calls) == 3
@@ -0,0 +1,52 @@
+import time
+
+import pytest
+
+from utils.reference_data import ReferenceIndex, record_from_info
+
+
+INFO = {"shortName": "Acme Corp", "sector": "Industrials", "industry": "Tools", "exchange": "NYQ", "currency": "USD"}
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = ReferenceIndex(path=str(tmp_path / "reference.sqlite"), max_age=3600, retry_age=60)
+    yield index
+    index.shutdown()
+
+
+def test_known_tickers_are_served_from_the_index(index):
+    calls = []
+
+    def fetch(ticker):
+        calls.append(ticker)
+        return record_from_info(INFO)
+
+    assert index.lookup(["acme"], fetch)["acme"]["name"] == "Acme Corp"
+    assert index.lookup(["ACME", "acme"], fetch)["ACME"]["sector"] == "Industrials"
+    assert calls == ["ACME"]
+
+
+def test_failed_refresh_keeps_stored_fields(index):
+    index.upsert({"ACME": {**record_from_info(INFO), "updated_at": time.time() - 7200}})
+
+    def failing(ticker):
+        raise RuntimeError("upstream unavailable")
+
+    assert index.update(["ACME"], failing)["ACME"]["name"] == "Acme Corp"
+    stored = index.get_many(["ACME"])["ACME"]
+    assert stored["sector"] == "Industrials"
+    # Due for another try after retry_age rather than after max_age
+    assert stored["updated_at"] == pytest.approx(time.time() - 3600 + 60, abs=5)
+
+
+def test_empty_lookup_is_retried_after_retry_age(index):
+    assert index.update(["NEWCO"], lambda ticker: record_from_info({}))["NEWCO"]["name"] is None
+    stored = index.get_many(["NEWCO"])["NEWCO"]
+    assert stored["updated_at"] < time.time() - 3600 + 61
+
+    # Once retry_age has passed the record is stale and refreshed with real data
+    index.upsert({"NEWCO": {**stored, "updated_at": time.time() - 3601}})
+    index.lookup(["NEWCO"], lambda ticker: record_from_info(INFO))
+    index.executor.shutdown(wait=True)
+    assert index.get_many(["NEWCO"])["NEWCO"]["name"] == "Acme Corp"
@@ -0,0 +1,109 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.risk import compute_var_es, historical_var_es, parametric_var_es, rolling_risk, tail_stats
+
+
+@pytest.fixture
+def returns_df():
+    rng = np.random.default_rng(11)
+    covariance = np.array([
+        [0.00040, 0.00018, 0.00010],
+        [0.00018, 0.00025, 0.00008],
+        [0.00010, 0.00008, 0.00015],
+    ])
+    values = rng.multivariate_normal([0.0005, 0.0003, 0.0002], covariance, size=5000)
+    return pd.DataFrame(values, columns=["AAA", "BBB", "CCC"], index=pd.bdate_range("2000-01-03", periods=len(values)))
+
+
+def test_tail_stats_on_known_sample():
+    returns = np.arange(-50, 50) / 1000
+    var, es = tail_stats(returns, 0.95)
+    assert var == pytest.approx(np.quantile(returns, 0.05))
+    assert es == pytest.approx(returns[returns <= var].mean())
+    assert es <= var
+
+
+def test_tail_stats_ignores_nan():
+    var, es = tail_stats([np.nan, np.nan], 0.95)
+    assert np.isnan(var) and np.isnan(es)
+
+
+def test_methods_agree_on_normal_returns(returns_df):
+    result = compute_var_es(returns_df, [0.5, 0.3, 0.2], levels=(0.95, 0.99), horizons=(1, 10), paths=50_000, seed=3)
+    assert set(result) == {"historical", "parametric", "monte_carlo"}
+    for horizon in ("1d", "10d"):
+        for level in ("95%", "99%"):
+            parametric = result["parametric"][horizon][level]
+            # Sampling error of the tail estimates, in percent of the parametric value
+            tolerance = 0.25 if horizon == "10d" else 0.1
+            for method in ("historical", "monte_carlo"):
+                estimate = result[method][horizon][level]
+                assert estimate["var"] == pytest.approx(parametric["var"], rel=tolerance)
+                assert estimate["es"] == pytest.approx(parametric["es"], rel=tolerance)
+
+
+def test_ordering_within_each_method(returns_df):
+    result = compute_var_es(returns_df, levels=(0.95, 0.99), horizons=(1, 10), paths=20_000, seed=1)
+    for by_horizon in result.values():
+        for horizon in ("1d", "10d"):
+            by_level = by_horizon[horizon]
+            for stats in by_level.values():
+                # Expected Shortfall is the mean beyond VaR, so never a smaller loss
+                assert stats["es"] <= stats["var"] < 0
+            assert by_level["99%"]["var"] <= by_level["95%"]["var"]
+        assert by_horizon["10d"]["95%"]["var"] < by_horizon["1d"]["95%"]["var"]
+
+
+def test_monte_carlo_is_reproducible_for_a_seed(returns_df):
+    first = compute_var_es(returns_df, paths=10_000, seed=5)["monte_carlo"]
+    second = compute_var_es(returns_df, paths=10_000, seed=5)["monte_carlo"]
+    assert first == second
+
+
+def test_parametric_matches_closed_form(returns_df):
+    weights = np.array([0.2, 0.3, 0.5])
+    portfolio = returns_df.to_numpy() @ weights
+    var, es = parametric_var_es(returns_df, weights, (0.95,), (1,))[1][0.95]
+    mean, volatility = portfolio.mean(), portfolio.std(ddof=1)
+    assert var == pytest.approx(mean - 1.6448536269514722 * volatility)
+    assert es == pytest.approx(mean - 2.0627128075074253 * volatility)
+
+
+def test_historical_single_day_uses_raw_returns(returns_df):
+    portfolio = returns_df.mean(axis=1)
+    var, es = historical_var_es(portfolio, (0.95,), (1,))[1][0.95]
+    assert (var, es) == pytest.approx(tail_stats(portfolio.to_numpy(), 0.95))
+
+
+def brute_force_max_drawdown(returns, window):
+    """Max drawdown of every trailing window, peak taken inside the window (in percent)"""
+    wealth = np.concatenate([[1.0], np.cumprod(1 + returns)])
+    result = np.full(len(returns), np.nan)
+    for end in range(window - 1, len(returns)):
+        path = wealth[end + 1 - window:end + 2]
+        result[end] = ((path / np.maximum.accumulate(path)).min() - 1) * 100
+    return result
+
+
+@pytest.mark.parametrize("length", [1, 20, 21, 22, 64, 300])
+def test_rolling_max_drawdown_matches_brute_force(length):
+    rng = np.random.default_rng(length)
+    returns = pd.DataFrame(rng.normal(0, 0.02, (length, 3)), columns=["AAA", "BBB", "CCC"])
+    returns.iloc[:4, 1] = np.nan
+    rolling = rolling_risk(returns, windows=(1, 5, 21, 63))
+    for window, metrics in rolling.items():
+        for column in returns:
+            expected = pd.Series(brute_force_max_drawdown(returns[column].fillna(0.0).to_numpy(), window))
+            expected = expected.where(returns[column].rolling(window).mean().notna())
+            np.testing.assert_allclose(metrics["max_drawdown"][column], expected, atol=1e-9, equal_nan=True)
+
+
+def test_rolling_max_drawdown_ignores_peaks_before_the_window():
+    # A crash from an early peak must not show up in windows that start after the peak
+    returns = pd.Series([0.5] + [-0.01] * 40 + [0.0] * 30, name="portfolio")
+    drawdown = rolling_risk(returns, windows=(21,))[21]["max_drawdown"]
+    assert drawdown.name == "portfolio"
+    assert drawdown.iloc[-1] == pytest.approx(0.0)
+    assert drawdown.iloc[40] == pytest.approx((0.99 ** 21 - 1) * 100)
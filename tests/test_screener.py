@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+
+from utils.screener import ScreenerTable
+
+
+INFOS = {
+    "AAA": {"shortName": "Alpha", "sector": "Technology", "trailingPE": 30.0, "returnOnEquity": 0.25, "marketCap": 3e12},
+    "BBB": {"shortName": "Beta", "sector": "Energy", "trailingPE": 8.0, "returnOnEquity": 0.12, "marketCap": 2e11},
+    "CCC": {"shortName": "Gamma", "sector": "technology", "trailingPE": 15.0, "returnOnEquity": 0.30, "marketCap": 5e10},
+    "DDD": {"shortName": "Delta", "sector": "Utilities", "returnOnEquity": 0.08, "marketCap": 1e10},
+}
+
+
+@pytest.fixture
+def table(tmp_path):
+    table = ScreenerTable(path=str(tmp_path / "fundamentals.parquet"))
+    table.upsert(INFOS)
+    return table
+
+
+def test_filters_sort_and_limit(table):
+    result = table.screen(
+        filters=[{"field": "sector", "op": "eq", "value": "Technology"}, {"field": "pe", "op": "lt", "value": 40}],
+        sort_by="roe",
+        descending=True
+    )
+    assert result["universe"] == 4
+    assert result["matches"] == 2
+    assert [row["ticker"] for row in result["results"]] == ["CCC", "AAA"]
+    assert result["results"][0]["rank"] == 1
+
+
+def test_missing_values_never_match_and_sort_last(table):
+    assert table.screen(filters=[{"field": "pe", "op": "ne", "value": 8}])["matches"] == 2
+    ranked = table.screen(sort_by="pe", descending=True)["results"]
+    assert [row["ticker"] for row in ranked] == ["AAA", "CCC", "BBB", "DDD"]
+    assert ranked[-1]["pe"] is None
+
+
+def test_between_and_in(table):
+    result = table.screen(filters=[{"field": "market_cap", "op": "between", "value": [1e10, 3e11]}])
+    assert result["matches"] == 3
+    result = table.screen(filters=[{"field": "ticker", "op": "in", "value": ["aaa", "ddd"]}], fields=["name"])
+    assert [row for row in result["results"]] == [{"rank": 1, "ticker": "AAA", "name": "Alpha"}, {"rank": 2, "ticker": "DDD", "name": "Delta"}]
+
+
+def test_ticker_is_an_accepted_field(table):
+    rows = table.screen(fields=["ticker", "pe"], sort_by="pe")["results"]
+    assert rows[0] == {"rank": 1, "ticker": "BBB", "pe": 8.0}
+
+
+def test_invalid_requests_are_rejected(table):
+    with pytest.raises(ValueError):
+        table.screen(fields=["nonsense"])
+    with pytest.raises(ValueError):
+        table.screen(sort_by="sector")
+    with pytest.raises(ValueError):
+        table.screen(filters=[{"field": "sector", "op": "gt", "value": "A"}])
+
+
+def test_upsert_replaces_rows(table):
+    table.upsert({"BBB": {**INFOS["BBB"], "trailingPE": 9.5}})
+    assert len(table) == 4
+    row = table.screen(filters=[{"field": "ticker", "op": "eq", "value": "BBB"}], fields=["pe"])["results"][0]
+    assert row["pe"] == pytest.approx(9.5)
+    assert np.isnan(table._arrays["pe"]).sum() == 1
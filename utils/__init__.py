@@ -1,17 +1,39 @@
 from utils.common import (
+    get_ticker,
+    get_ticker_info,
     fetch_stock_data,
+    fetch_stock_data_bulk,
+    fetch_price_panel,
+    build_price_panel,
     fetch_company_info,
+    fetch_reference_data,
     fetch_financial_data,
+    fetch_fundamental_snapshot,
     fetch_news_articles,
     calculate_technical_indicators,
     calculate_fundamental_ratios
 )
+from utils.indicators import IndicatorEngine, calculate_technical_indicators_panel
+from utils.reference_data import get_reference_index
+from utils.fundamentals import FundamentalSnapshot, ratios_from_info
 
 __all__ = [
+    'get_ticker',
+    'get_ticker_info',
     'fetch_stock_data',
+    'fetch_stock_data_bulk',
+    'fetch_price_panel',
+    'build_price_panel',
     'fetch_company_info',
+    'fetch_reference_data',
     'fetch_financial_data',
+    'fetch_fundamental_snapshot',
     'fetch_news_articles',
     'calculate_technical_indicators',
-    'calculate_fundamental_ratios'
+    'calculate_fundamental_ratios',
+    'IndicatorEngine',
+    'calculate_technical_indicators_panel',
+    'get_reference_index',
+    'FundamentalSnapshot',
+    'ratios_from_info'
 ] 
\ No newline at end of file
@@ -0,0 +1,456 @@
+import os
+import json
+import base64
+import hashlib
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+
+from utils.cache import TTLCache
+
+# Default number of points per downsampled chart series
+DEFAULT_MAX_POINTS = 500
+
+# Rendered chart cache and worker pool settings
+CHART_CACHE_SIZE = int(os.getenv("CHART_CACHE_SIZE", "128"))
+CHART_CACHE_TTL = float(os.getenv("CHART_CACHE_TTL", "3600"))
+CHART_RENDER_WORKERS = int(os.getenv("CHART_RENDER_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+# Columns the technical price, RSI and MACD charts read
+PRICE_CHART_COLUMNS = ['Open', 'High', 'Low', 'Close', 'SMA_20', 'SMA_50', 'BB_Upper', 'BB_Lower', 'RSI', 'MACD', 'MACD_Signal']
+
+# Chart panels for columnar chart data: panel -> (series LTTB is run on, columns shipped)
+TECHNICAL_PANELS = {
+    'price': ('Close', ['Open', 'High', 'Low', 'Close', 'SMA_20', 'SMA_50', 'BB_Upper', 'BB_Lower']),
+    'rsi': ('RSI', ['RSI']),
+    'macd': ('MACD', ['MACD', 'MACD_Signal'])
+}
+
+
+def lttb_indices(x, y, threshold):
+    """
+    Pick the points that best preserve a line's shape (Largest-Triangle-Three-Buckets)
+
+    The first and last points are always kept. The points in between are split
+    into ``threshold - 2`` buckets, and from each bucket the point forming the
+    largest triangle with the previously kept point and the next bucket's
+    average is selected.
+
+    Args:
+        x (np.ndarray): Monotonic x values
+        y (np.ndarray): Finite y values
+        threshold (int): Number of points to keep
+
+    Returns:
+        np.ndarray: Sorted indices of the kept points
+    """
+    n = len(y)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    edges = np.linspace(1, n - 1, threshold - 1).astype(int)
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+
+    previous = 0
+    for bucket in range(threshold - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        next_start, next_end = end, edges[bucket + 2] if bucket + 2 < len(edges) else n
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+        areas = np.abs(
+            (x[previous] - avg_x) * (y[start:end] - y[previous])
+            - (x[previous] - x[start:end]) * (avg_y - y[previous])
+        )
+        previous = start + int(np.argmax(areas))
+        selected[bucket + 1] = previous
+    return selected
+
+
+def encode_float32(values):
+    """
+    Encode an array as base64 little-endian float32 (NaN marks missing values)
+
+    Args:
+        values (array-like): Numeric values
+
+    Returns:
+        str: Base64 payload, decodable with ``new Float32Array(bytes.buffer)`` in the browser
+    """
+    return base64.b64encode(np.asarray(values, dtype='<f4').tobytes()).decode('ascii')
+
+
+def encode_float64(values):
+    """Encode an array as base64 little-endian float64, used for timestamps"""
+    return base64.b64encode(np.asarray(values, dtype='<f8').tobytes()).decode('ascii')
+
+
+def build_chart_series(df, panels=None, max_points=DEFAULT_MAX_POINTS):
+    """
+    Build compact columnar chart data for client-side rendering
+
+    Each panel is downsampled independently with LTTB on its primary series, so
+    the payload stays around ``max_points`` rows per panel whatever the period
+    or interval. Timestamps are epoch milliseconds encoded as float64 so
+    intraday bars keep their precision; every other column is float32.
+
+    Args:
+        df (pd.DataFrame): Price data with indicator columns and a DatetimeIndex
+        panels (dict): Panel name -> (primary column, columns), defaults to TECHNICAL_PANELS
+        max_points (int): Target number of points per panel
+
+    Returns:
+        dict: Panel name -> {"points", "time", "columns"} with base64-encoded arrays
+    """
+    if isinstance(df.index, pd.DatetimeIndex):
+        timestamps = df.index.as_unit('ms').asi8
+    else:
+        timestamps = np.arange(len(df))
+    series = {}
+    for name, (primary, columns) in (panels or TECHNICAL_PANELS).items():
+        columns = [column for column in columns if column in df.columns]
+        if primary not in df.columns:
+            continue
+        rows = np.flatnonzero(np.isfinite(df[primary].to_numpy(dtype=float)))
+        keep = rows[lttb_indices(timestamps[rows], df[primary].to_numpy(dtype=float)[rows], max_points)]
+        series[name] = {
+            'points': int(len(keep)),
+            'time': encode_float64(timestamps[keep]),
+            'columns': {column: encode_float32(df[column].to_numpy(dtype=float)[keep]) for column in columns}
+        }
+    return series
+
+
+def render_price_charts(df):
+    """
+    Render the technical price, RSI and MACD charts
+
+    Args:
+        df (pd.DataFrame): Stock data with technical indicators
+
+    Returns:
+        dict: HTML for the price, RSI and MACD charts
+    """
+    fig = go.Figure()
+
+    # Add candlestick chart
+    fig.add_trace(go.Candlestick(
+        x=df.index,
+        open=df['Open'],
+        high=df['High'],
+        low=df['Low'],
+        close=df['Close'],
+        name='Price'
+    ))
+
+    # Add moving averages
+    fig.add_trace(go.Scatter(
+        x=df.index,
+        y=df['SMA_20'],
+        line=dict(color='blue', width=1),
+        name='SMA 20'
+    ))
+
+    fig.add_trace(go.Scatter(
+        x=df.index,
+        y=df['SMA_50'],
+        line=dict(color='orange', width=1),
+        name='SMA 50'
+    ))
+
+    # Add Bollinger Bands
+    fig.add_trace(go.Scatter(
+        x=df.index,
+        y=df['BB_Upper'],
+        line=dict(color='rgba(0,128,0,0.3)', width=1),
+        name='BB Upper'
+    ))
+
+    fig.add_trace(go.Scatter(
+        x=df.index,
+        y=df['BB_Lower'],
+        line=dict(color='rgba(0,128,0,0.3)', width=1),
+        name='BB Lower',
+        fill='tonexty'
+    ))
+
+    fig.update_layout(
+        title='Price Chart with Indicators',
+        yaxis_title='Price',
+        xaxis_title='Date',
+        height=600,
+        template='plotly_white'
+    )
+
+    # RSI with overbought/oversold lines
+    fig_rsi = go.Figure()
+
+    fig_rsi.add_trace(go.Scatter(
+        x=df.index,
+        y=df['RSI'],
+        line=dict(color='purple', width=1),
+        name='RSI'
+    ))
+
+    fig_rsi.add_trace(go.Scatter(
+        x=[df.index[0], df.index[-1]],
+        y=[70, 70],
+        line=dict(color='red', width=1, dash='dash'),
+        name='Overbought'
+    ))
+
+    fig_rsi.add_trace(go.Scatter(
+        x=[df.index[0], df.index[-1]],
+        y=[30, 30],
+        line=dict(color='green', width=1, dash='dash'),
+        name='Oversold'
+    ))
+
+    fig_rsi.update_layout(
+        title='RSI Indicator',
+        yaxis_title='RSI',
+        xaxis_title='Date',
+        height=300,
+        template='plotly_white'
+    )
+
+    # MACD with signal line
+    fig_macd = go.Figure()
+
+    fig_macd.add_trace(go.Scatter(
+        x=df.index,
+        y=df['MACD'],
+        line=dict(color='blue', width=1),
+        name='MACD'
+    ))
+
+    fig_macd.add_trace(go.Scatter(
+        x=df.index,
+        y=df['MACD_Signal'],
+        line=dict(color='red', width=1),
+        name='Signal Line'
+    ))
+
+    fig_macd.update_layout(
+        title='MACD Indicator',
+        yaxis_title='MACD',
+        xaxis_title='Date',
+        height=300,
+        template='plotly_white'
+    )
+
+    return {
+        'price_chart': fig.to_html(full_html=False, include_plotlyjs='cdn'),
+        'rsi_chart': fig_rsi.to_html(full_html=False, include_plotlyjs='cdn'),
+        'macd_chart': fig_macd.to_html(full_html=False, include_plotlyjs='cdn')
+    }
+
+
+def render_correlation_heatmap(corr_matrix):
+    """
+    Render a correlation heatmap
+
+    Args:
+        corr_matrix (pd.DataFrame): Correlation matrix
+
+    Returns:
+        str: HTML for the heatmap
+    """
+    fig = px.imshow(
+        corr_matrix,
+        color_continuous_scale='RdBu_r',
+        labels=dict(color="Correlation"),
+        title="Stock Correlation Heatmap"
+    )
+
+    fig.update_layout(
+        height=600,
+        width=700,
+    )
+
+    return fig.to_html(full_html=False, include_plotlyjs='cdn')
+
+
+def render_sector_pie(sector_percentages):
+    """
+    Render the portfolio sector allocation pie chart
+
+    Args:
+        sector_percentages (dict): Sector -> percentage of holdings
+
+    Returns:
+        str: HTML for the pie chart
+    """
+    fig = px.pie(
+        values=list(sector_percentages.values()),
+        names=list(sector_percentages.keys()),
+        title="Portfolio Sector Allocation"
+    )
+
+    fig.update_layout(
+        height=500,
+        width=700
+    )
+
+    return fig.to_html(full_html=False, include_plotlyjs='cdn')
+
+
+def chart_key(render, *args):
+    """
+    Content address of a chart: the render function plus a hash of its inputs
+
+    Args:
+        render (callable): Module-level render function
+        *args: Render inputs (DataFrames, Series, dicts or other JSON-serializable values)
+
+    Returns:
+        str: SHA-1 hex digest
+    """
+    digest = hashlib.sha1(f"{render.__module__}.{render.__name__}".encode("utf-8"))
+    for arg in args:
+        if isinstance(arg, (pd.DataFrame, pd.Series)):
+            digest.update(pd.util.hash_pandas_object(arg, index=True).to_numpy().tobytes())
+            names = list(arg.columns) if isinstance(arg, pd.DataFrame) else [arg.name]
+            digest.update(json.dumps([str(name) for name in names]).encode("utf-8"))
+        else:
+            digest.update(json.dumps(arg, sort_keys=True, default=str).encode("utf-8"))
+    return digest.hexdigest()
+
+
+class ChartRenderer:
+    """
+    Renders charts once per distinct input and keeps the HTML.
+
+    Rendering runs in a pool of worker processes so Plotly's figure building
+    and serialization do not hold the GIL of the process serving requests.
+    Concurrent requests for the same chart share one render. If a worker
+    dies the broken pool is discarded and the next render starts a fresh
+    one; if worker processes cannot be started at all, charts are rendered
+    inline from then on.
+    """
+
+    def __init__(self, max_workers=None, maxsize=None, ttl=None):
+        """
+        Initialize the renderer
+
+        Args:
+            max_workers (int): Worker processes, 0 renders inline
+            maxsize (int): Maximum number of rendered charts kept
+            ttl (float): Seconds a rendered chart is reused
+        """
+        self.max_workers = CHART_RENDER_WORKERS if max_workers is None else max_workers
+        self.cache = TTLCache(maxsize=maxsize or CHART_CACHE_SIZE, ttl=ttl or CHART_CACHE_TTL)
+        self._executor = None
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def _pool(self):
+        if self._executor is None and self.max_workers > 0:
+            # spawn avoids forking a process that already runs server threads
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._executor
+
+    def _discard_pool(self, executor, inline=False):
+        """
+        Drop a pool that can no longer run renders
+
+        Args:
+            executor (ProcessPoolExecutor): Pool that failed; ignored if it was already replaced
+            inline (bool): Stop using worker processes for good
+        """
+        with self._lock:
+            if inline:
+                self.max_workers = 0
+            if executor is not None and self._executor is executor:
+                self._executor = None
+                executor.shutdown(wait=False, cancel_futures=True)
+
+    def render(self, render, *args):
+        """
+        Return a chart's rendered output, rendering it only on a cache miss
+
+        Args:
+            render (callable): Module-level render function (must be picklable)
+            *args: Render inputs
+
+        Returns:
+            The render function's output
+        """
+        key = chart_key(render, *args)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+
+        failure = None
+        with self._lock:
+            # Pending renders remember their pool, so whoever sees it break can discard it
+            future, pool = self._pending.get(key, (None, None))
+            owner = future is None
+            if owner:
+                try:
+                    pool = self._pool()
+                    future = pool.submit(render, *args) if pool is not None else None
+                except Exception as e:
+                    failure, future = e, None
+                if future is not None:
+                    self._pending[key] = (future, pool)
+
+        if failure is not None:
+            if isinstance(failure, BrokenProcessPool):
+                print(f"Chart workers died, restarting them on the next render: {failure}")
+                self._discard_pool(pool)
+            else:
+                print(f"Error starting chart workers, rendering inline: {failure}")
+                self._discard_pool(pool, inline=True)
+
+        if future is None:
+            result = render(*args)
+        else:
+            try:
+                result = future.result()
+            except BrokenProcessPool as e:
+                print(f"Chart worker died, rendering inline: {e}")
+                self._discard_pool(pool)
+                result = render(*args)
+            except Exception as e:
+                print(f"Error rendering chart in worker, rendering inline: {e}")
+                result = render(*args)
+            finally:
+                if owner:
+                    with self._lock:
+                        self._pending.pop(key, None)
+
+        self.cache.set(key, result)
+        return result
+
+    def shutdown(self):
+        """Stop the worker processes"""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+
+_chart_renderer = None
+_chart_renderer_lock = threading.Lock()
+
+
+def get_chart_renderer():
+    """Return the process-wide chart renderer"""
+    global _chart_renderer
+    with _chart_renderer_lock:
+        if _chart_renderer is None:
+            _chart_renderer = ChartRenderer()
+        return _chart_renderer
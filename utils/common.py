@@ -3,28 +3,158 @@ import pandas as pd
 import numpy as np
 from newsapi import NewsApiClient
 import os
-from datetime import datetime, timedelta
+import requests
+from concurrent.futures import ThreadPoolExecutor
+from utils.cache import TTLCache
+from utils.price_store import get_price_store
+from utils.indicators import compute_indicators
+from utils.reference_data import get_reference_index, record_from_info
+from utils.fundamentals import FundamentalSnapshot, get_fundamental_store, ratios_from_info
+from utils.news_store import get_news_store
 
-def fetch_stock_data(ticker, period="1y", interval="1d"):
+# Shared cache for yfinance Ticker objects and their .info payloads
+TICKER_CACHE_TTL = int(os.getenv("EQUIFOLIO_TICKER_CACHE_TTL", "900"))
+TICKER_CACHE_SIZE = int(os.getenv("EQUIFOLIO_TICKER_CACHE_SIZE", "512"))
+_ticker_cache = TTLCache(maxsize=TICKER_CACHE_SIZE, ttl=TICKER_CACHE_TTL)
+
+def get_ticker(ticker):
+    """
+    Return a memoized yfinance Ticker object
+    
+    Args:
+        ticker (str): Stock ticker symbol
+        
+    Returns:
+        yfinance.Ticker: Shared Ticker instance
+    """
+    return _ticker_cache.get_or_set(("ticker", ticker.upper()), lambda: yf.Ticker(ticker))
+
+def get_ticker_info(ticker):
+    """
+    Return the memoized yfinance .info payload for a ticker
+    
+    Empty payloads are not cached so a transient upstream failure is retried
+    on the next call.
+    
+    Args:
+        ticker (str): Stock ticker symbol
+        
+    Returns:
+        dict: Raw .info payload (shared, do not mutate)
+    """
+    return _ticker_cache.get_or_set(("info", ticker.upper()), lambda: get_ticker(ticker).info or None)
+
+def _download_history(ticker, interval, period=None, start=None):
     """
-    Fetch stock price data using yfinance
+    Download price bars from yfinance, either for a period or from a start date
+    
+    Args:
+        ticker (str): Stock ticker symbol
+        interval (str): Data interval
+        period (str): Time period to fetch data for
+        start (str): Start date (YYYY-MM-DD), takes precedence over period
+        
+    Returns:
+        pandas.DataFrame: Stock price data, or None if the download failed
+    """
+    try:
+        stock = get_ticker(ticker)
+        if start is not None:
+            return stock.history(start=start, interval=interval)
+        return stock.history(period=period, interval=interval)
+    except Exception as e:
+        print(f"Error fetching stock data: {e}")
+        return None
+
+def fetch_stock_data(ticker, period="1y", interval="1d", use_store=True):
+    """
+    Fetch stock price data, served from the local price store when possible
+    
+    Bars already on disk are read locally and only the missing tail is
+    downloaded from yfinance and appended to the store.
     
     Args:
         ticker (str): Stock ticker symbol
         period (str): Time period to fetch data for (1d, 5d, 1mo, 3mo, 6mo, 1y, 2y, 5y, 10y, ytd, max)
         interval (str): Data interval (1m, 2m, 5m, 15m, 30m, 60m, 90m, 1h, 1d, 5d, 1wk, 1mo, 3mo)
+        use_store (bool): Read through the local price store instead of always downloading
         
     Returns:
         pandas.DataFrame: Stock price data
     """
     try:
-        stock = yf.Ticker(ticker)
-        data = stock.history(period=period, interval=interval)
-        return data
+        store = get_price_store()
+        if use_store and store.supports(period):
+            return store.get(
+                ticker,
+                period,
+                interval,
+                lambda period=None, start=None: _download_history(ticker, interval, period=period, start=start)
+            )
+        return _download_history(ticker, interval, period=period)
     except Exception as e:
         print(f"Error fetching stock data: {e}")
         return None
 
+def fetch_stock_data_bulk(tickers, period="1y", interval="1d", max_workers=8):
+    """
+    Fetch stock price data for many tickers with bounded concurrency
+    
+    Args:
+        tickers (list): Stock ticker symbols
+        period (str): Time period to fetch data for
+        interval (str): Data interval
+        max_workers (int): Maximum number of concurrent downloads
+        
+    Returns:
+        dict: Ticker -> pandas.DataFrame (None for tickers that failed)
+    """
+    tickers = list(dict.fromkeys(tickers))
+    if not tickers:
+        return {}
+    
+    workers = max(1, min(max_workers, len(tickers)))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        frames = executor.map(lambda t: fetch_stock_data(t, period=period, interval=interval), tickers)
+        return dict(zip(tickers, frames))
+
+def fetch_price_panel(tickers, period="1y", interval="1d", field="Close", max_workers=8):
+    """
+    Fetch one price field for many tickers as an aligned panel
+    
+    Args:
+        tickers (list): Stock ticker symbols
+        period (str): Time period to fetch data for
+        interval (str): Data interval
+        field (str): Price column to extract (Open, High, Low, Close, Volume)
+        max_workers (int): Maximum number of concurrent downloads
+        
+    Returns:
+        pandas.DataFrame: Time x ticker panel on the union of all dates (NaN where a ticker has no bar)
+    """
+    stock_data = fetch_stock_data_bulk(tickers, period=period, interval=interval, max_workers=max_workers)
+    return build_price_panel(stock_data, field=field)
+
+def build_price_panel(stock_data, field="Close"):
+    """
+    Align one price field from several stock data frames into a panel
+    
+    Args:
+        stock_data (dict): Ticker -> pandas.DataFrame of price bars
+        field (str): Price column to extract
+        
+    Returns:
+        pandas.DataFrame: Time x ticker panel, columns in input order
+    """
+    columns = {
+        ticker: data[field]
+        for ticker, data in stock_data.items()
+        if data is not None and not data.empty and field in data
+    }
+    if not columns:
+        return pd.DataFrame()
+    return pd.DataFrame(columns).sort_index()
+
 def fetch_company_info(ticker):
     """
     Fetch company information using yfinance
@@ -36,13 +166,40 @@ def fetch_company_info(ticker):
         dict: Company information
     """
     try:
-        stock = yf.Ticker(ticker)
-        info = stock.info
-        return info
+        info = get_ticker_info(ticker)
+        return dict(info) if info else None
     except Exception as e:
         print(f"Error fetching company info: {e}")
         return None
 
+def fetch_reference_record(ticker):
+    """
+    Fetch a ticker's reference record (name, sector, industry, exchange, currency) upstream
+    
+    Args:
+        ticker (str): Stock ticker symbol
+        
+    Returns:
+        dict: Reference record, fields are None where unknown
+    """
+    return record_from_info(get_ticker_info(ticker))
+
+def fetch_reference_data(tickers):
+    """
+    Look up reference data for many tickers through the local reference index
+    
+    Known tickers are answered from the index without any upstream call;
+    unknown ones are fetched concurrently and stored, stale ones are
+    refreshed in the background.
+    
+    Args:
+        tickers (list): Stock ticker symbols
+        
+    Returns:
+        dict: ticker -> {name, sector, industry, exchange, currency}
+    """
+    return get_reference_index().lookup(tickers, fetch=fetch_reference_record)
+
 def fetch_financial_data(ticker):
     """
     Fetch financial statements using yfinance
@@ -54,7 +211,7 @@ def fetch_financial_data(ticker):
         tuple: (income_statement, balance_sheet, cash_flow)
     """
     try:
-        stock = yf.Ticker(ticker)
+        stock = get_ticker(ticker)
         income_stmt = stock.income_stmt
         balance_sheet = stock.balance_sheet
         cash_flow = stock.cashflow
@@ -63,87 +220,186 @@ def fetch_financial_data(ticker):
         print(f"Error fetching financial data: {e}")
         return None, None, None
 
-def fetch_news_articles(ticker, days_back=7):
+def _download_fundamentals(ticker):
+    """Fetch info and annual statements from one shared Ticker as a FundamentalSnapshot"""
+    try:
+        stock = get_ticker(ticker)
+        info = get_ticker_info(ticker)
+        if not info:
+            return None
+        snapshot = FundamentalSnapshot(
+            ticker,
+            dict(info),
+            income_statement=stock.income_stmt,
+            balance_sheet=stock.balance_sheet,
+            cash_flow=stock.cashflow
+        )
+        # The info payload is already here, so keep the reference index current for free
+        get_reference_index().upsert({ticker: record_from_info(info)})
+        return snapshot
+    except Exception as e:
+        print(f"Error fetching fundamentals: {e}")
+        return None
+
+def fetch_fundamental_snapshot(ticker):
     """
-    Fetch news articles related to a stock ticker
+    Fetch company info, ratios and financial statements as one snapshot
+    
+    Statements are stored per fiscal period and only fetched again once a
+    newer period could have been reported. The price-driven info payload is
+    read through the short-TTL ticker cache on every call; the stored copy
+    is only used when upstream is unavailable.
     
     Args:
         ticker (str): Stock ticker symbol
-        days_back (int): Number of days to look back for news
         
     Returns:
-        list: News articles
+        FundamentalSnapshot: Latest snapshot, or None if unavailable
     """
+    snapshot = get_fundamental_store().get(ticker, _download_fundamentals)
+    if snapshot is None:
+        return None
     try:
-        # Initialize NewsAPI client
-        newsapi = NewsApiClient(api_key=os.getenv("NEWSAPI_KEY"))
+        info = get_ticker_info(ticker)
+        if info:
+            snapshot.refresh_info(info)
+    except Exception as e:
+        print(f"Error refreshing company info: {e}")
+    return snapshot
+
+def fetch_fundamental_snapshots(tickers, max_workers=8):
+    """
+    Fetch fundamental snapshots for many tickers with bounded concurrency
+    
+    Args:
+        tickers (list): Stock ticker symbols
+        max_workers (int): Maximum number of concurrent fetches
         
-        # Calculate date range
-        end_date = datetime.now()
-        start_date = end_date - timedelta(days=days_back)
+    Returns:
+        dict: Ticker -> FundamentalSnapshot (None for tickers that failed)
+    """
+    tickers = list(dict.fromkeys(tickers))
+    if not tickers:
+        return {}
+    
+    workers = max(1, min(max_workers, len(tickers)))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return dict(zip(tickers, executor.map(fetch_fundamental_snapshot, tickers)))
+
+_newsapi_client = None
+
+def get_newsapi_client():
+    """
+    Return the process-wide NewsAPI client
+    
+    The client is backed by one requests.Session so calls reuse a keep-alive
+    connection pool instead of opening a new TLS connection each time.
+    
+    Returns:
+        NewsApiClient: Shared client
+    """
+    global _newsapi_client
+    if _newsapi_client is None:
+        _newsapi_client = NewsApiClient(api_key=os.getenv("NEWSAPI_KEY"), session=requests.Session())
+    return _newsapi_client
+
+# NewsAPI page size (its maximum) and the most pages read per sync
+NEWS_PAGE_SIZE = 100
+NEWS_MAX_PAGES = int(os.getenv("NEWS_MAX_PAGES", "5"))
+
+def _download_news(ticker, since, company_name=None, until=None):
+    """
+    Fetch articles published between ``since`` and ``until`` from NewsAPI, newest first
+    
+    Pages through the results until they reach ``since``, at most
+    NEWS_MAX_PAGES pages.
+    
+    Args:
+        ticker (str): Stock ticker symbol
+        since (pd.Timestamp): Earliest publication time (UTC)
+        company_name (str): Company name for the query, looked up in the reference index when None
+        until (pd.Timestamp): Latest publication time (UTC), defaults to now
         
-        # Format dates for NewsAPI
-        from_date = start_date.strftime("%Y-%m-%d")
-        to_date = end_date.strftime("%Y-%m-%d")
+    Returns:
+        tuple: (articles, complete) with complete False if older matching articles were not
+            fetched, or None if the first request failed
+    """
+    try:
+        # Shared NewsAPI client
+        newsapi = get_newsapi_client()
         
-        # Fetch news articles
-        company_info = fetch_company_info(ticker)
-        company_name = company_info.get('shortName', ticker) if company_info else ticker
+        # Company name for the query comes from the reference index unless the caller has it
+        if not company_name:
+            reference = fetch_reference_data([ticker]).get(ticker) or {}
+            company_name = reference.get('name') or ticker
         
         # Search by both ticker and company name for better results
-        articles = newsapi.get_everything(
-            q=f"{ticker} OR {company_name}",
-            from_param=from_date,
-            to=to_date,
-            language='en',
-            sort_by='relevancy',
-            page_size=20
-        )
+        query = {
+            "q": f"{ticker} OR {company_name}",
+            "from_param": since.strftime("%Y-%m-%dT%H:%M:%S"),
+            "language": 'en',
+            "sort_by": 'publishedAt',
+            "page_size": NEWS_PAGE_SIZE
+        }
+        if until is not None:
+            query["to"] = until.strftime("%Y-%m-%dT%H:%M:%S")
         
-        return articles.get('articles', [])
+        articles = []
+        for page in range(1, NEWS_MAX_PAGES + 1):
+            try:
+                response = newsapi.get_everything(page=page, **query)
+            except Exception as e:
+                if page == 1:
+                    raise
+                # e.g. the plan's result cap; what was fetched so far is still usable
+                print(f"Error fetching news page {page}: {e}")
+                return articles, False
+            batch = response.get('articles', [])
+            articles.extend(batch)
+            if len(batch) < NEWS_PAGE_SIZE or len(articles) >= response.get('totalResults', 0):
+                return articles, True
+        return articles, False
+    except Exception as e:
+        print(f"Error fetching news articles: {e}")
+        return None
+
+def fetch_news_articles(ticker, days_back=7, page_size=20, company_name=None):
+    """
+    Fetch news articles related to a stock ticker
+    
+    Articles come from the local news store; upstream is only asked for
+    articles published since the ticker's last sync, plus any older part of
+    the window a previous sync could not page back to.
+    
+    Args:
+        ticker (str): Stock ticker symbol
+        days_back (int): Number of days to look back for news
+        page_size (int): Maximum number of articles to return
+        company_name (str): Company name for the upstream query, looked up in the reference index when None
+        
+    Returns:
+        list: News articles, newest first
+    """
+    try:
+        articles = get_news_store().get(ticker, days_back, lambda since, until=None: _download_news(ticker, since, company_name, until))
+        return articles[:page_size]
     except Exception as e:
         print(f"Error fetching news articles: {e}")
         return []
 
-def calculate_technical_indicators(data):
+def calculate_technical_indicators(data, indicators=None, params=None):
     """
     Calculate common technical indicators
     
     Args:
         data (pd.DataFrame): Stock price data
+        indicators (list): Indicator names to compute (e.g. ['RSI', 'MACD', 'SMA_30']), defaults to the full set
+        params (dict): Window overrides, see utils.indicators.DEFAULT_PARAMS
         
     Returns:
         pd.DataFrame: Data with technical indicators
     """
-    df = data.copy()
-    
-    # Simple Moving Averages
-    df['SMA_20'] = df['Close'].rolling(window=20).mean()
-    df['SMA_50'] = df['Close'].rolling(window=50).mean()
-    df['SMA_200'] = df['Close'].rolling(window=200).mean()
-    
-    # Exponential Moving Averages
-    df['EMA_12'] = df['Close'].ewm(span=12, adjust=False).mean()
-    df['EMA_26'] = df['Close'].ewm(span=26, adjust=False).mean()
-    
-    # MACD
-    df['MACD'] = df['EMA_12'] - df['EMA_26']
-    df['MACD_Signal'] = df['MACD'].ewm(span=9, adjust=False).mean()
-    
-    # Relative Strength Index (RSI)
-    delta = df['Close'].diff()
-    gain = delta.where(delta > 0, 0).rolling(window=14).mean()
-    loss = -delta.where(delta < 0, 0).rolling(window=14).mean()
-    rs = gain / loss
-    df['RSI'] = 100 - (100 / (1 + rs))
-    
-    # Bollinger Bands
-    df['BB_Middle'] = df['Close'].rolling(window=20).mean()
-    std_dev = df['Close'].rolling(window=20).std()
-    df['BB_Upper'] = df['BB_Middle'] + (std_dev * 2)
-    df['BB_Lower'] = df['BB_Middle'] - (std_dev * 2)
-    
-    return df
+    return compute_indicators(data, indicators, params)
 
 def calculate_fundamental_ratios(ticker):
     """
@@ -156,40 +412,7 @@ def calculate_fundamental_ratios(ticker):
         dict: Financial ratios
     """
     try:
-        stock = yf.Ticker(ticker)
-        info = stock.info
-        
-        ratios = {}
-        
-        # Price ratios
-        ratios['P/E'] = info.get('trailingPE', None)
-        ratios['Forward P/E'] = info.get('forwardPE', None)
-        ratios['P/S'] = info.get('priceToSalesTrailing12Months', None)
-        ratios['P/B'] = info.get('priceToBook', None)
-        
-        # Growth rates
-        ratios['Revenue Growth (YoY)'] = info.get('revenueGrowth', None)
-        ratios['Earnings Growth (YoY)'] = info.get('earningsGrowth', None)
-        
-        # Profitability ratios
-        ratios['Profit Margin'] = info.get('profitMargins', None)
-        ratios['Operating Margin'] = info.get('operatingMargins', None)
-        ratios['ROE'] = info.get('returnOnEquity', None)
-        ratios['ROA'] = info.get('returnOnAssets', None)
-        
-        # Dividend metrics
-        ratios['Dividend Yield'] = info.get('dividendYield', None)
-        ratios['Dividend Rate'] = info.get('dividendRate', None)
-        ratios['Payout Ratio'] = info.get('payoutRatio', None)
-        
-        # Debt metrics
-        ratios['Debt to Equity'] = info.get('debtToEquity', None)
-        ratios['Current Ratio'] = info.get('currentRatio', None)
-        
-        # Filter out None values
-        ratios = {k: v for k, v in ratios.items() if v is not None}
-        
-        return ratios
+        return ratios_from_info(get_ticker_info(ticker))
     except Exception as e:
         print(f"Error calculating fundamental ratios: {e}")
         return {} 
\ No newline at end of file
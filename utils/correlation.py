@@ -0,0 +1,200 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+# Rows of the correlation matrix computed per block
+CORRELATION_BLOCK_SIZE = int(os.getenv("CORRELATION_BLOCK_SIZE", "512"))
+
+# Universes larger than this are computed in float32
+CORRELATION_FLOAT32_MIN_TICKERS = int(os.getenv("CORRELATION_FLOAT32_MIN_TICKERS", "256"))
+
+# Number of most/least correlated pairs kept in the digest
+CORRELATION_TOP_K = int(os.getenv("CORRELATION_TOP_K", "10"))
+
+
+def _block_correlations(values, valid, rows, full_mask):
+    """
+    Pearson correlations of a block of columns against every column
+
+    With missing data each pair uses the observations both tickers have, like
+    ``DataFrame.corr``; the pairwise sums come from a handful of matrix
+    products so the block is still computed in one vectorized step.
+    """
+    block = values[:, rows]
+    if full_mask:
+        # Columns are standardized, so correlations are plain dot products
+        return block.T @ values / (values.shape[0] - 1)
+
+    block_valid = valid[:, rows]
+    count = block_valid.T @ valid
+    sum_x = block.T @ valid
+    sum_y = block_valid.T @ values
+    sum_xx = (block * block).T @ valid
+    sum_yy = block_valid.T @ (values * values)
+    sum_xy = block.T @ values
+    with np.errstate(divide='ignore', invalid='ignore'):
+        covariance = sum_xy - sum_x * sum_y / count
+        variance_x = sum_xx - sum_x * sum_x / count
+        variance_y = sum_yy - sum_y * sum_y / count
+        corr = covariance / np.sqrt(variance_x * variance_y)
+    corr[(count < 2) | (variance_x <= 0) | (variance_y <= 0)] = np.nan
+    return corr
+
+
+def _merge_top(candidates, values, rows, cols, k, largest):
+    """Keep the k largest (or smallest) values among the running candidates and a new batch"""
+    values = np.concatenate([candidates[0], values])
+    rows = np.concatenate([candidates[1], rows])
+    cols = np.concatenate([candidates[2], cols])
+    if len(values) > k:
+        keys = -values if largest else values
+        keep = np.argpartition(keys, k - 1)[:k]
+        values, rows, cols = values[keep], rows[keep], cols[keep]
+    return values, rows, cols
+
+
+def _finite_or_none(value):
+    return None if value is None or not np.isfinite(value) else float(value)
+
+
+def correlation_summary(returns_df, top_k=None, include_matrix=False, block_size=None, dtype=None):
+    """
+    Summarize the correlation structure of a return panel without keeping the full matrix
+
+    The matrix is computed in row blocks; each block updates the running
+    top-k most and least correlated pairs, the per-ticker summaries and the
+    average pairwise correlation, and is then discarded unless the full matrix
+    is requested. Large universes are computed in float32.
+
+    Args:
+        returns_df (pd.DataFrame): Returns, one column per ticker
+        top_k (int): Number of most and least correlated pairs to keep
+        include_matrix (bool): Also return the full matrix as a DataFrame
+        block_size (int): Rows of the matrix computed at a time
+        dtype: Floating point type, defaults to float32 above CORRELATION_FLOAT32_MIN_TICKERS tickers
+
+    Returns:
+        dict: average_correlation, pair count, most/least correlated pairs,
+            per-ticker summaries and, if requested, the matrix
+    """
+    top_k = top_k or CORRELATION_TOP_K
+    block_size = block_size or CORRELATION_BLOCK_SIZE
+    tickers = [str(ticker) for ticker in returns_df.columns]
+    n = len(tickers)
+    if dtype is None:
+        dtype = np.float32 if n > CORRELATION_FLOAT32_MIN_TICKERS else np.float64
+
+    raw = returns_df.to_numpy(dtype=np.float64)
+    valid = ~np.isnan(raw)
+    full_mask = bool(valid.all())
+    with np.errstate(invalid='ignore', divide='ignore'):
+        counts = valid.sum(axis=0)
+        mean = np.where(valid, raw, 0.0).sum(axis=0) / np.maximum(counts, 1)
+        centered = np.where(valid, raw - mean, 0.0)
+        if full_mask:
+            std = np.sqrt((centered * centered).sum(axis=0) / max(len(raw) - 1, 1))
+            centered = np.where(std > 0, centered / np.where(std > 0, std, 1), np.nan)
+    values = centered.astype(dtype)
+    valid_values = valid.astype(dtype)
+
+    matrix = np.empty((n, n), dtype=dtype) if include_matrix else None
+    empty = (np.empty(0), np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64))
+    most, least = empty, empty
+    total, pairs = 0.0, 0
+    per_ticker = {}
+
+    for start in range(0, n, block_size):
+        rows = np.arange(start, min(start + block_size, n))
+        with np.errstate(invalid='ignore'):
+            corr = np.clip(_block_correlations(values, valid_values, rows, full_mask), -1, 1)
+        # Constant or empty series have no defined correlation, even with themselves
+        self_defined = np.isfinite(corr[np.arange(len(rows)), rows])
+        corr[np.arange(len(rows)), rows] = np.where(self_defined, 1.0, np.nan)
+        if matrix is not None:
+            matrix[rows] = corr
+
+        # Pairs above the diagonal, counted once
+        upper = (np.arange(n)[None, :] > rows[:, None]) & np.isfinite(corr)
+        pair_rows, pair_cols = np.nonzero(upper)
+        pair_values = corr[pair_rows, pair_cols].astype(np.float64)
+        pair_rows = rows[pair_rows]
+        total += pair_values.sum()
+        pairs += len(pair_values)
+        most = _merge_top(most, pair_values, pair_rows, pair_cols, top_k, largest=True)
+        least = _merge_top(least, pair_values, pair_rows, pair_cols, top_k, largest=False)
+
+        # Per-ticker summaries over every other ticker
+        others = corr.astype(np.float64)
+        others[np.arange(len(rows)), rows] = np.nan
+        finite = np.isfinite(others)
+        available = finite.any(axis=1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            averages = np.where(finite, others, 0.0).sum(axis=1) / finite.sum(axis=1)
+        highest = np.argmax(np.where(finite, others, -np.inf), axis=1)
+        lowest = np.argmin(np.where(finite, others, np.inf), axis=1)
+        for offset, row in enumerate(rows):
+            if not available[offset]:
+                per_ticker[tickers[row]] = {"average": None, "max_partner": None, "max": None, "min_partner": None, "min": None}
+                continue
+            per_ticker[tickers[row]] = {
+                "average": _finite_or_none(averages[offset]),
+                "max_partner": tickers[highest[offset]],
+                "max": float(others[offset, highest[offset]]),
+                "min_partner": tickers[lowest[offset]],
+                "min": float(others[offset, lowest[offset]])
+            }
+
+    def pair_list(candidates, largest):
+        order = np.argsort(-candidates[0] if largest else candidates[0], kind='stable')
+        return [
+            {"pair": [tickers[candidates[1][i]], tickers[candidates[2][i]]], "correlation": float(candidates[0][i])}
+            for i in order
+        ]
+
+    summary = {
+        "tickers": n,
+        "pairs": pairs,
+        "average_correlation": total / pairs if pairs else 0.0,
+        "most_correlated": pair_list(most, True),
+        "least_correlated": pair_list(least, False),
+        "per_ticker": per_ticker
+    }
+    if matrix is not None:
+        summary["matrix"] = pd.DataFrame(matrix.astype(np.float64), index=returns_df.columns, columns=returns_df.columns)
+    return summary
+
+
+def format_correlation_digest(summary, max_tickers=25):
+    """
+    Render a correlation summary as compact prompt text
+
+    Args:
+        summary (dict): Output of correlation_summary
+        max_tickers (int): Per-ticker lines to include, highest average correlation first
+
+    Returns:
+        str: Digest text whose size does not grow with the square of the universe
+    """
+    lines = [f"Average pairwise correlation: {summary['average_correlation']:.2f} across {summary['pairs']} pairs"]
+    if summary["most_correlated"]:
+        lines.append("Most correlated pairs:")
+        lines.extend(f"- {a}/{b}: {pair['correlation']:.2f}" for pair in summary["most_correlated"] for a, b in [pair["pair"]])
+    if summary["least_correlated"]:
+        lines.append("Least correlated pairs:")
+        lines.extend(f"- {a}/{b}: {pair['correlation']:.2f}" for pair in summary["least_correlated"] for a, b in [pair["pair"]])
+
+    ranked = sorted(
+        ((ticker, stats) for ticker, stats in summary["per_ticker"].items() if stats["average"] is not None),
+        key=lambda item: item[1]["average"],
+        reverse=True
+    )
+    if ranked:
+        shown = ranked[:max_tickers]
+        heading = "Per-ticker average correlation" if len(shown) == len(ranked) else f"Per-ticker average correlation (top {len(shown)} of {len(ranked)})"
+        lines.append(f"{heading}:")
+        lines.extend(
+            f"- {ticker}: avg {stats['average']:.2f}, highest with {stats['max_partner']} ({stats['max']:.2f}), lowest with {stats['min_partner']} ({stats['min']:.2f})"
+            for ticker, stats in shown
+        )
+    return "\n".join(lines)
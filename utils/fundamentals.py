@@ -0,0 +1,312 @@
+import os
+import json
+import threading
+from io import StringIO
+
+import pandas as pd
+
+from utils.price_store import DEFAULT_DATA_DIR
+
+# Financial statements kept in a snapshot, in prompt order
+STATEMENTS = ("income_statement", "balance_sheet", "cash_flow")
+
+# Months between fiscal periods of the stored (annual) statements
+FISCAL_PERIOD_MONTHS = int(os.getenv("FUNDAMENTAL_PERIOD_MONTHS", "12"))
+
+# Once a new period could exist, seconds between upstream checks until it appears
+FUNDAMENTAL_RECHECK_INTERVAL = float(os.getenv("FUNDAMENTAL_RECHECK_INTERVAL", "86400"))
+
+# Ratio label -> yfinance .info field
+RATIO_FIELDS = {
+    # Price ratios
+    "P/E": "trailingPE",
+    "Forward P/E": "forwardPE",
+    "P/S": "priceToSalesTrailing12Months",
+    "P/B": "priceToBook",
+    # Growth rates
+    "Revenue Growth (YoY)": "revenueGrowth",
+    "Earnings Growth (YoY)": "earningsGrowth",
+    # Profitability ratios
+    "Profit Margin": "profitMargins",
+    "Operating Margin": "operatingMargins",
+    "ROE": "returnOnEquity",
+    "ROA": "returnOnAssets",
+    # Dividend metrics
+    "Dividend Yield": "dividendYield",
+    "Dividend Rate": "dividendRate",
+    "Payout Ratio": "payoutRatio",
+    # Debt metrics
+    "Debt to Equity": "debtToEquity",
+    "Current Ratio": "currentRatio",
+}
+
+
+def ratios_from_info(info):
+    """
+    Fundamental ratios from a yfinance ``.info`` payload
+
+    Args:
+        info (dict): Ticker info, may be empty
+
+    Returns:
+        dict: Ratio label -> value, ratios the payload lacks are left out
+    """
+    info = info or {}
+    return {label: info[field] for label, field in RATIO_FIELDS.items() if info.get(field) is not None}
+
+
+def fiscal_period_of(income_statement, info):
+    """
+    Fiscal period end of the most recent statements
+
+    Args:
+        income_statement (pd.DataFrame): Statement with one column per period end
+        info (dict): Ticker info, ``lastFiscalYearEnd`` is used when there are no statements
+
+    Returns:
+        str: Period end as YYYY-MM-DD, or None if unknown
+    """
+    if income_statement is not None and not income_statement.empty:
+        try:
+            return pd.Timestamp(max(income_statement.columns)).strftime("%Y-%m-%d")
+        except (TypeError, ValueError):
+            pass
+    last_year_end = (info or {}).get("lastFiscalYearEnd")
+    if last_year_end:
+        return pd.Timestamp(last_year_end, unit="s").strftime("%Y-%m-%d")
+    return None
+
+
+class FundamentalSnapshot:
+    """
+    Company info and financial statements for one ticker and fiscal period.
+
+    Built from one coordinated fetch of a shared yfinance Ticker and
+    persisted by FundamentalStore, so everything a fundamental analysis
+    reads comes from the same point in time.
+    """
+
+    def __init__(self, ticker, info, income_statement=None, balance_sheet=None, cash_flow=None,
+                 fiscal_period=None, fetched_at=None, checked_at=None, info_as_of=None):
+        """
+        Initialize the snapshot
+
+        Args:
+            ticker (str): Stock ticker symbol
+            info (dict): yfinance ``.info`` payload
+            income_statement (pd.DataFrame): Annual income statement
+            balance_sheet (pd.DataFrame): Annual balance sheet
+            cash_flow (pd.DataFrame): Annual cash flow statement
+            fiscal_period (str): Period end of the statements, derived when omitted
+            fetched_at (str): ISO timestamp of the upstream fetch
+            checked_at (str): ISO timestamp of the last upstream check for a newer period
+            info_as_of (str): ISO timestamp of the info payload, defaults to fetched_at
+        """
+        self.ticker = ticker.upper()
+        self.info = info or {}
+        self.income_statement = income_statement
+        self.balance_sheet = balance_sheet
+        self.cash_flow = cash_flow
+        self.fiscal_period = fiscal_period or fiscal_period_of(income_statement, self.info)
+        self.fetched_at = fetched_at or pd.Timestamp.now(tz="UTC").isoformat()
+        self.checked_at = checked_at or self.fetched_at
+        self.info_as_of = info_as_of or self.fetched_at
+
+    def refresh_info(self, info):
+        """
+        Replace the info payload with a current one
+
+        Statements only change with the fiscal period, but the info payload
+        carries price-driven fields (price, market cap, P/E, dividend yield,
+        52-week range) that must not be served from the stored snapshot.
+
+        Args:
+            info (dict): Current yfinance ``.info`` payload
+        """
+        self.info = dict(info)
+        self.info_as_of = pd.Timestamp.now(tz="UTC").isoformat()
+
+    @property
+    def ratios(self):
+        """Fundamental ratios from the snapshot's info payload"""
+        return ratios_from_info(self.info)
+
+    @property
+    def statements(self):
+        """Statement name -> DataFrame (or None)"""
+        return {name: getattr(self, name) for name in STATEMENTS}
+
+    def next_period_due(self):
+        """
+        Earliest time a newer fiscal period could be reported
+
+        Returns:
+            pd.Timestamp: End of the following period (UTC), or None if the period is unknown
+        """
+        if self.fiscal_period is None:
+            return None
+        return pd.Timestamp(self.fiscal_period, tz="UTC") + pd.DateOffset(months=FISCAL_PERIOD_MONTHS)
+
+    def to_json(self):
+        """Serialize the snapshot to a JSON string"""
+        return json.dumps({
+            "ticker": self.ticker,
+            "fiscal_period": self.fiscal_period,
+            "fetched_at": self.fetched_at,
+            "checked_at": self.checked_at,
+            "info": self.info,
+            "statements": {
+                name: None if frame is None else frame.to_json(orient="split", date_format="iso")
+                for name, frame in self.statements.items()
+            }
+        }, default=str)
+
+    @classmethod
+    def from_json(cls, payload):
+        """Deserialize a snapshot written by to_json"""
+        raw = json.loads(payload)
+        statements = {}
+        for name in STATEMENTS:
+            frame = raw["statements"].get(name)
+            if frame is not None:
+                # Statement values are all float in yfinance; JSON would turn whole numbers into ints
+                frame = pd.read_json(StringIO(frame), orient="split").astype("float64")
+                if len(frame.columns):
+                    frame.columns = pd.to_datetime(frame.columns).tz_localize(None)
+            statements[name] = frame
+        return cls(
+            raw["ticker"], raw["info"],
+            fiscal_period=raw["fiscal_period"], fetched_at=raw["fetched_at"], checked_at=raw.get("checked_at"),
+            **statements
+        )
+
+
+class FundamentalStore:
+    """
+    On-disk snapshots, one JSON file per ticker and fiscal period.
+
+    The latest snapshot's statements are served without touching upstream
+    until a newer fiscal period could exist; from then on upstream is checked
+    at most once per ``recheck_interval`` until the new period shows up.
+    Older periods are kept on disk. The stored info payload is only a
+    fallback: callers refresh it through the short-lived ticker cache (see
+    FundamentalSnapshot.refresh_info).
+    """
+
+    def __init__(self, root=None, recheck_interval=None):
+        """
+        Initialize the fundamentals store
+
+        Args:
+            root (str): Directory for the store, defaults to <data dir>/fundamentals
+            recheck_interval (float): Seconds between checks once a new period is due
+        """
+        self.root = root or os.path.join(DEFAULT_DATA_DIR, "fundamentals")
+        self.recheck_interval = FUNDAMENTAL_RECHECK_INTERVAL if recheck_interval is None else recheck_interval
+        self.enabled = os.getenv("EQUIFOLIO_FUNDAMENTAL_STORE", "1") != "0"
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+
+    def _lock_for(self, ticker):
+        with self._locks_guard:
+            if ticker not in self._locks:
+                self._locks[ticker] = threading.Lock()
+            return self._locks[ticker]
+
+    def _directory(self, ticker):
+        return os.path.join(self.root, ticker.upper().replace("/", "_"))
+
+    def periods(self, ticker):
+        """Stored fiscal periods for a ticker, oldest first (a snapshot without a known period sorts first)"""
+        directory = self._directory(ticker)
+        if not os.path.isdir(directory):
+            return []
+        names = (name[:-5] for name in os.listdir(directory) if name.endswith(".json"))
+        return sorted(names, key=lambda name: (name != "unknown", name))
+
+    def load(self, ticker, fiscal_period=None):
+        """
+        Load a stored snapshot
+
+        Args:
+            ticker (str): Stock ticker symbol
+            fiscal_period (str): Period end (YYYY-MM-DD), defaults to the latest stored
+
+        Returns:
+            FundamentalSnapshot: Stored snapshot, or None
+        """
+        if fiscal_period is None:
+            periods = self.periods(ticker)
+            if not periods:
+                return None
+            fiscal_period = periods[-1]
+        path = os.path.join(self._directory(ticker), f"{fiscal_period}.json")
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path) as f:
+                return FundamentalSnapshot.from_json(f.read())
+        except Exception as e:
+            print(f"Error reading fundamentals store for {ticker}: {e}")
+            return None
+
+    def save(self, snapshot):
+        """
+        Atomically write a snapshot under its fiscal period
+
+        Args:
+            snapshot (FundamentalSnapshot): Snapshot to store
+        """
+        directory = self._directory(snapshot.ticker)
+        path = os.path.join(directory, f"{snapshot.fiscal_period or 'unknown'}.json")
+        os.makedirs(directory, exist_ok=True)
+        try:
+            with open(path + ".tmp", "w") as f:
+                f.write(snapshot.to_json())
+            os.replace(path + ".tmp", path)
+        except Exception as e:
+            print(f"Error writing fundamentals store for {snapshot.ticker}: {e}")
+
+    def _is_current(self, snapshot, now):
+        due = snapshot.next_period_due()
+        if due is not None and now < due:
+            return True
+        checked_at = pd.Timestamp(snapshot.checked_at)
+        return (now - checked_at).total_seconds() < self.recheck_interval
+
+    def get(self, ticker, fetch):
+        """
+        Return the latest snapshot, fetching only when a newer period could exist
+
+        Args:
+            ticker (str): Stock ticker symbol
+            fetch (callable): ``fetch(ticker)`` returning a FundamentalSnapshot or None
+
+        Returns:
+            FundamentalSnapshot: Latest snapshot, or None if nothing is stored and the fetch failed
+        """
+        if not self.enabled:
+            return fetch(ticker)
+
+        now = pd.Timestamp.now(tz="UTC")
+        with self._lock_for(ticker.upper()):
+            stored = self.load(ticker)
+            if stored is not None and self._is_current(stored, now):
+                return stored
+
+            fresh = fetch(ticker)
+            if fresh is None or not fresh.info:
+                # Upstream unavailable: serve what we have
+                return stored
+
+            # Same period: the file is overwritten with the refreshed payload and check time
+            self.save(fresh)
+            return fresh
+
+
+_fundamental_store = FundamentalStore()
+
+
+def get_fundamental_store():
+    """Return the process-wide fundamentals store"""
+    return _fundamental_store
@@ -0,0 +1,530 @@
+import math
+import inspect
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+# Columns produced by calculate_technical_indicators, in order
+INDICATOR_COLUMNS = [
+    'SMA_20', 'SMA_50', 'SMA_200',
+    'EMA_12', 'EMA_26',
+    'MACD', 'MACD_Signal',
+    'RSI',
+    'BB_Middle', 'BB_Upper', 'BB_Lower'
+]
+
+
+# Default windows for the indicators whose names carry no window
+DEFAULT_PARAMS = {
+    'rsi_window': 14,
+    'macd_fast': 12,
+    'macd_slow': 26,
+    'macd_signal': 9,
+    'bb_window': 20,
+    'bb_std': 2
+}
+
+# Indicator name (or family for windowed names like SMA_<n>) -> compute function
+INDICATORS = {}
+
+
+def register_indicator(name):
+    """
+    Register an indicator compute function
+
+    The function receives an IndicatorContext (and the window for families
+    such as ``SMA``, requested as ``SMA_<window>``) and returns a Series.
+    Dependencies are requested through ``context.get`` so they are resolved
+    on demand and computed once per frame.
+
+    Args:
+        name (str): Indicator name or windowed family prefix
+    """
+    def decorator(func):
+        INDICATORS[name] = func
+        return func
+    return decorator
+
+
+def _requires_window(func):
+    """Whether a registered compute function is a windowed family that cannot run without a window"""
+    parameters = list(inspect.signature(func).parameters.values())[1:]
+    return any(parameter.default is inspect.Parameter.empty for parameter in parameters)
+
+
+class IndicatorContext:
+    """
+    Memo of indicators and shared intermediates for one price frame.
+
+    Every value requested through ``get`` is computed at most once, so
+    indicators that share inputs (Bollinger Bands and SMA_20, MACD and the
+    EMAs, every RSI window and the price deltas) reuse each other's work.
+    """
+
+    def __init__(self, data, params=None):
+        """
+        Initialize the context
+
+        Args:
+            data (pd.DataFrame or pd.Series): Price data with a 'Close' column, or a close series
+            params (dict): Overrides for DEFAULT_PARAMS
+        """
+        self.close = data['Close'] if isinstance(data, pd.DataFrame) else data
+        self.params = {**DEFAULT_PARAMS, **(params or {})}
+        self._memo = {}
+
+    def get(self, name):
+        """
+        Return an indicator, computing it and its dependencies if needed
+
+        Args:
+            name (str): Indicator name, e.g. 'RSI', 'MACD' or 'SMA_30'
+
+        Returns:
+            pd.Series: Indicator values aligned with the frame
+        """
+        if name not in self._memo:
+            if name in INDICATORS:
+                if _requires_window(INDICATORS[name]):
+                    raise ValueError(f"Indicator {name} needs a window, e.g. {name}_20")
+                self._memo[name] = INDICATORS[name](self)
+            else:
+                family, _, window = name.rpartition('_')
+                if family not in INDICATORS or not window.isdigit():
+                    raise ValueError(f"Unknown indicator: {name}")
+                self._memo[name] = INDICATORS[family](self, int(window))
+        return self._memo[name]
+
+    def rolling(self, window):
+        """Shared rolling window over the closes"""
+        key = ('rolling', window)
+        if key not in self._memo:
+            self._memo[key] = self.close.rolling(window=window)
+        return self._memo[key]
+
+    def delta(self):
+        """Bar-to-bar change of the close"""
+        if 'delta' not in self._memo:
+            self._memo['delta'] = self.close.diff()
+        return self._memo['delta']
+
+
+@register_indicator('SMA')
+def _sma(context, window):
+    return context.rolling(window).mean()
+
+
+@register_indicator('STD')
+def _std(context, window):
+    return context.rolling(window).std()
+
+
+@register_indicator('EMA')
+def _ema(context, span):
+    return context.close.ewm(span=span, adjust=False).mean()
+
+
+@register_indicator('RSI')
+def _rsi(context, window=None):
+    if window is None:
+        return context.get(f"RSI_{context.params['rsi_window']}")
+    delta = context.delta()
+    gain = delta.where(delta > 0, 0).rolling(window=window).mean()
+    loss = -delta.where(delta < 0, 0).rolling(window=window).mean()
+    rs = gain / loss
+    return 100 - (100 / (1 + rs))
+
+
+@register_indicator('MACD')
+def _macd(context):
+    params = context.params
+    return context.get(f"EMA_{params['macd_fast']}") - context.get(f"EMA_{params['macd_slow']}")
+
+
+@register_indicator('MACD_Signal')
+def _macd_signal(context):
+    return context.get('MACD').ewm(span=context.params['macd_signal'], adjust=False).mean()
+
+
+@register_indicator('BB_Middle')
+def _bb_middle(context):
+    return context.get(f"SMA_{context.params['bb_window']}")
+
+
+@register_indicator('BB_Upper')
+def _bb_upper(context):
+    params = context.params
+    return context.get('BB_Middle') + context.get(f"STD_{params['bb_window']}") * params['bb_std']
+
+
+@register_indicator('BB_Lower')
+def _bb_lower(context):
+    params = context.params
+    return context.get('BB_Middle') - context.get(f"STD_{params['bb_window']}") * params['bb_std']
+
+
+def compute_indicators(data, indicators=None, params=None):
+    """
+    Add the requested indicators to a copy of a price frame
+
+    Only the requested columns and their dependencies are computed.
+
+    Args:
+        data (pd.DataFrame): Stock price data with a 'Close' column
+        indicators (list): Indicator names, defaults to INDICATOR_COLUMNS
+        params (dict): Overrides for DEFAULT_PARAMS
+
+    Returns:
+        pd.DataFrame: Data with the requested indicator columns
+    """
+    context = IndicatorContext(data, params)
+    df = data.copy()
+    for name in (INDICATOR_COLUMNS if indicators is None else indicators):
+        df[name] = context.get(name)
+    return df
+
+
+class RollingWindow:
+    """
+    Fixed-size window with running sum and sum of squares.
+
+    Values are stored relative to a shift (the window mean at the last resync)
+    so the variance does not suffer from cancellation at typical price levels.
+    The sums are re-computed exactly from the window once per ``size``
+    updates, which keeps the amortized cost O(1) while stopping floating-point
+    drift.
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self.values = deque(maxlen=size)
+        self.shift = None
+        self.total = 0.0
+        self.total_sq = 0.0
+        self.nonzero = 0
+        self.same_run = 0
+        self._previous_run = 0
+        self._updates = 0
+
+    def push(self, value):
+        """Append a value, evicting the oldest once the window is full"""
+        if self.shift is None:
+            self.shift = value
+        if len(self.values) == self.size:
+            evicted = self.values[0]
+            self.nonzero -= evicted != 0
+            old = evicted - self.shift
+            self.total -= old
+            self.total_sq -= old * old
+        self.nonzero += value != 0
+        self._previous_run = self.same_run
+        self.same_run = self.same_run + 1 if self.values and self.values[-1] == value else 1
+        self.values.append(value)
+        centered = value - self.shift
+        self.total += centered
+        self.total_sq += centered * centered
+        self._tick()
+
+    def replace_last(self, value):
+        """Overwrite the most recent value (e.g. a still-forming intraday bar)"""
+        self.nonzero += (value != 0) - (self.values[-1] != 0)
+        if len(self.values) > 1 and self.values[-2] == value:
+            self.same_run = self._previous_run + 1
+        else:
+            self.same_run = 1
+        old = self.values[-1] - self.shift
+        self.values[-1] = value
+        centered = value - self.shift
+        self.total += centered - old
+        self.total_sq += centered * centered - old * old
+        self._tick()
+
+    def _tick(self):
+        self._updates += 1
+        if self._updates % self.size == 0:
+            self.shift = sum(self.values) / len(self.values)
+            centered = [v - self.shift for v in self.values]
+            self.total = sum(centered)
+            self.total_sq = sum(c * c for c in centered)
+
+    @property
+    def full(self):
+        return len(self.values) == self.size
+
+    def mean(self):
+        """Window mean, NaN until the window is full"""
+        if not self.full:
+            return math.nan
+        if self.nonzero == 0:
+            # Exact zero for an all-zero window, which rounding in the running sum would miss
+            return 0.0
+        return self.shift + self.total / self.size
+
+    def std(self):
+        """Sample standard deviation (ddof=1), NaN until the window is full"""
+        if not self.full or self.size < 2:
+            return math.nan
+        if self.same_run >= self.size:
+            return 0.0
+        variance = (self.total_sq - self.total * self.total / self.size) / (self.size - 1)
+        return math.sqrt(max(variance, 0.0))
+
+
+class EMA:
+    """
+    Exponential moving average equivalent to ``ewm(span=span, adjust=False).mean()``
+    """
+
+    def __init__(self, span):
+        self.alpha = 2.0 / (span + 1.0)
+        self.value = math.nan
+        self.previous = math.nan
+
+    def push(self, x):
+        self.previous = self.value
+        self.value = x if math.isnan(self.value) else self.alpha * x + (1 - self.alpha) * self.value
+        return self.value
+
+    def replace_last(self, x):
+        self.value = self.previous
+        return self.push(x)
+
+
+class IndicatorEngine:
+    """
+    Online version of calculate_technical_indicators for a single ticker.
+
+    The engine carries the running state of every indicator (EMA values,
+    rolling sums and sums of squares, RSI gain/loss windows) so each new bar
+    updates all of them in O(1). Feeding the same closes produces the same
+    values as the batch function, up to floating-point rounding.
+
+    Usage:
+        engine = IndicatorEngine.from_frame(history)
+        latest = engine.update(new_close)
+    """
+
+    def __init__(self):
+        self.sma = {20: RollingWindow(20), 50: RollingWindow(50), 200: RollingWindow(200)}
+        self.ema_12 = EMA(12)
+        self.ema_26 = EMA(26)
+        self.macd_signal = EMA(9)
+        self.gains = RollingWindow(14)
+        self.losses = RollingWindow(14)
+        self.close = math.nan
+        self.previous_close = math.nan
+        self.bars = 0
+        self.values = dict.fromkeys(INDICATOR_COLUMNS, math.nan)
+
+    @classmethod
+    def from_frame(cls, data):
+        """
+        Build an engine and replay a price history through it
+
+        Args:
+            data (pd.DataFrame or pd.Series): Price data with a 'Close' column, or a close series
+
+        Returns:
+            IndicatorEngine: Engine positioned at the last bar
+        """
+        engine = cls()
+        closes = data['Close'] if isinstance(data, pd.DataFrame) else data
+        for close in closes.to_numpy(dtype=float):
+            engine.update(close)
+        return engine
+
+    def update(self, close, replace_last=False):
+        """
+        Advance all indicators by one bar
+
+        Args:
+            close (float): Closing price of the new bar
+            replace_last (bool): Revise the most recent bar instead of appending (for bars still forming)
+
+        Returns:
+            dict: Indicator values after the update, keyed like calculate_technical_indicators columns
+        """
+        close = float(close)
+        if replace_last and self.bars:
+            # delta is taken against the close before the bar being revised
+            delta = close - self.previous_close if self.bars > 1 else math.nan
+            for window in self.sma.values():
+                window.replace_last(close)
+            self.ema_12.replace_last(close)
+            self.ema_26.replace_last(close)
+            push = "replace_last"
+        else:
+            self.previous_close = self.close
+            delta = close - self.previous_close if self.bars else math.nan
+            for window in self.sma.values():
+                window.push(close)
+            self.ema_12.push(close)
+            self.ema_26.push(close)
+            self.bars += 1
+            push = "push"
+        self.close = close
+
+        # Matches delta.where(delta > 0, 0): the undefined first delta counts as zero
+        gain = delta if delta > 0 else 0.0
+        loss = -delta if delta < 0 else 0.0
+        getattr(self.gains, push)(gain)
+        getattr(self.losses, push)(loss)
+
+        macd = self.ema_12.value - self.ema_26.value
+        getattr(self.macd_signal, push)(macd)
+
+        sma_20 = self.sma[20].mean()
+        std_20 = self.sma[20].std()
+
+        self.values = {
+            'SMA_20': sma_20,
+            'SMA_50': self.sma[50].mean(),
+            'SMA_200': self.sma[200].mean(),
+            'EMA_12': self.ema_12.value,
+            'EMA_26': self.ema_26.value,
+            'MACD': macd,
+            'MACD_Signal': self.macd_signal.value,
+            'RSI': self._rsi(self.gains.mean(), self.losses.mean()),
+            'BB_Middle': sma_20,
+            'BB_Upper': sma_20 + std_20 * 2,
+            'BB_Lower': sma_20 - std_20 * 2
+        }
+        return dict(self.values)
+
+    @staticmethod
+    def _rsi(avg_gain, avg_loss):
+        # Same edge cases as 100 - 100 / (1 + gain / loss) in pandas
+        if math.isnan(avg_gain) or math.isnan(avg_loss) or (avg_gain == 0 and avg_loss == 0):
+            return math.nan
+        if avg_loss == 0:
+            return 100.0
+        return 100 - (100 / (1 + avg_gain / avg_loss))
+
+
+def _rolling_mean_panel(values, valid, window):
+    """
+    Rolling mean down the time axis of a panel using prefix sums
+
+    Windows containing any invalid cell are NaN, mirroring pandas' default
+    ``min_periods=window``.
+
+    Args:
+        values (np.ndarray): T x N values with invalid cells set to 0
+        valid (np.ndarray): T x N boolean mask of valid cells
+        window (int): Window length
+
+    Returns:
+        np.ndarray: T x N rolling means
+    """
+    rows, cols = values.shape
+    out = np.full((rows, cols), np.nan)
+    if rows < window:
+        return out
+    sums = np.cumsum(np.vstack([np.zeros((1, cols)), values]), axis=0)
+    counts = np.cumsum(np.vstack([np.zeros((1, cols), dtype=np.int64), valid]), axis=0)
+    window_sums = sums[window:] - sums[:-window]
+    window_counts = counts[window:] - counts[:-window]
+    out[window - 1:] = np.where(window_counts == window, window_sums / window, np.nan)
+    return out
+
+
+def _ema_panel(values, span):
+    """
+    Column-wise ``ewm(span=span, adjust=False).mean()`` in one pass over time
+
+    Follows pandas' handling of missing values (``ignore_na=False``): a gap
+    decays the weight of the running average before the next observation.
+
+    Args:
+        values (np.ndarray): T x N values, NaN for missing
+        span (int): EMA span
+
+    Returns:
+        np.ndarray: T x N EMA values (carried forward through gaps)
+    """
+    alpha = 2.0 / (span + 1.0)
+    rows, cols = values.shape
+    out = np.empty((rows, cols))
+    weighted = np.full(cols, np.nan)
+    old_weight = np.ones(cols)
+    for t in range(rows):
+        current = values[t]
+        observed = ~np.isnan(current)
+        started = ~np.isnan(weighted)
+        old_weight = np.where(started, old_weight * (1 - alpha), old_weight)
+        update = started & observed
+        weighted = np.where(
+            update,
+            (old_weight * weighted + alpha * current) / (old_weight + alpha),
+            np.where(~started & observed, current, weighted)
+        )
+        old_weight = np.where(observed, 1.0, old_weight)
+        out[t] = weighted
+    return out
+
+
+def calculate_technical_indicators_panel(closes):
+    """
+    Calculate the technical indicators for many tickers in one vectorized pass
+
+    Each column gives the same values calculate_technical_indicators would
+    produce on that ticker's own history. Ragged histories are supported:
+    leading/trailing NaNs mark where a ticker has no data and produce NaN
+    outputs. Interior NaNs are treated as missing bars, so any rolling window
+    spanning one is NaN and the EMAs decay across the gap.
+
+    Args:
+        closes (np.ndarray or pd.DataFrame): T x N closing prices (time x ticker)
+
+    Returns:
+        dict: Indicator name -> T x N array (DataFrames with the input's index/columns if a DataFrame was given)
+    """
+    frame = closes if isinstance(closes, pd.DataFrame) else None
+    close = np.asarray(closes, dtype=float)
+    if close.ndim == 1:
+        close = close[:, None]
+    valid = ~np.isnan(close)
+
+    # Work relative to each column's mean so prefix sums stay small
+    counts = valid.sum(axis=0)
+    reference = np.where(valid, close, 0.0).sum(axis=0) / np.maximum(counts, 1)
+    centered = np.where(valid, close - reference, 0.0)
+
+    results = {}
+    for window in (20, 50, 200):
+        results[f'SMA_{window}'] = reference + _rolling_mean_panel(centered, valid, window)
+
+    ema_12 = _ema_panel(close, 12)
+    ema_26 = _ema_panel(close, 26)
+    macd = np.where(valid, ema_12 - ema_26, np.nan)
+    results['EMA_12'] = ema_12
+    results['EMA_26'] = ema_26
+    results['MACD'] = macd
+    results['MACD_Signal'] = _ema_panel(macd, 9)
+
+    # RSI: the undefined first delta of each run of data counts as zero, as in the batch function
+    delta = np.full(close.shape, np.nan)
+    delta[1:] = close[1:] - close[:-1]
+    delta = np.nan_to_num(delta)
+    gain = _rolling_mean_panel(np.where(valid & (delta > 0), delta, 0.0), valid, 14)
+    loss = _rolling_mean_panel(np.where(valid & (delta < 0), -delta, 0.0), valid, 14)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        results['RSI'] = 100 - (100 / (1 + gain / loss))
+
+    # Bollinger Bands share the 20-bar mean and derive the std from the sum of squares
+    mean_sq = _rolling_mean_panel(centered * centered, valid, 20)
+    mean_20 = results['SMA_20'] - reference
+    variance = np.maximum(mean_sq - mean_20 * mean_20, 0.0) * 20 / 19
+    std_dev = np.sqrt(variance)
+    results['BB_Middle'] = results['SMA_20']
+    results['BB_Upper'] = results['SMA_20'] + std_dev * 2
+    results['BB_Lower'] = results['SMA_20'] - std_dev * 2
+
+    # No indicator values where the ticker has no bar
+    results = {name: np.where(valid, values, np.nan) for name, values in results.items()}
+    results = {name: results[name] for name in INDICATOR_COLUMNS}
+
+    if frame is not None:
+        return {name: pd.DataFrame(values, index=frame.index, columns=frame.columns) for name, values in results.items()}
+    return results
@@ -0,0 +1,263 @@
+import os
+import json
+import asyncio
+import time
+import sqlite3
+import hashlib
+import threading
+
+from utils.price_store import DEFAULT_DATA_DIR
+
+# LLM parameters that change the completion and therefore belong in the cache key
+KEY_PARAMS = ("temperature", "max_tokens", "top_p", "top_k", "stop_sequences")
+
+
+class LLMCache:
+    """
+    Persistent content-addressed cache of LLM completions backed by SQLite.
+
+    Entries are keyed on a hash of the rendered prompt, the model name and the
+    sampling parameters, so identical requests from any agent or user share a
+    completion. Time-to-live is decided by the reader, which lets each agent
+    apply its own freshness policy to the same store.
+    """
+
+    def __init__(self, path=None):
+        """
+        Initialize the cache
+
+        Args:
+            path (str): SQLite database file, defaults to <data dir>/llm_cache.sqlite
+        """
+        self.path = path or os.path.join(DEFAULT_DATA_DIR, "llm_cache.sqlite")
+        self.enabled = os.getenv("EQUIFOLIO_LLM_CACHE", "1") != "0"
+        self.hits = {}
+        self.misses = {}
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _connection(self):
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    namespace TEXT,
+                    model TEXT,
+                    response TEXT,
+                    created_at REAL
+                )
+                """
+            )
+            self._conn.commit()
+        return self._conn
+
+    @staticmethod
+    def make_key(prompt, model, params):
+        """
+        Build the content address for a completion
+
+        Args:
+            prompt (str): Fully rendered prompt
+            model (str): Model name
+            params (dict): Sampling parameters
+
+        Returns:
+            str: SHA-256 hex digest
+        """
+        payload = json.dumps({"prompt": prompt, "model": model, "params": params}, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key, ttl=None, namespace="default"):
+        """
+        Look up a completion
+
+        Args:
+            key (str): Key from make_key
+            ttl (float): Maximum age in seconds, None for no expiry
+            namespace (str): Label used for hit/miss accounting
+
+        Returns:
+            str: Cached completion, or None on a miss
+        """
+        if not self.enabled:
+            return None
+        with self._lock:
+            try:
+                row = self._connection().execute(
+                    "SELECT response, created_at FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+            except Exception as e:
+                print(f"Error reading LLM cache: {e}")
+                row = None
+            if row is not None and (ttl is None or time.time() - row[1] <= ttl):
+                self.hits[namespace] = self.hits.get(namespace, 0) + 1
+                return row[0]
+            self.misses[namespace] = self.misses.get(namespace, 0) + 1
+            return None
+
+    def set(self, key, response, model="", namespace="default"):
+        """
+        Store a completion
+
+        Args:
+            key (str): Key from make_key
+            response (str): Completion text
+            model (str): Model name
+            namespace (str): Agent or chain that produced the completion
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            try:
+                conn = self._connection()
+                conn.execute(
+                    "INSERT OR REPLACE INTO responses (key, namespace, model, response, created_at) VALUES (?, ?, ?, ?, ?)",
+                    (key, namespace, model, response, time.time())
+                )
+                conn.commit()
+            except Exception as e:
+                print(f"Error writing LLM cache: {e}")
+
+    def stats(self):
+        """
+        Hit/miss counters per namespace since process start
+
+        Returns:
+            dict: Counters, totals and hit rate
+        """
+        with self._lock:
+            namespaces = sorted(set(self.hits) | set(self.misses))
+            per_namespace = {
+                ns: {"hits": self.hits.get(ns, 0), "misses": self.misses.get(ns, 0)}
+                for ns in namespaces
+            }
+            hits = sum(self.hits.values())
+            misses = sum(self.misses.values())
+        return {
+            "enabled": self.enabled,
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / (hits + misses) if hits + misses else 0.0,
+            "namespaces": per_namespace
+        }
+
+    def clear(self, namespace=None):
+        """Delete cached completions, optionally only for one namespace"""
+        with self._lock:
+            conn = self._connection()
+            if namespace is None:
+                conn.execute("DELETE FROM responses")
+            else:
+                conn.execute("DELETE FROM responses WHERE namespace = ?", (namespace,))
+            conn.commit()
+
+
+_llm_cache = LLMCache()
+
+
+def get_llm_cache():
+    """Return the process-wide LLM response cache"""
+    return _llm_cache
+
+
+def chain_cache_key(chain, inputs):
+    """
+    Content address for running an LLMChain on a set of inputs
+
+    Args:
+        chain (LLMChain): Chain whose prompt and model define the request
+        inputs (dict): Prompt input variables
+
+    Returns:
+        tuple: (key, model name)
+    """
+    llm = chain.llm
+    model = getattr(llm, "model", None) or getattr(llm, "model_name", "")
+    params = {name: getattr(llm, name, None) for name in KEY_PARAMS}
+    return LLMCache.make_key(chain.prompt.format(**inputs), model, params), model
+
+
+def run_chain_cached(chain, namespace, ttl=None, **inputs):
+    """
+    Run an LLMChain through the response cache
+
+    Args:
+        chain (LLMChain): Chain to run on a miss
+        namespace (str): Agent/chain label for accounting
+        ttl (float): Maximum age of a reusable completion in seconds, None for no expiry
+        **inputs: Prompt input variables
+
+    Returns:
+        str: Completion text
+    """
+    cache = get_llm_cache()
+    key, model = chain_cache_key(chain, inputs)
+    cached = cache.get(key, ttl, namespace)
+    if cached is not None:
+        return cached
+    result = chain.run(**inputs)
+    cache.set(key, result, model, namespace)
+    return result
+
+
+async def arun_chain_cached(chain, namespace, ttl=None, **inputs):
+    """
+    Async variant of run_chain_cached using the chain's async LLM call
+
+    Cache reads and writes are offloaded so SQLite I/O never blocks the event loop.
+
+    Args:
+        chain (LLMChain): Chain to run on a miss
+        namespace (str): Agent/chain label for accounting
+        ttl (float): Maximum age of a reusable completion in seconds, None for no expiry
+        **inputs: Prompt input variables
+
+    Returns:
+        str: Completion text
+    """
+    cache = get_llm_cache()
+    key, model = chain_cache_key(chain, inputs)
+    cached = await asyncio.to_thread(cache.get, key, ttl, namespace)
+    if cached is not None:
+        return cached
+    result = await chain.arun(**inputs)
+    await asyncio.to_thread(cache.set, key, result, model, namespace)
+    return result
+
+
+async def astream_chain_cached(chain, namespace, ttl=None, **inputs):
+    """
+    Stream an LLMChain's completion token by token through the response cache
+
+    A cache hit is yielded as a single chunk. On a miss the chain's model is
+    streamed directly and the assembled completion is stored once it finishes.
+
+    Args:
+        chain (LLMChain): Chain whose prompt and model define the request
+        namespace (str): Agent/chain label for accounting
+        ttl (float): Maximum age of a reusable completion in seconds, None for no expiry
+        **inputs: Prompt input variables
+
+    Yields:
+        str: Completion text chunks
+    """
+    cache = get_llm_cache()
+    key, model = chain_cache_key(chain, inputs)
+    cached = await asyncio.to_thread(cache.get, key, ttl, namespace)
+    if cached is not None:
+        yield cached
+        return
+
+    chunks = []
+    async for chunk in chain.llm.astream(chain.prompt.format(**inputs)):
+        text = chunk.content if isinstance(chunk.content, str) else "".join(
+            part.get("text", "") for part in chunk.content if isinstance(part, dict)
+        )
+        if text:
+            chunks.append(text)
+            yield text
+    await asyncio.to_thread(cache.set, key, "".join(chunks), model, namespace)
@@ -0,0 +1,328 @@
+import os
+import re
+import json
+import zlib
+import sqlite3
+import threading
+
+import numpy as np
+import pandas as pd
+
+from utils.price_store import DEFAULT_DATA_DIR
+
+# Seconds before a ticker's news is synced upstream again
+NEWS_SYNC_INTERVAL = float(os.getenv("NEWS_SYNC_INTERVAL", "300"))
+
+# Re-request this far before the last sync to catch articles indexed late
+NEWS_SYNC_OVERLAP = float(os.getenv("NEWS_SYNC_OVERLAP", "3600"))
+
+# MinHash/LSH parameters: 64 permutations in 16 bands of 4 rows puts the
+# candidate threshold near Jaccard 0.5
+MINHASH_PERMUTATIONS = 64
+LSH_BANDS = 16
+NEAR_DUPLICATE_THRESHOLD = float(os.getenv("NEWS_NEAR_DUPLICATE_THRESHOLD", "0.5"))
+SHINGLE_SIZE = 3
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def article_text(article):
+    """Title and description of an article, the text compared for near-duplicates"""
+    return f"{article.get('title') or ''} {article.get('description') or ''}"
+
+
+def shingles(text, size=SHINGLE_SIZE):
+    """
+    Hashed word shingles of a text
+
+    Args:
+        text (str): Text to shingle
+        size (int): Words per shingle
+
+    Returns:
+        np.ndarray: Unique crc32 hashes (uint64), one per shingle
+    """
+    words = _WORD.findall(text.lower())
+    if len(words) < size:
+        grams = [" ".join(words)] if words else []
+    else:
+        grams = [" ".join(words[i:i + size]) for i in range(len(words) - size + 1)]
+    return np.unique(np.fromiter((zlib.crc32(gram.encode("utf-8")) for gram in grams), dtype=np.uint64, count=len(grams)))
+
+
+def minhash_signatures(shingle_sets, permutations=MINHASH_PERMUTATIONS, seed=1):
+    """
+    MinHash signatures for many shingle sets
+
+    Uses the universal hash family ``(a * x + b) mod p`` with a Mersenne
+    prime; all permutations of one set are evaluated in one vectorized step.
+
+    Args:
+        shingle_sets (list): Arrays of shingle hashes
+        permutations (int): Signature length
+        seed (int): Seed for the hash family, signatures are only comparable with the same seed
+
+    Returns:
+        np.ndarray: (len(shingle_sets), permutations) uint64 signatures; empty sets get all-max rows
+    """
+    rng = np.random.default_rng(seed)
+    a = rng.integers(1, 1 << 31, size=permutations, dtype=np.uint64)
+    b = rng.integers(0, 1 << 31, size=permutations, dtype=np.uint64)
+    signatures = np.full((len(shingle_sets), permutations), np.iinfo(np.uint64).max, dtype=np.uint64)
+    for row, values in enumerate(shingle_sets):
+        if len(values):
+            # crc32 values and coefficients are below 2**32, so the products fit in uint64
+            hashed = (values[:, None] * a[None, :] + b[None, :]) % np.uint64(_MERSENNE_PRIME)
+            signatures[row] = hashed.min(axis=0)
+    return signatures
+
+
+def cluster_near_duplicates(articles, threshold=None, bands=LSH_BANDS):
+    """
+    Group articles whose title and description are near-duplicates
+
+    Candidate pairs come from LSH banding of MinHash signatures; a pair is
+    merged when its estimated Jaccard similarity reaches ``threshold``.
+
+    Args:
+        articles (list): News articles
+        threshold (float): Minimum estimated Jaccard similarity, defaults to NEAR_DUPLICATE_THRESHOLD
+        bands (int): LSH bands, must divide the signature length
+
+    Returns:
+        list: Clusters as lists of article indices, in order of their first member
+    """
+    threshold = NEAR_DUPLICATE_THRESHOLD if threshold is None else threshold
+    sets = [shingles(article_text(article)) for article in articles]
+    signatures = minhash_signatures(sets)
+    rows = signatures.shape[1] // bands
+
+    parent = list(range(len(articles)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    checked = set()
+    for band in range(bands):
+        buckets = {}
+        for index, key in enumerate(map(bytes, signatures[:, band * rows:(band + 1) * rows])):
+            if len(sets[index]):
+                buckets.setdefault(key, []).append(index)
+        for members in buckets.values():
+            for other in members[1:]:
+                pair = (members[0], other)
+                if pair in checked:
+                    continue
+                checked.add(pair)
+                if np.mean(signatures[members[0]] == signatures[other]) >= threshold:
+                    parent[find(other)] = find(members[0])
+
+    clusters = {}
+    for index in range(len(articles)):
+        clusters.setdefault(find(index), []).append(index)
+    return sorted(clusters.values(), key=lambda members: members[0])
+
+
+class NewsStore:
+    """
+    Local article store keyed by URL, synced incrementally per ticker in SQLite.
+
+    The first request for a ticker fetches its whole look-back window; later
+    requests only ask upstream for articles published since the last sync
+    (minus a small overlap), at most once per ``sync_interval``. Articles are
+    stored once per URL however many syncs or tickers return them.
+    """
+
+    def __init__(self, path=None, sync_interval=None):
+        """
+        Initialize the news store
+
+        Args:
+            path (str): SQLite database file, defaults to <data dir>/news.sqlite
+            sync_interval (float): Seconds before a ticker is synced upstream again
+        """
+        self.path = path or os.path.join(DEFAULT_DATA_DIR, "news.sqlite")
+        self.sync_interval = NEWS_SYNC_INTERVAL if sync_interval is None else sync_interval
+        self.enabled = os.getenv("EQUIFOLIO_NEWS_STORE", "1") != "0"
+        self._lock = threading.Lock()
+        self._sync_locks = {}
+        self._conn = None
+
+    def _connection(self):
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS articles (
+                    url TEXT PRIMARY KEY,
+                    published_at TEXT,
+                    article TEXT
+                )
+                """
+            )
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS ticker_articles (
+                    ticker TEXT,
+                    url TEXT,
+                    PRIMARY KEY (ticker, url)
+                )
+                """
+            )
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS syncs (
+                    ticker TEXT PRIMARY KEY,
+                    covered_from TEXT,
+                    synced_at TEXT
+                )
+                """
+            )
+            self._conn.commit()
+        return self._conn
+
+    def _sync_lock(self, ticker):
+        with self._lock:
+            if ticker not in self._sync_locks:
+                self._sync_locks[ticker] = threading.Lock()
+            return self._sync_locks[ticker]
+
+    def _sync_state(self, ticker):
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT covered_from, synced_at FROM syncs WHERE ticker = ?", (ticker,)
+            ).fetchone()
+        if row is None:
+            return None, None
+        return pd.Timestamp(row[0]), pd.Timestamp(row[1])
+
+    def store(self, ticker, articles, covered_from, synced_at):
+        """
+        Insert articles (deduplicated by URL) and record the sync
+
+        Args:
+            ticker (str): Stock ticker symbol
+            articles (list): NewsAPI articles
+            covered_from (pd.Timestamp): Earliest publication time the stored history is complete from
+            synced_at (pd.Timestamp): Time of the upstream request
+        """
+        rows = [
+            (article["url"], article.get("publishedAt") or "", json.dumps(article))
+            for article in articles if article.get("url")
+        ]
+        with self._lock:
+            try:
+                conn = self._connection()
+                conn.executemany("INSERT OR REPLACE INTO articles (url, published_at, article) VALUES (?, ?, ?)", rows)
+                conn.executemany(
+                    "INSERT OR IGNORE INTO ticker_articles (ticker, url) VALUES (?, ?)",
+                    [(ticker, row[0]) for row in rows]
+                )
+                conn.execute(
+                    "INSERT OR REPLACE INTO syncs (ticker, covered_from, synced_at) VALUES (?, ?, ?)",
+                    (ticker, covered_from.isoformat(), synced_at.isoformat())
+                )
+                conn.commit()
+            except Exception as e:
+                print(f"Error writing news store for {ticker}: {e}")
+
+    def load(self, ticker, since):
+        """
+        Stored articles for a ticker published since a time, newest first
+
+        Args:
+            ticker (str): Stock ticker symbol
+            since (pd.Timestamp): Earliest publication time (UTC)
+
+        Returns:
+            list: NewsAPI articles
+        """
+        with self._lock:
+            try:
+                rows = self._connection().execute(
+                    """
+                    SELECT a.article FROM articles a JOIN ticker_articles t ON t.url = a.url
+                    WHERE t.ticker = ? AND a.published_at >= ?
+                    ORDER BY a.published_at DESC
+                    """,
+                    (ticker, since.strftime("%Y-%m-%dT%H:%M:%S"))
+                ).fetchall()
+            except Exception as e:
+                print(f"Error reading news store for {ticker}: {e}")
+                return []
+        return [json.loads(row[0]) for row in rows]
+
+    @staticmethod
+    def _oldest(articles, fallback):
+        """Earliest publication time among articles (UTC), or ``fallback`` if none has one"""
+        times = pd.to_datetime([article.get("publishedAt") for article in articles], utc=True, errors="coerce")
+        times = times[~times.isna()]
+        return times.min() if len(times) else fallback
+
+    def get(self, ticker, days_back, fetch):
+        """
+        Articles for a ticker over the look-back window, syncing only what is new
+
+        The stored history is complete from ``covered_from`` up to the last
+        sync. A fetch that could not page all the way back to where it was
+        asked to start only extends that range down to the oldest article it
+        returned; the rest of the window is backfilled on later calls.
+
+        Args:
+            ticker (str): Stock ticker symbol
+            days_back (int): Number of days to look back
+            fetch (callable): ``fetch(since, until=None)`` returning ``(articles, complete)`` for
+                articles published between the two UTC timestamps, newest first, with
+                ``complete`` False when older matching articles were left out; None if
+                upstream failed
+
+        Returns:
+            list: Articles newest first
+        """
+        now = pd.Timestamp.now(tz="UTC")
+        start = now - pd.Timedelta(days=days_back)
+        if not self.enabled:
+            fetched = fetch(start)
+            return fetched[0] if fetched else []
+
+        ticker = ticker.upper()
+        with self._sync_lock(ticker):
+            covered_from, synced_at = self._sync_state(ticker)
+            fresh = synced_at is not None and (now - synced_at).total_seconds() < self.sync_interval
+            if covered_from is not None and covered_from <= start and fresh:
+                return self.load(ticker, start)
+
+            # Newest articles first: everything since the last sync, or the whole window on a cold start
+            if not fresh:
+                since = max(synced_at - pd.Timedelta(seconds=NEWS_SYNC_OVERLAP), start) if synced_at is not None else start
+                fetched = fetch(since)
+                if fetched is None:
+                    return self.load(ticker, start)
+                articles, complete = fetched
+                if synced_at is None or not complete:
+                    # A gap may remain below the oldest article received, so coverage restarts there
+                    covered_from = since if complete else self._oldest(articles, now)
+                self.store(ticker, articles, covered_from, now)
+                synced_at = now
+
+            # Backfill the older part of the window that earlier syncs could not reach
+            if covered_from > start:
+                fetched = fetch(start, until=covered_from)
+                if fetched is not None:
+                    articles, complete = fetched
+                    covered_from = start if complete else min(self._oldest(articles, covered_from), covered_from)
+                    self.store(ticker, articles, covered_from, synced_at)
+            return self.load(ticker, start)
+
+_news_store = NewsStore()
+
+
+def get_news_store():
+    """Return the process-wide news store"""
+    return _news_store
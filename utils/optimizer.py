@@ -0,0 +1,372 @@
+import numpy as np
+
+# Trading days used to annualize daily statistics (same as calculate_portfolio_metrics)
+TRADING_DAYS = 252
+
+# Optimization methods reported by optimize_portfolio
+METHODS = ("min_variance", "max_sharpe", "risk_parity", "hrp")
+
+
+def shrunk_covariance(returns_df):
+    """
+    Ledoit-Wolf covariance shrunk towards a scaled identity
+
+    The sample covariance is singular once there are more assets than
+    observations; shrinking keeps it well conditioned for the optimizers.
+
+    Args:
+        returns_df (pd.DataFrame): Daily returns without missing values
+
+    Returns:
+        np.ndarray: Daily covariance matrix
+    """
+    x = returns_df.to_numpy(dtype=float)
+    x = x - x.mean(axis=0)
+    t, n = x.shape
+    sample = x.T @ x / t
+    target = np.trace(sample) / n
+    distance = np.sum((sample - target * np.eye(n)) ** 2)
+    if distance <= 0:
+        return sample * t / max(t - 1, 1)
+    norms = np.sum(x * x, axis=1)
+    spread = (np.sum(norms ** 2) / t - np.sum(sample ** 2)) / t
+    intensity = min(max(spread / distance, 0.0), 1.0)
+    shrunk = intensity * target * np.eye(n) + (1 - intensity) * sample
+    return shrunk * t / max(t - 1, 1)
+
+
+def _simplex_shift(matrix, cap, guess=None, tolerance=1e-12, max_iterations=100):
+    """
+    Shift tau per column with sum(clip(v - tau, 0, cap)) = 1
+
+    The sum is piecewise linear in tau, so Newton steps land on the exact
+    root once the set of uncapped positions settles; steps leaving the
+    current bracket fall back to bisection. A guess from the previous
+    iterate of an optimizer usually converges in a couple of steps.
+    """
+    low = matrix.min(axis=0) - 1.0
+    high = matrix.max(axis=0)
+    tau = (low + high) / 2 if guess is None else np.clip(guess, low, high)
+    for _ in range(max_iterations):
+        shifted = matrix - tau
+        excess = np.clip(shifted, 0.0, cap).sum(axis=0) - 1
+        if np.all(np.abs(excess) < tolerance):
+            break
+        low = np.where(excess > 0, tau, low)
+        high = np.where(excess < 0, tau, high)
+        free = ((shifted > 0) & (shifted < cap)).sum(axis=0)
+        newton = tau + excess / np.maximum(free, 1)
+        inside = (free > 0) & (newton > low) & (newton < high)
+        tau = np.where(inside, newton, (low + high) / 2)
+    return tau
+
+
+def project_capped_simplex(v, cap=1.0):
+    """
+    Euclidean projection onto {w : sum(w) = 1, 0 <= w <= cap}
+
+    Args:
+        v (np.ndarray): Point (N) or points (N x G, one per column) to project
+        cap (float): Maximum weight per asset, at least 1/N
+
+    Returns:
+        np.ndarray: Projected weights with the shape of v
+    """
+    v = np.asarray(v, dtype=float)
+    matrix = v if v.ndim == 2 else v[:, None]
+    projected = np.clip(matrix - _simplex_shift(matrix, cap), 0.0, cap)
+    return projected if v.ndim == 2 else projected[:, 0]
+
+
+def mean_variance_weights(covariance, mean, risk_aversions, cap=1.0, tolerance=1e-8, max_iterations=2000):
+    """
+    Solve min w'Cw - g * mean'w over the capped simplex for many g at once
+
+    Accelerated projected gradient (FISTA) with all risk tolerances solved as
+    columns of one matrix, so each iteration is a single matrix product and a
+    batched projection. ``g = 0`` gives the minimum-variance portfolio.
+
+    Args:
+        covariance (np.ndarray): Covariance matrix (N x N)
+        mean (np.ndarray): Expected returns (N)
+        risk_aversions (array-like): Return tolerances g (G)
+        cap (float): Maximum weight per asset
+        tolerance (float): Stop when no weight moves by more than this
+        max_iterations (int): Iteration limit
+
+    Returns:
+        np.ndarray: Weights (N x G)
+    """
+    n = len(mean)
+    tolerances = np.asarray(risk_aversions, dtype=float)[None, :]
+    step = 1.0 / (2 * np.linalg.eigvalsh(covariance)[-1])
+    linear = mean[:, None] * tolerances
+    weights = np.full((n, tolerances.shape[1]), 1.0 / n)
+    momentum = weights.copy()
+    shift = None
+    t = 1.0
+    for _ in range(max_iterations):
+        point = momentum - step * (2 * covariance @ momentum - linear)
+        shift = _simplex_shift(point, cap, shift)
+        updated = np.clip(point - shift, 0.0, cap)
+        # Restart the momentum when it stops pointing downhill (O'Donoghue & Candes)
+        if np.sum((momentum - updated) * (updated - weights)) > 0:
+            t = 1.0
+        t_next = (1 + np.sqrt(1 + 4 * t * t)) / 2
+        momentum = updated + ((t - 1) / t_next) * (updated - weights)
+        converged = np.max(np.abs(updated - weights)) < tolerance
+        weights, t = updated, t_next
+        if converged:
+            break
+    return weights
+
+
+def risk_parity_weights(covariance, budgets=None, tolerance=1e-10, max_iterations=100):
+    """
+    Equal (or budgeted) risk contribution weights
+
+    Newton's method on the convex formulation of Spinu (2013):
+    minimize y'Cy / 2 - sum(b * log(y)) over y > 0, then w = y / sum(y).
+
+    Args:
+        covariance (np.ndarray): Covariance matrix (N x N)
+        budgets (np.ndarray): Risk budgets summing to 1, equal if None
+        tolerance (float): Newton decrement at which to stop
+        max_iterations (int): Iteration limit
+
+    Returns:
+        np.ndarray: Weights (N)
+    """
+    n = len(covariance)
+    budgets = np.full(n, 1.0 / n) if budgets is None else np.asarray(budgets, dtype=float)
+    y = budgets / np.sqrt(np.diag(covariance))
+    for _ in range(max_iterations):
+        gradient = covariance @ y - budgets / y
+        hessian = covariance + np.diag(budgets / (y * y))
+        direction = np.linalg.solve(hessian, gradient)
+        decrement = gradient @ direction
+        if decrement < tolerance:
+            break
+        # Damped step that keeps every y strictly positive
+        shrinking = direction > 0
+        step = min(1.0, 0.95 * np.min(y[shrinking] / direction[shrinking])) if shrinking.any() else 1.0
+        if decrement > 0.25:
+            step = min(step, 1.0 / (1.0 + np.sqrt(decrement)))
+        y = y - step * direction
+    return y / y.sum()
+
+
+def single_linkage_order(distance):
+    """
+    Leaf order of the single-linkage dendrogram of a distance matrix
+
+    Single linkage merges clusters along the edges of the minimum spanning
+    tree, so the tree is built with Prim's algorithm (O(N^2), vectorized) and
+    its edges are then merged in increasing length, concatenating the member
+    lists of the two clusters joined by each edge.
+
+    Args:
+        distance (np.ndarray): Symmetric distance matrix (N x N)
+
+    Returns:
+        list: Asset indices in quasi-diagonal order
+    """
+    n = len(distance)
+    in_tree = np.zeros(n, dtype=bool)
+    in_tree[0] = True
+    best = distance[0].copy()
+    parent = np.zeros(n, dtype=int)
+    edges = []
+    for _ in range(n - 1):
+        candidates = np.where(in_tree, np.inf, best)
+        node = int(np.argmin(candidates))
+        edges.append((candidates[node], parent[node], node))
+        in_tree[node] = True
+        closer = distance[node] < best
+        best = np.where(closer, distance[node], best)
+        parent = np.where(closer, node, parent)
+
+    cluster_of = list(range(n))
+    members = {i: [i] for i in range(n)}
+    for _, a, b in sorted(edges):
+        left, right = cluster_of[a], cluster_of[b]
+        merged = members.pop(left) + members.pop(right)
+        members[left] = merged
+        for asset in merged:
+            cluster_of[asset] = left
+    return next(iter(members.values()))
+
+
+def hrp_weights(covariance):
+    """
+    Hierarchical Risk Parity (Lopez de Prado, 2016)
+
+    Assets are ordered by single-linkage clustering of the correlation
+    distance, then weight is split top-down by recursive bisection in inverse
+    proportion to each half's inverse-variance portfolio variance.
+
+    Args:
+        covariance (np.ndarray): Covariance matrix (N x N)
+
+    Returns:
+        np.ndarray: Weights (N)
+    """
+    volatility = np.sqrt(np.diag(covariance))
+    correlation = np.clip(covariance / np.outer(volatility, volatility), -1.0, 1.0)
+    order = single_linkage_order(np.sqrt((1 - correlation) / 2))
+
+    def cluster_variance(items):
+        sub = covariance[np.ix_(items, items)]
+        inverse = 1 / np.diag(sub)
+        inverse /= inverse.sum()
+        return inverse @ sub @ inverse
+
+    weights = np.ones(len(covariance))
+    clusters = [order]
+    while clusters:
+        split = []
+        for items in clusters:
+            if len(items) < 2:
+                continue
+            half = len(items) // 2
+            left, right = items[:half], items[half:]
+            left_variance, right_variance = cluster_variance(left), cluster_variance(right)
+            alpha = 1 - left_variance / (left_variance + right_variance)
+            weights[left] *= alpha
+            weights[right] *= 1 - alpha
+            split.extend([left, right])
+        clusters = split
+    return weights
+
+
+def portfolio_stats(weights, mean, covariance, risk_free_rate=0.0):
+    """
+    Annualized return, volatility and Sharpe ratio of one or more portfolios
+
+    Args:
+        weights (np.ndarray): Weights (N) or (N x G)
+        mean (np.ndarray): Daily expected returns
+        covariance (np.ndarray): Daily covariance
+        risk_free_rate (float): Annual risk-free rate (decimal)
+
+    Returns:
+        tuple: (return, volatility, sharpe) in decimals
+    """
+    annual_return = (mean @ weights) * TRADING_DAYS
+    variance = np.einsum('i...,ij,j...->...', weights, covariance, weights)
+    volatility = np.sqrt(np.maximum(variance, 0.0) * TRADING_DAYS)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sharpe = np.where(volatility > 0, (annual_return - risk_free_rate) / volatility, 0.0)
+    return annual_return, volatility, sharpe
+
+
+def efficient_frontier(mean, covariance, cap=1.0, points=25):
+    """
+    Batch-compute long-only efficient portfolios from minimum variance to maximum return
+
+    Args:
+        mean (np.ndarray): Daily expected returns
+        covariance (np.ndarray): Daily covariance
+        cap (float): Maximum weight per asset
+        points (int): Number of return tolerances solved
+
+    Returns:
+        tuple: (risk tolerances, weights N x G)
+    """
+    # Tolerances spanning the point where returns start to outweigh variance
+    scale = 2 * np.trace(covariance) / len(mean) / max(np.std(mean), 1e-12)
+    tolerances = np.concatenate([[0.0], scale * np.geomspace(1e-3, 1e2, points - 1)])
+    return tolerances, mean_variance_weights(covariance, mean, tolerances, cap)
+
+
+def optimize_portfolio(returns_df, max_weight=None, risk_free_rate=0.0, frontier_points=25, covariance=None):
+    """
+    Minimum-variance, maximum-Sharpe, risk-parity and HRP allocations plus the efficient frontier
+
+    All allocations are long-only and fully invested. ``max_weight`` caps each
+    position; the mean-variance portfolios enforce it exactly, while risk
+    parity and HRP weights are projected onto the cap afterwards.
+
+    Args:
+        returns_df (pd.DataFrame): Daily returns, one column per ticker
+        max_weight (float): Maximum weight per asset, raised to 1/N if infeasible
+        risk_free_rate (float): Annual risk-free rate (decimal) for the Sharpe ratio
+        frontier_points (int): Number of efficient frontier points
+        covariance (np.ndarray): Precomputed daily covariance of returns_df's columns
+
+    Returns:
+        dict: Per method weights and annualized stats (in percent), the frontier and the cap used
+    """
+    returns_df = returns_df.dropna()
+    tickers = [str(ticker) for ticker in returns_df.columns]
+    n = len(tickers)
+    if n == 0 or len(returns_df) < 2:
+        return {}
+    cap = 1.0 if max_weight is None else max(float(max_weight), 1.0 / n)
+    mean = returns_df.mean().to_numpy()
+    covariance = shrunk_covariance(returns_df) if covariance is None else covariance
+
+    tolerances, frontier = efficient_frontier(mean, covariance, cap, frontier_points)
+    _, _, sharpe = portfolio_stats(frontier, mean, covariance, risk_free_rate)
+
+    # Refine the maximum-Sharpe portfolio between the frontier points around it
+    best = int(np.argmax(sharpe))
+    low = tolerances[max(best - 1, 0)]
+    high = tolerances[min(best + 1, len(tolerances) - 1)]
+    refined_tolerances = np.linspace(low, high, 15)
+    refined = mean_variance_weights(covariance, mean, refined_tolerances, cap)
+    _, _, refined_sharpe = portfolio_stats(refined, mean, covariance, risk_free_rate)
+    max_sharpe = refined[:, int(np.argmax(refined_sharpe))]
+
+    allocations = {
+        "min_variance": frontier[:, 0],
+        "max_sharpe": max_sharpe,
+        "risk_parity": project_capped_simplex(risk_parity_weights(covariance), cap),
+        "hrp": project_capped_simplex(hrp_weights(covariance), cap)
+    }
+
+    results = {"max_weight": cap}
+    for method in METHODS:
+        weights = allocations[method]
+        annual_return, volatility, ratio = portfolio_stats(weights, mean, covariance, risk_free_rate)
+        results[method] = {
+            "weights": {ticker: round(float(weight), 6) for ticker, weight in zip(tickers, weights)},
+            "expected_return": float(annual_return) * 100,
+            "volatility": float(volatility) * 100,
+            "sharpe_ratio": float(ratio)
+        }
+
+    frontier_return, frontier_volatility, frontier_sharpe = portfolio_stats(frontier, mean, covariance, risk_free_rate)
+    points = sorted(set(
+        (round(float(r) * 100, 4), round(float(v) * 100, 4), round(float(s), 4))
+        for r, v, s in zip(frontier_return, frontier_volatility, frontier_sharpe)
+    ), key=lambda point: point[1])
+    results["frontier"] = [{"expected_return": r, "volatility": v, "sharpe_ratio": s} for r, v, s in points]
+    return results
+
+
+def format_allocations(optimization, top=10):
+    """
+    Render optimized allocations as prompt text
+
+    Args:
+        optimization (dict): Output of optimize_portfolio
+        top (int): Largest positions listed per method
+
+    Returns:
+        str: One block per method
+    """
+    if not optimization:
+        return "No optimized allocation available."
+    lines = []
+    for method in METHODS:
+        result = optimization[method]
+        name = method.replace("_", " ").title().replace("Hrp", "Hierarchical Risk Parity")
+        lines.append(
+            f"{name}: expected return {result['expected_return']:.2f}%, "
+            f"volatility {result['volatility']:.2f}%, Sharpe {result['sharpe_ratio']:.2f}"
+        )
+        holdings = sorted(result["weights"].items(), key=lambda item: item[1], reverse=True)[:top]
+        lines.append("  " + ", ".join(f"{ticker} {weight:.1%}" for ticker, weight in holdings if weight >= 0.0005))
+    lines.append(f"Maximum weight per position: {optimization['max_weight']:.0%}")
+    return "\n".join(lines)
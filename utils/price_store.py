@@ -0,0 +1,273 @@
+import os
+import json
+import threading
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401  (parquet engine used by DataFrame.to_parquet)
+except ImportError:
+    pyarrow = None
+
+DEFAULT_DATA_DIR = os.getenv("EQUIFOLIO_DATA_DIR", "data")
+
+# Calendar look-back for each yfinance period string
+PERIOD_OFFSETS = {
+    "1d": pd.DateOffset(days=1),
+    "5d": pd.DateOffset(days=5),
+    "1mo": pd.DateOffset(months=1),
+    "3mo": pd.DateOffset(months=3),
+    "6mo": pd.DateOffset(months=6),
+    "1y": pd.DateOffset(years=1),
+    "2y": pd.DateOffset(years=2),
+    "5y": pd.DateOffset(years=5),
+    "10y": pd.DateOffset(years=10),
+}
+
+# Periods that yfinance counts in trading sessions rather than calendar days
+SESSION_PERIODS = {"1d": 1, "5d": 5}
+
+INTRADAY_INTERVALS = {"1m", "2m", "5m", "15m", "30m", "60m", "90m", "1h"}
+
+# Event columns yfinance returns alongside adjusted bars
+CORPORATE_ACTION_COLUMNS = ("Dividends", "Stock Splits")
+
+
+def period_start(period, now=None):
+    """
+    Earliest timestamp a yfinance period string reaches back to
+
+    Args:
+        period (str): yfinance period (1d, 5d, 1mo, ..., 10y, ytd, max)
+        now (pd.Timestamp): Reference time (UTC), defaults to now
+
+    Returns:
+        pd.Timestamp: Start of the period in UTC, or None for "max"
+    """
+    now = now if now is not None else pd.Timestamp.now(tz="UTC")
+    if period == "max":
+        return None
+    if period == "ytd":
+        return pd.Timestamp(year=now.year, month=1, day=1, tz="UTC")
+    if period not in PERIOD_OFFSETS:
+        raise ValueError(f"Unsupported period: {period}")
+    return now - PERIOD_OFFSETS[period]
+
+
+class PriceStore:
+    """
+    On-disk columnar OHLCV store with one Parquet file per ticker/interval.
+
+    Each file is paired with a small JSON sidecar recording how far back the
+    stored history is known to be complete (``covered_from``) and when the
+    tail was last checked against upstream (``checked_at``). Reads are served
+    locally; only the missing tail is downloaded and appended, unless the
+    tail shows a split or dividend re-adjusted history, in which case the
+    covered range is downloaded again.
+    """
+
+    def __init__(self, root=None, intraday_max_age=60, daily_max_age=900):
+        """
+        Initialize the price store
+
+        Args:
+            root (str): Directory for the store, defaults to <data dir>/prices
+            intraday_max_age (int): Seconds before intraday bars are re-checked upstream
+            daily_max_age (int): Seconds before daily (and longer) bars are re-checked upstream
+        """
+        self.root = root or os.path.join(DEFAULT_DATA_DIR, "prices")
+        self.intraday_max_age = intraday_max_age
+        self.daily_max_age = daily_max_age
+        self.enabled = pyarrow is not None and os.getenv("EQUIFOLIO_PRICE_STORE", "1") != "0"
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+
+    def supports(self, period):
+        """Whether a period string can be served from the store"""
+        return self.enabled and (period in PERIOD_OFFSETS or period in ("ytd", "max"))
+
+    def _lock_for(self, key):
+        with self._locks_guard:
+            if key not in self._locks:
+                self._locks[key] = threading.Lock()
+            return self._locks[key]
+
+    def _paths(self, ticker, interval):
+        directory = os.path.join(self.root, interval)
+        name = ticker.upper().replace("/", "_")
+        return (
+            os.path.join(directory, f"{name}.parquet"),
+            os.path.join(directory, f"{name}.json")
+        )
+
+    def load(self, ticker, interval):
+        """
+        Load stored bars and metadata for a ticker/interval
+
+        Args:
+            ticker (str): Stock ticker symbol
+            interval (str): Data interval
+
+        Returns:
+            tuple: (pd.DataFrame or None, dict)
+        """
+        data_path, meta_path = self._paths(ticker, interval)
+        if not os.path.exists(data_path) or not os.path.exists(meta_path):
+            return None, {}
+        try:
+            with open(meta_path) as f:
+                meta = json.load(f)
+            return pd.read_parquet(data_path), meta
+        except Exception as e:
+            print(f"Error reading price store for {ticker}: {e}")
+            return None, {}
+
+    def save(self, ticker, interval, data, meta):
+        """
+        Atomically write bars and metadata for a ticker/interval
+
+        Args:
+            ticker (str): Stock ticker symbol
+            interval (str): Data interval
+            data (pd.DataFrame): Bars to store
+            meta (dict): Coverage metadata
+        """
+        data_path, meta_path = self._paths(ticker, interval)
+        os.makedirs(os.path.dirname(data_path), exist_ok=True)
+        try:
+            data.to_parquet(data_path + ".tmp")
+            os.replace(data_path + ".tmp", data_path)
+            with open(meta_path + ".tmp", "w") as f:
+                json.dump(meta, f)
+            os.replace(meta_path + ".tmp", meta_path)
+        except Exception as e:
+            print(f"Error writing price store for {ticker}: {e}")
+
+    def _is_covered(self, meta, period, now):
+        covered_from = meta.get("covered_from")
+        if covered_from is None:
+            return False
+        if covered_from == "max":
+            return True
+        if period == "max":
+            return False
+        return pd.Timestamp(covered_from) <= period_start(period, now)
+
+    def _is_stale(self, meta, interval, now):
+        checked_at = meta.get("checked_at")
+        if checked_at is None:
+            return True
+        max_age = self.intraday_max_age if interval in INTRADAY_INTERVALS else self.daily_max_age
+        return (now - pd.Timestamp(checked_at)).total_seconds() > max_age
+
+    @staticmethod
+    def _basis_changed(stored, fresh):
+        """
+        Whether a freshly fetched tail is on a different price basis than the stored bars
+
+        yfinance bars are split/dividend adjusted, so a corporate action
+        re-adjusts all earlier prices. It shows up either as a mismatch on
+        the completed bars both frames share, or as a split/dividend in the
+        tail that the stored bars do not record yet.
+        """
+        if fresh is None or fresh.empty:
+            return False
+        # The last stored bar may have been a partial session, so it is not compared
+        completed = stored.index[:-1]
+        overlap = fresh.index.intersection(completed)
+        if len(overlap) and "Close" in fresh and "Close" in stored:
+            if not np.allclose(fresh.loc[overlap, "Close"], stored.loc[overlap, "Close"], rtol=1e-6, equal_nan=True):
+                return True
+        for column in CORPORATE_ACTION_COLUMNS:
+            if column not in fresh:
+                continue
+            events = fresh[column].fillna(0)
+            known = stored[column].reindex(events.index).fillna(0) if column in stored else 0
+            if ((events != 0) & (events != known)).any():
+                return True
+        return False
+
+    @staticmethod
+    def _merge(stored, fresh):
+        if stored is None or stored.empty:
+            return fresh.sort_index()
+        if fresh is None or fresh.empty:
+            return stored
+        merged = pd.concat([stored, fresh])
+        merged = merged[~merged.index.duplicated(keep="last")]
+        return merged.sort_index()
+
+    @staticmethod
+    def _slice(data, period, now):
+        if data is None or data.empty or period == "max":
+            return data
+        if period in SESSION_PERIODS:
+            sessions = data.index.normalize().unique()[-SESSION_PERIODS[period]:]
+            return data[data.index.normalize().isin(sessions)].copy()
+        start = period_start(period, now)
+        if data.index.tz is not None:
+            start = start.tz_convert(data.index.tz)
+        else:
+            start = start.tz_localize(None)
+        return data[data.index >= start].copy()
+
+    def get(self, ticker, period, interval, fetch):
+        """
+        Return bars for a period, reading locally and fetching only what is missing
+
+        Args:
+            ticker (str): Stock ticker symbol
+            period (str): yfinance period string
+            interval (str): yfinance interval string
+            fetch (callable): ``fetch(period=None, start=None)`` returning a DataFrame of bars
+
+        Returns:
+            pd.DataFrame: Bars covering the requested period
+        """
+        now = pd.Timestamp.now(tz="UTC")
+        with self._lock_for((ticker.upper(), interval)):
+            stored, meta = self.load(ticker, interval)
+            covered = stored is not None and not stored.empty and self._is_covered(meta, period, now)
+
+            if covered and not self._is_stale(meta, interval, now):
+                return self._slice(stored, period, now)
+
+            if covered:
+                # Refetch from the session before the last stored one, so a partial
+                # bar gets replaced and a completed bar overlaps for comparison
+                overlap_bar = stored.index[-2] if len(stored) > 1 else stored.index[-1]
+                fresh = fetch(start=overlap_bar.strftime("%Y-%m-%d"))
+                if fresh is None:
+                    # Upstream unavailable: serve what we have
+                    return self._slice(stored, period, now)
+                meta["checked_at"] = now.isoformat()
+                if self._basis_changed(stored, fresh):
+                    # A split or dividend re-adjusted history: replace the stored bars entirely
+                    covered_from = meta["covered_from"]
+                    if covered_from == "max":
+                        full = fetch(period="max")
+                    else:
+                        full = fetch(start=pd.Timestamp(covered_from).strftime("%Y-%m-%d"))
+                    if full is None or full.empty:
+                        return self._slice(stored, period, now)
+                    stored, fresh = None, full
+            else:
+                fresh = fetch(period=period)
+                if fresh is None or fresh.empty:
+                    return self._slice(stored, period, now) if stored is not None else fresh
+                start = period_start(period, now)
+                meta["covered_from"] = "max" if start is None else start.isoformat()
+                meta["checked_at"] = now.isoformat()
+
+            merged = self._merge(stored, fresh)
+            self.save(ticker, interval, merged, meta)
+            return self._slice(merged, period, now)
+
+
+_price_store = PriceStore()
+
+
+def get_price_store():
+    """Return the process-wide price store"""
+    return _price_store
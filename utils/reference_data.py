@@ -0,0 +1,311 @@
+import os
+import time
+import sqlite3
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from utils.price_store import DEFAULT_DATA_DIR
+
+# Reference fields kept per ticker
+REFERENCE_FIELDS = ("name", "sector", "industry", "exchange", "currency")
+
+# Seconds before a record is refreshed in the background
+REFERENCE_MAX_AGE = float(os.getenv("REFERENCE_MAX_AGE", str(7 * 24 * 3600)))
+
+# Seconds before a ticker whose upstream lookup failed is tried again
+REFERENCE_RETRY_AGE = float(os.getenv("REFERENCE_RETRY_AGE", "900"))
+
+# SQLite limits the number of bound parameters per statement
+_QUERY_CHUNK = 500
+
+
+def record_from_info(info):
+    """
+    Reference record from a yfinance ``.info`` payload
+
+    Args:
+        info (dict): Ticker info, may be empty
+
+    Returns:
+        dict: name, sector, industry, exchange and currency (None where unknown)
+    """
+    info = info or {}
+    return {
+        "name": info.get("shortName") or info.get("longName"),
+        "sector": info.get("sector"),
+        "industry": info.get("industry"),
+        "exchange": info.get("exchange"),
+        "currency": info.get("currency")
+    }
+
+
+class ReferenceIndex:
+    """
+    Local ticker reference-data index (name, sector, industry, exchange, currency) in SQLite.
+
+    Lookups are answered from the index in one query per few hundred tickers.
+    Tickers never seen before are fetched upstream concurrently and stored;
+    records older than ``max_age`` are returned as they are and refreshed in
+    the background. A failed or empty upstream lookup never replaces stored
+    fields; the ticker is retried after ``retry_age`` instead.
+    """
+
+    def __init__(self, path=None, max_age=None, max_workers=8, retry_age=None):
+        """
+        Initialize the index
+
+        Args:
+            path (str): SQLite database file, defaults to <data dir>/reference.sqlite
+            max_age (float): Seconds before a record is refreshed
+            max_workers (int): Concurrent upstream lookups
+            retry_age (float): Seconds before a failed lookup is retried
+        """
+        self.path = path or os.path.join(DEFAULT_DATA_DIR, "reference.sqlite")
+        self.max_age = REFERENCE_MAX_AGE if max_age is None else max_age
+        self.retry_age = REFERENCE_RETRY_AGE if retry_age is None else retry_age
+        self.max_workers = max_workers
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="reference")
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _connection(self):
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS tickers (
+                    ticker TEXT PRIMARY KEY,
+                    name TEXT,
+                    sector TEXT,
+                    industry TEXT,
+                    exchange TEXT,
+                    currency TEXT,
+                    updated_at REAL
+                )
+                """
+            )
+            self._conn.commit()
+        return self._conn
+
+    def get_many(self, tickers):
+        """
+        Read stored records without touching upstream
+
+        Args:
+            tickers (list): Ticker symbols
+
+        Returns:
+            dict: ticker -> record (with ``updated_at``) for the tickers in the index
+        """
+        tickers = list(dict.fromkeys(ticker.upper() for ticker in tickers))
+        records = {}
+        with self._lock:
+            try:
+                conn = self._connection()
+                for start in range(0, len(tickers), _QUERY_CHUNK):
+                    chunk = tickers[start:start + _QUERY_CHUNK]
+                    rows = conn.execute(
+                        f"SELECT ticker, {', '.join(REFERENCE_FIELDS)}, updated_at FROM tickers "
+                        f"WHERE ticker IN ({', '.join('?' * len(chunk))})",
+                        chunk
+                    ).fetchall()
+                    for row in rows:
+                        records[row[0]] = dict(zip(REFERENCE_FIELDS + ("updated_at",), row[1:]))
+            except Exception as e:
+                print(f"Error reading reference index: {e}")
+        return records
+
+    def upsert(self, records):
+        """
+        Insert or replace records
+
+        Args:
+            records (dict): ticker -> record with any of REFERENCE_FIELDS
+
+        Returns:
+            int: Number of records written
+        """
+        now = time.time()
+        rows = [
+            (ticker.upper(),) + tuple(record.get(field) for field in REFERENCE_FIELDS) + (record.get("updated_at") or now,)
+            for ticker, record in records.items()
+        ]
+        if not rows:
+            return 0
+        with self._lock:
+            try:
+                conn = self._connection()
+                conn.executemany(
+                    f"INSERT OR REPLACE INTO tickers (ticker, {', '.join(REFERENCE_FIELDS)}, updated_at) "
+                    f"VALUES ({', '.join('?' * (len(REFERENCE_FIELDS) + 2))})",
+                    rows
+                )
+                conn.commit()
+            except Exception as e:
+                print(f"Error writing reference index: {e}")
+                return 0
+        return len(rows)
+
+    def update(self, tickers, fetch):
+        """
+        Fetch records upstream and store them
+
+        A lookup that fails or comes back with every field empty keeps the
+        ticker's stored fields (empty for a new ticker) and marks it due for
+        another try after ``retry_age``, so one transient upstream error does
+        not blank a ticker until its next refresh.
+
+        Args:
+            tickers (list): Ticker symbols
+            fetch (callable): ``fetch(ticker)`` returning a reference record
+
+        Returns:
+            dict: ticker -> record as stored
+        """
+        def fetch_one(ticker):
+            try:
+                return ticker, fetch(ticker) or record_from_info(None)
+            except Exception as e:
+                print(f"Error fetching reference data for {ticker}: {e}")
+                return ticker, record_from_info(None)
+
+        with ThreadPoolExecutor(max_workers=max(1, min(self.max_workers, len(tickers)))) as pool:
+            fetched = dict(pool.map(fetch_one, tickers))
+
+        failed = [ticker for ticker, record in fetched.items() if not any(record.get(field) for field in REFERENCE_FIELDS)]
+        if failed:
+            previous = self.get_many(failed)
+            # Backdated so the record goes stale once retry_age has passed
+            retry_at = time.time() - self.max_age + self.retry_age
+            for ticker in failed:
+                fetched[ticker] = {**(previous.get(ticker.upper()) or fetched[ticker]), "updated_at": retry_at}
+        self.upsert(fetched)
+        return fetched
+
+    def refresh(self, tickers, fetch):
+        """
+        Re-fetch records in the background
+
+        Args:
+            tickers (list): Ticker symbols
+            fetch (callable): ``fetch(ticker)`` returning a reference record
+        """
+        with self._lock:
+            pending = [ticker for ticker in tickers if ticker not in self._refreshing]
+            self._refreshing.update(pending)
+        if not pending:
+            return
+
+        def run():
+            try:
+                self.update(pending, fetch)
+            finally:
+                with self._lock:
+                    self._refreshing.difference_update(pending)
+
+        self.executor.submit(run)
+
+    def lookup(self, tickers, fetch=None):
+        """
+        Reference records for many tickers
+
+        Args:
+            tickers (list): Ticker symbols
+            fetch (callable): ``fetch(ticker)`` returning a reference record, used for
+                tickers missing from the index (synchronously, concurrently) and for
+                stale ones (in the background); None to answer from the index only
+
+        Returns:
+            dict: ticker (as given) -> record with REFERENCE_FIELDS
+        """
+        records = self.get_many(tickers)
+        missing = list(dict.fromkeys(ticker.upper() for ticker in tickers if ticker.upper() not in records))
+        if fetch is not None:
+            cutoff = time.time() - self.max_age
+            stale = [ticker for ticker, record in records.items() if (record["updated_at"] or 0) < cutoff]
+            if stale:
+                self.refresh(stale, fetch)
+            if missing:
+                records.update(self.update(missing, fetch))
+        return {
+            ticker: {field: records[ticker.upper()].get(field) for field in REFERENCE_FIELDS}
+            for ticker in tickers if ticker.upper() in records
+        }
+
+    def load_frame(self, frame):
+        """
+        Bulk-load reference data from a DataFrame
+
+        Columns are matched case-insensitively; ``ticker`` or ``symbol`` is
+        required, REFERENCE_FIELDS are optional (``shortName``/``longName`` are
+        accepted for the name).
+
+        Args:
+            frame (pd.DataFrame): One row per ticker
+
+        Returns:
+            int: Number of records written
+        """
+        columns = {column.lower(): column for column in frame.columns}
+        key = columns.get("ticker") or columns.get("symbol")
+        if key is None:
+            raise ValueError("Reference data needs a 'ticker' or 'symbol' column")
+        sources = {
+            "name": columns.get("name") or columns.get("shortname") or columns.get("longname"),
+            **{field: columns.get(field) for field in REFERENCE_FIELDS if field != "name"}
+        }
+        records = {}
+        for row in frame.to_dict("records"):
+            ticker = row.get(key)
+            if not isinstance(ticker, str) or not ticker.strip():
+                continue
+            records[ticker.strip()] = {
+                field: (None if source is None or pd.isna(row.get(source)) else str(row.get(source)))
+                for field, source in sources.items()
+            }
+        return self.upsert(records)
+
+    def load_csv(self, path):
+        """Bulk-load reference data from a CSV file (see load_frame for the columns)"""
+        return self.load_frame(pd.read_csv(path))
+
+    def shutdown(self):
+        """Stop background refreshes"""
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+_reference_index = None
+_reference_index_lock = threading.Lock()
+
+
+def get_reference_index():
+    """Return the process-wide reference-data index"""
+    global _reference_index
+    with _reference_index_lock:
+        if _reference_index is None:
+            _reference_index = ReferenceIndex()
+        return _reference_index
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Manage the local ticker reference-data index")
+    commands = parser.add_subparsers(dest="command", required=True)
+    load = commands.add_parser("load", help="Bulk-load records from a CSV file")
+    load.add_argument("path", help="CSV with a ticker/symbol column and optional name, sector, industry, exchange, currency")
+    fetch = commands.add_parser("fetch", help="Fetch and store records for tickers from upstream")
+    fetch.add_argument("tickers", nargs="+")
+    args = parser.parse_args()
+
+    if args.command == "load":
+        print(f"Loaded {get_reference_index().load_csv(args.path)} records")
+    else:
+        from utils.common import fetch_reference_record
+        records = get_reference_index().update([ticker.upper() for ticker in args.tickers], fetch_reference_record)
+        for ticker, record in records.items():
+            print(ticker, record)
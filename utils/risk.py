@@ -0,0 +1,462 @@
+import os
+import threading
+import multiprocessing
+from statistics import NormalDist
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+# Defaults for compute_var_es, overridable from the environment
+VAR_CONFIDENCE_LEVELS = tuple(float(level) for level in os.getenv("RISK_VAR_LEVELS", "0.95,0.99").split(","))
+VAR_HORIZONS = tuple(int(days) for days in os.getenv("RISK_VAR_HORIZONS", "1,10").split(","))
+MC_PATHS = int(os.getenv("RISK_MC_PATHS", "100000"))
+MC_SEED = int(os.getenv("RISK_MC_SEED", "0"))
+MC_WORKERS = int(os.getenv("RISK_MC_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+# Number of principal factors kept for the Monte Carlo covariance model
+MC_FACTORS = 20
+
+# Values per simulation chunk (paths x assets), bounds memory per worker
+MC_CHUNK_ELEMENTS = 2_000_000
+
+# Below this many draws the simulation runs inline; pool start-up would dominate
+MC_POOL_THRESHOLD = 20_000_000
+
+
+def tail_stats(returns, level):
+    """
+    Value at Risk and Expected Shortfall of a sample of returns
+
+    Both are expressed as returns (negative numbers are losses), matching the
+    sign of the existing ``var_95`` metric.
+
+    Args:
+        returns (np.ndarray): Sample of portfolio returns
+        level (float): Confidence level, e.g. 0.95
+
+    Returns:
+        tuple: (VaR, ES)
+    """
+    returns = np.asarray(returns, dtype=float)
+    returns = returns[~np.isnan(returns)]
+    if len(returns) == 0:
+        return np.nan, np.nan
+    var = np.quantile(returns, 1 - level)
+    tail = returns[returns <= var]
+    return float(var), float(tail.mean()) if len(tail) else float(var)
+
+
+def historical_var_es(portfolio_returns, levels, horizons):
+    """
+    Historical-simulation VaR/ES
+
+    Multi-day horizons use overlapping compounded returns over the history.
+
+    Args:
+        portfolio_returns (pd.Series): Daily portfolio returns
+        levels (iterable): Confidence levels
+        horizons (iterable): Horizons in trading days
+
+    Returns:
+        dict: {horizon: {level: (VaR, ES)}}
+    """
+    log_returns = np.log1p(portfolio_returns.dropna())
+    results = {}
+    for horizon in horizons:
+        window = np.expm1(log_returns.rolling(horizon).sum().dropna().to_numpy())
+        results[horizon] = {level: tail_stats(window, level) for level in levels}
+    return results
+
+
+def parametric_var_es(returns_df, weights, levels, horizons):
+    """
+    Variance-covariance (normal) VaR/ES
+
+    Args:
+        returns_df (pd.DataFrame): Daily asset returns without missing values
+        weights (np.ndarray): Portfolio weights aligned with the columns
+        levels (iterable): Confidence levels
+        horizons (iterable): Horizons in trading days
+
+    Returns:
+        dict: {horizon: {level: (VaR, ES)}}
+    """
+    mean = float(returns_df.mean().to_numpy() @ weights)
+    volatility = float(np.sqrt(max(weights @ returns_df.cov().to_numpy() @ weights, 0.0)))
+    normal = NormalDist()
+    results = {}
+    for horizon in horizons:
+        mean_h = mean * horizon
+        volatility_h = volatility * np.sqrt(horizon)
+        results[horizon] = {}
+        for level in levels:
+            z = normal.inv_cdf(1 - level)
+            var = mean_h + z * volatility_h
+            es = mean_h - volatility_h * normal.pdf(z) / (1 - level)
+            results[horizon][level] = (float(var), float(es))
+    return results
+
+
+def factor_model(log_returns, factors=MC_FACTORS):
+    """
+    Principal-component factor model of the daily log-return covariance
+
+    Args:
+        log_returns (pd.DataFrame): Daily asset log returns without missing values
+        factors (int): Maximum number of factors
+
+    Returns:
+        tuple: (mean, loadings N x K, idiosyncratic volatility N)
+    """
+    covariance = np.atleast_2d(log_returns.cov().to_numpy())
+    eigenvalues, eigenvectors = np.linalg.eigh(covariance)
+    order = np.argsort(eigenvalues)[::-1][:min(factors, len(eigenvalues))]
+    loadings = eigenvectors[:, order] * np.sqrt(np.clip(eigenvalues[order], 0.0, None))
+    residual = np.clip(np.diag(covariance) - (loadings ** 2).sum(axis=1), 0.0, None)
+    return log_returns.mean().to_numpy(), loadings, np.sqrt(residual)
+
+
+def simulate_chunk(seed, paths, mean, loadings, idiosyncratic, weights, horizons):
+    """
+    Simulate one chunk of buy-and-hold portfolio returns
+
+    Asset log returns over h days are ``h * mean + sqrt(h) * (loadings @ f +
+    idiosyncratic * e)``. The factor part is simulated per asset, so the
+    exponential compounding of every holding is exact. The idiosyncratic
+    shocks are independent across assets, so given the factors their
+    contribution to the portfolio is aggregated into one normal draw with the
+    exact conditional mean and variance. This keeps the cost at K + 1 draws
+    per path instead of N. One draw per path serves every horizon.
+    Module-level so it can run in a worker process.
+
+    Args:
+        seed (np.random.SeedSequence): Seed for this chunk
+        paths (int): Number of paths
+        mean (np.ndarray): Daily mean log return per asset
+        loadings (np.ndarray): Factor loadings (N x K)
+        idiosyncratic (np.ndarray): Idiosyncratic daily volatility per asset
+        weights (np.ndarray): Portfolio weights
+        horizons (tuple): Horizons in trading days
+
+    Returns:
+        np.ndarray: paths x len(horizons) portfolio returns
+    """
+    rng = np.random.default_rng(seed)
+    systematic = rng.standard_normal((paths, loadings.shape[1]), dtype=np.float32) @ loadings.T.astype(np.float32)
+    residual = rng.standard_normal(paths)
+    out = np.empty((paths, len(horizons)))
+    for column, horizon in enumerate(horizons):
+        growth = np.exp((horizon * mean).astype(np.float32) + np.float32(np.sqrt(horizon)) * systematic)
+        variance = horizon * idiosyncratic ** 2
+        conditional_mean = growth @ (weights * np.exp(variance / 2)).astype(np.float32)
+        conditional_var = (growth * growth) @ (weights ** 2 * np.expm1(variance) * np.exp(variance)).astype(np.float32)
+        out[:, column] = conditional_mean + np.sqrt(conditional_var) * residual - weights.sum()
+    return out
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _simulation_pool():
+    global _pool
+    with _pool_lock:
+        # A single worker would only add start-up and transfer overhead
+        if _pool is None and MC_WORKERS > 1:
+            _pool = ProcessPoolExecutor(max_workers=MC_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+
+def shutdown_simulation_pool():
+    """Stop the Monte Carlo worker processes"""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+def monte_carlo_var_es(returns_df, weights, levels, horizons, paths=None, seed=None):
+    """
+    Monte Carlo VaR/ES from a factor model of the asset returns
+
+    Paths are simulated in chunks of about MC_CHUNK_ELEMENTS values, each with
+    its own child of one SeedSequence, so results are reproducible for a seed
+    whatever the number of workers. Large runs are spread over a process pool.
+
+    Args:
+        returns_df (pd.DataFrame): Daily asset returns without missing values
+        weights (np.ndarray): Portfolio weights aligned with the columns
+        levels (iterable): Confidence levels
+        horizons (iterable): Horizons in trading days
+        paths (int): Number of simulated paths
+        seed (int): Random seed
+
+    Returns:
+        dict: {horizon: {level: (VaR, ES)}}
+    """
+    paths = paths or MC_PATHS
+    horizons = tuple(horizons)
+    mean, loadings, idiosyncratic = factor_model(np.log1p(returns_df))
+    assets = len(mean)
+
+    chunk = max(1000, MC_CHUNK_ELEMENTS // max(assets, 1))
+    sizes = [min(chunk, paths - start) for start in range(0, paths, chunk)]
+    seeds = np.random.SeedSequence(MC_SEED if seed is None else seed).spawn(len(sizes))
+    args = (mean, loadings, idiosyncratic, weights, horizons)
+
+    pool = _simulation_pool() if paths * assets >= MC_POOL_THRESHOLD else None
+    simulated = None
+    if pool is not None:
+        try:
+            futures = [pool.submit(simulate_chunk, s, size, *args) for s, size in zip(seeds, sizes)]
+            simulated = np.vstack([future.result() for future in futures])
+        except Exception as e:
+            print(f"Error running Monte Carlo workers, simulating inline: {e}")
+    if simulated is None:
+        simulated = np.vstack([simulate_chunk(s, size, *args) for s, size in zip(seeds, sizes)])
+
+    return {
+        horizon: {level: tail_stats(simulated[:, column], level) for level in levels}
+        for column, horizon in enumerate(horizons)
+    }
+
+
+def compute_var_es(returns_df, weights=None, levels=None, horizons=None, paths=None, seed=None):
+    """
+    Historical, parametric and Monte Carlo VaR and Expected Shortfall
+
+    Args:
+        returns_df (pd.DataFrame): Daily asset returns (one column per ticker)
+        weights (list): Portfolio weights aligned with the columns, equal weights if None
+        levels (iterable): Confidence levels, defaults to VAR_CONFIDENCE_LEVELS
+        horizons (iterable): Horizons in trading days, defaults to VAR_HORIZONS
+        paths (int): Monte Carlo paths, defaults to MC_PATHS
+        seed (int): Monte Carlo seed, defaults to MC_SEED
+
+    Returns:
+        dict: {method: {"<h>d": {"<level>%": {"var": pct, "es": pct}}}} with
+            values in percent (negative numbers are losses)
+    """
+    levels = tuple(levels or VAR_CONFIDENCE_LEVELS)
+    horizons = tuple(horizons or VAR_HORIZONS)
+    returns_df = returns_df.dropna()
+    if returns_df.empty:
+        return {}
+    weights = np.full(returns_df.shape[1], 1 / returns_df.shape[1]) if weights is None else np.asarray(weights, dtype=float)
+    portfolio_returns = pd.Series(returns_df.to_numpy() @ weights, index=returns_df.index)
+
+    methods = {
+        "historical": historical_var_es(portfolio_returns, levels, horizons),
+        "parametric": parametric_var_es(returns_df, weights, levels, horizons),
+        "monte_carlo": monte_carlo_var_es(returns_df, weights, levels, horizons, paths, seed)
+    }
+    return {
+        method: {
+            f"{horizon}d": {
+                f"{level * 100:g}%": {
+                    "var": var * 100,
+                    "es": es * 100
+                }
+                for level, (var, es) in by_level.items()
+            }
+            for horizon, by_level in by_horizon.items()
+        }
+        for method, by_horizon in methods.items()
+    }
+
+
+def format_var_es(var_es):
+    """
+    Render compute_var_es output as prompt lines
+
+    Args:
+        var_es (dict): Output of compute_var_es
+
+    Returns:
+        str: One line per method, horizon and confidence level
+    """
+    lines = []
+    for method, by_horizon in var_es.items():
+        name = method.replace("_", " ").title()
+        for horizon, by_level in by_horizon.items():
+            for level, values in by_level.items():
+                lines.append(f"{name} {horizon} VaR/ES ({level}): {values['var']:.2f}% / {values['es']:.2f}%")
+    return "\n".join(lines)
+
+
+# Rolling windows (trading days) for rolling_risk
+ROLLING_WINDOWS = tuple(int(days) for days in os.getenv("RISK_ROLLING_WINDOWS", "21,63,252").split(","))
+
+# Rolling metrics reported per window
+ROLLING_METRICS = ("volatility", "sharpe", "max_drawdown", "var")
+
+
+def _block_scan(values, size, reverse=False):
+    """Zero-pad the time axis to whole blocks of ``size`` rows and reshape to (blocks, size, columns), optionally reversed in time"""
+    blocks = -(-len(values) // size)
+    padded = np.zeros((blocks * size, values.shape[1]))
+    padded[:len(values)] = values
+    padded = padded.reshape(blocks, size, values.shape[1])
+    return padded[:, ::-1] if reverse else padded
+
+
+def _unblock(blocks, length, reverse=False):
+    """Inverse of _block_scan"""
+    blocks = blocks[:, ::-1] if reverse else blocks
+    return blocks.reshape(-1, blocks.shape[2])[:length]
+
+
+def _window_max_drawdown(log_wealth, window):
+    """
+    Worst peak-to-trough fall inside each trailing window of ``window`` returns
+
+    The peak is taken within the same window, starting from the wealth just
+    before the window's first return. Uses the van Herk/Gil-Werman block
+    scheme: the path is cut into blocks of ``window + 1`` points, so every
+    window is a suffix of one block joined to a prefix of the next. Running
+    max, min and largest drop are accumulated forwards and backwards within
+    each block, and each window combines one suffix with one prefix. That is
+    O(n) time and memory per column, independent of the window length, and
+    vectorized across columns.
+
+    Args:
+        log_wealth (np.ndarray): (T + 1) x N log wealth paths starting at 0
+        window (int): Returns per window
+
+    Returns:
+        np.ndarray: T x N drawdowns as fractions (<= 0), NaN until the first full window
+    """
+    points, columns = log_wealth.shape
+    size = window + 1
+    result = np.full((points - 1, columns), np.nan)
+    if points < size:
+        return result
+
+    # Padding rows only reach prefixes past the last point and suffixes of
+    # blocks no window starts in, so they never affect a result
+    forward = _block_scan(log_wealth, size)
+    prefix_max = np.maximum.accumulate(forward, axis=1)
+    prefix_min = _unblock(np.minimum.accumulate(forward, axis=1), points)
+    prefix_drop = _unblock(np.minimum.accumulate(forward - prefix_max, axis=1), points)
+
+    backward = _block_scan(log_wealth, size, reverse=True)
+    suffix_max = _unblock(np.maximum.accumulate(backward, axis=1), points, reverse=True)
+    suffix_min = np.minimum.accumulate(backward, axis=1)
+    suffix_drop = _unblock(np.minimum.accumulate(suffix_min - backward, axis=1), points, reverse=True)
+
+    # Window [t - window, t]: one whole block when it starts on a block boundary, else suffix + prefix
+    ends = np.arange(window, points)
+    starts = ends - window
+    joined = np.minimum(
+        np.minimum(suffix_drop[starts], prefix_drop[ends]),
+        prefix_min[ends] - suffix_max[starts]
+    )
+    drop = np.where((starts % size == 0)[:, None], suffix_drop[starts], joined)
+    result[window - 1:] = np.expm1(drop)
+    return result
+
+
+def rolling_risk(returns, windows=None, level=0.95):
+    """
+    Rolling volatility, Sharpe ratio, max drawdown and VaR for one or many return series
+
+    Volatility, Sharpe and VaR use pandas' online rolling kernels, which
+    update running state as the window slides (add the new bar, drop the
+    oldest) instead of re-evaluating each window: O(n) for mean and std and
+    O(n log w) for the quantile, vectorized across columns.
+
+    Max drawdown is the worst fall from a peak inside the same ``window``-day
+    window, computed for all columns at once in O(n) time and memory
+    whatever the window length (see _window_max_drawdown).
+
+    Args:
+        returns (pd.Series or pd.DataFrame): Daily returns, one column per series
+        windows (iterable): Window lengths in trading days, defaults to ROLLING_WINDOWS
+        level (float): VaR confidence level
+
+    Returns:
+        dict: {window: {metric: Series or DataFrame}} with volatility, max drawdown and VaR in percent
+    """
+    windows = tuple(windows or ROLLING_WINDOWS)
+    frame = returns.to_frame() if isinstance(returns, pd.Series) else returns
+    log_returns = np.log1p(frame.fillna(0.0).to_numpy(dtype=float))
+    log_wealth = np.vstack([np.zeros((1, log_returns.shape[1])), np.cumsum(log_returns, axis=0)])
+    results = {}
+    for window in windows:
+        rolling = returns.rolling(window)
+        mean = rolling.mean()
+        std = rolling.std()
+        drawdown = pd.DataFrame(_window_max_drawdown(log_wealth, window), index=frame.index, columns=frame.columns)
+        if isinstance(returns, pd.Series):
+            drawdown = drawdown.iloc[:, 0].rename(returns.name)
+        results[window] = {
+            "volatility": std * np.sqrt(252) * 100,
+            "sharpe": (mean * 252) / (std * np.sqrt(252)).where(std > 0),
+            "max_drawdown": drawdown.where(mean.notna()) * 100,
+            "var": rolling.quantile(1 - level) * 100
+        }
+    return results
+
+
+def serialize_rolling_risk(rolling, max_points=500):
+    """
+    Convert rolling_risk output for one series into JSON-ready lists
+
+    Long histories are thinned to every n-th bar, counted back from the latest
+    bar, so the payload stays around ``max_points`` values per series.
+
+    Args:
+        rolling (dict): Output of rolling_risk for a Series
+        max_points (int): Approximate maximum number of bars returned
+
+    Returns:
+        dict: {"dates": [...], "windows": {"<w>d": {metric: [...]}}} with None for undefined values
+    """
+    if not rolling:
+        return {}
+    index = next(iter(next(iter(rolling.values())).values())).index
+    step = max(1, -(-len(index) // max_points))
+    positions = np.arange(len(index))[::-1][::step][::-1]
+    return {
+        "dates": [str(index[position].date()) if hasattr(index[position], "date") else str(index[position]) for position in positions],
+        "windows": {
+            f"{window}d": {
+                metric: [None if np.isnan(value) else round(float(value), 4) for value in series.to_numpy()[positions]]
+                for metric, series in metrics.items()
+            }
+            for window, metrics in rolling.items()
+        }
+    }
+
+
+def summarize_rolling_risk(rolling):
+    """
+    Compact trend summary of rolling metrics for the LLM prompt
+
+    For each window and metric: the latest value, the value one window ago,
+    the range over the period and the latest value's percentile within it.
+
+    Args:
+        rolling (dict): Output of rolling_risk for a Series
+
+    Returns:
+        str: One line per window and metric
+    """
+    names = {"volatility": "volatility", "sharpe": "Sharpe", "max_drawdown": "max drawdown", "var": "VaR"}
+    lines = []
+    for window, metrics in rolling.items():
+        for metric in ROLLING_METRICS:
+            series = metrics[metric].dropna()
+            if series.empty:
+                continue
+            latest = series.iloc[-1]
+            unit = "" if metric == "sharpe" else "%"
+            line = f"{window}d {names[metric]}: {latest:.2f}{unit} now"
+            if len(series) > window:
+                line += f" vs {series.iloc[-1 - window]:.2f}{unit} {window} days ago"
+            percentile = (series < latest).mean() * 100
+            line += f" (range {series.min():.2f}{unit} to {series.max():.2f}{unit}, percentile rank {percentile:.0f})"
+            lines.append(line)
+    return "\n".join(lines)
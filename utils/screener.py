@@ -0,0 +1,284 @@
+import os
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from utils.price_store import DEFAULT_DATA_DIR, pyarrow
+from utils.reference_data import REFERENCE_FIELDS, record_from_info
+
+# Screener field -> yfinance .info field (fractions stay fractions: ROE 15% is 0.15)
+NUMERIC_FIELDS = {
+    "pe": "trailingPE",
+    "forward_pe": "forwardPE",
+    "ps": "priceToSalesTrailing12Months",
+    "pb": "priceToBook",
+    "peg": "trailingPegRatio",
+    "revenue_growth": "revenueGrowth",
+    "earnings_growth": "earningsGrowth",
+    "profit_margin": "profitMargins",
+    "operating_margin": "operatingMargins",
+    "roe": "returnOnEquity",
+    "roa": "returnOnAssets",
+    "dividend_yield": "dividendYield",
+    "payout_ratio": "payoutRatio",
+    "debt_to_equity": "debtToEquity",
+    "current_ratio": "currentRatio",
+    "market_cap": "marketCap",
+    "price": "currentPrice",
+    "beta": "beta",
+}
+
+# Descriptive fields, taken from the reference record
+TEXT_FIELDS = REFERENCE_FIELDS
+
+NUMERIC_OPERATORS = {
+    "gt": np.greater,
+    "gte": np.greater_equal,
+    "lt": np.less,
+    "lte": np.less_equal,
+    "eq": np.equal,
+    "ne": np.not_equal,
+}
+
+OPERATORS = tuple(NUMERIC_OPERATORS) + ("between", "in", "not_in")
+
+
+def row_from_info(info):
+    """
+    Screener row from a yfinance ``.info`` payload
+
+    Args:
+        info (dict): Ticker info, may be empty
+
+    Returns:
+        dict: TEXT_FIELDS and NUMERIC_FIELDS, missing values as None
+    """
+    info = info or {}
+    row = record_from_info(info)
+    for field, source in NUMERIC_FIELDS.items():
+        value = info.get(source)
+        row[field] = float(value) if isinstance(value, (int, float)) and not isinstance(value, bool) else None
+    return row
+
+
+class ScreenerTable:
+    """
+    Columnar table of fundamental ratios for a ticker universe.
+
+    Rows live in a DataFrame persisted as Parquet; queries run against
+    per-field NumPy arrays that are rebuilt on every update and swapped in
+    as a whole, so filters and sorts are vectorized and readers never need
+    the lock.
+    """
+
+    def __init__(self, path=None, max_workers=8):
+        """
+        Initialize the screener table
+
+        Args:
+            path (str): Parquet file, defaults to <data dir>/screener/fundamentals.parquet
+            max_workers (int): Concurrent upstream lookups when refreshing
+        """
+        self.path = path or os.path.join(DEFAULT_DATA_DIR, "screener", "fundamentals.parquet")
+        self.max_workers = max_workers
+        self.persist = pyarrow is not None
+        self._lock = threading.Lock()
+        self._frame = None
+        self._arrays = None
+
+    def _empty_frame(self):
+        frame = pd.DataFrame(
+            {**{field: pd.Series(dtype=object) for field in TEXT_FIELDS},
+             **{field: pd.Series(dtype=np.float64) for field in NUMERIC_FIELDS},
+             "updated_at": pd.Series(dtype=np.float64)}
+        )
+        frame.index.name = "ticker"
+        return frame
+
+    def _load(self):
+        if self._frame is not None:
+            return
+        frame = None
+        if self.persist and os.path.exists(self.path):
+            try:
+                # Columns added since the file was written come back empty
+                frame = pd.read_parquet(self.path).reindex(columns=self._empty_frame().columns)
+            except Exception as e:
+                print(f"Error reading screener table: {e}")
+        self._set_frame(frame if frame is not None else self._empty_frame())
+
+    def _set_frame(self, frame):
+        arrays = {"ticker": frame.index.to_numpy(dtype=object)}
+        for field in TEXT_FIELDS:
+            arrays[field] = frame[field].to_numpy(dtype=object)
+        # Lower-cased copies so text filters are case-insensitive without per-query work
+        for field in ("ticker",) + TEXT_FIELDS:
+            arrays[f"{field}:lower"] = np.array([value.lower() if isinstance(value, str) else None for value in arrays[field]], dtype=object)
+        for field in NUMERIC_FIELDS:
+            arrays[field] = frame[field].to_numpy(dtype=np.float64)
+        self._frame, self._arrays = frame, arrays
+
+    def _arrays_snapshot(self):
+        if self._arrays is None:
+            with self._lock:
+                self._load()
+        return self._arrays
+
+    def __len__(self):
+        return len(self._arrays_snapshot()["ticker"])
+
+    def upsert(self, infos):
+        """
+        Insert or replace rows from yfinance ``.info`` payloads
+
+        Args:
+            infos (dict): ticker -> info payload
+
+        Returns:
+            int: Number of rows written
+        """
+        infos = {ticker.upper(): info for ticker, info in infos.items() if info}
+        if not infos:
+            return 0
+        now = time.time()
+        rows = pd.DataFrame.from_dict({ticker: {**row_from_info(info), "updated_at": now} for ticker, info in infos.items()}, orient="index")
+        rows.index.name = "ticker"
+        with self._lock:
+            self._load()
+            rows = rows.astype({field: np.float64 for field in NUMERIC_FIELDS})
+            frame = pd.concat([self._frame[~self._frame.index.isin(rows.index)], rows[self._frame.columns]])
+            self._set_frame(frame)
+            if self.persist:
+                try:
+                    os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                    frame.to_parquet(self.path + ".tmp")
+                    os.replace(self.path + ".tmp", self.path)
+                except Exception as e:
+                    print(f"Error writing screener table: {e}")
+        return len(rows)
+
+    def refresh(self, tickers, fetch, progress_callback=None):
+        """
+        Fetch and store rows for many tickers concurrently
+
+        Args:
+            tickers (list): Ticker symbols
+            fetch (callable): ``fetch(ticker)`` returning a yfinance info payload
+            progress_callback (callable): Optional ``callback(fraction, message)``
+
+        Returns:
+            dict: Counts of requested, updated and failed tickers
+        """
+        tickers = list(dict.fromkeys(ticker.upper() for ticker in tickers))
+
+        def fetch_one(ticker):
+            try:
+                return ticker, fetch(ticker)
+            except Exception as e:
+                print(f"Error fetching screener data for {ticker}: {e}")
+                return ticker, None
+
+        infos = {}
+        with ThreadPoolExecutor(max_workers=max(1, min(self.max_workers, len(tickers)))) as pool:
+            for done, (ticker, info) in enumerate(pool.map(fetch_one, tickers), start=1):
+                if info:
+                    infos[ticker] = info
+                if progress_callback is not None and done % 50 == 0:
+                    progress_callback(done / len(tickers), f"Fetched {done}/{len(tickers)} tickers")
+        updated = self.upsert(infos)
+        return {"requested": len(tickers), "updated": updated, "failed": len(tickers) - updated}
+
+    def _filter_mask(self, arrays, condition):
+        field, op, value = condition.get("field"), condition.get("op", "eq"), condition.get("value")
+        if field not in NUMERIC_FIELDS and field not in TEXT_FIELDS and field != "ticker":
+            raise ValueError(f"Unknown screener field: {field}")
+        if op not in OPERATORS:
+            raise ValueError(f"Unknown screener operator: {op}")
+        if field in NUMERIC_FIELDS:
+            column = arrays[field]
+            with np.errstate(invalid="ignore"):
+                if op == "between":
+                    low, high = value
+                    return (column >= float(low)) & (column <= float(high))
+                if op in ("in", "not_in"):
+                    found = np.isin(column, np.asarray(value, dtype=np.float64))
+                    return found if op == "in" else ~found & ~np.isnan(column)
+                # Missing values never pass a comparison, including "ne"
+                return NUMERIC_OPERATORS[op](column, float(value)) & ~np.isnan(column)
+
+        if op in ("in", "not_in", "eq", "ne"):
+            values = value if isinstance(value, (list, tuple)) else [value]
+            lowered = arrays[f"{field}:lower"]
+            found = np.isin(lowered, [str(item).lower() for item in values])
+            return found if op in ("in", "eq") else ~found & (lowered != None)  # noqa: E711
+        raise ValueError(f"Operator {op} is not supported for text field {field}")
+
+    def screen(self, filters=None, sort_by=None, descending=False, limit=50, fields=None):
+        """
+        Filter, sort and rank the universe
+
+        Args:
+            filters (list): Conditions ``{"field", "op", "value"}``, all of which must hold
+                (ops: gt, gte, lt, lte, eq, ne, between [low, high], in, not_in)
+            sort_by (str): Numeric field to rank by; missing values sort last
+            descending (bool): Rank highest first
+            limit (int): Maximum rows returned
+            fields (list): Fields to include per row, defaults to all ("ticker" is always included)
+
+        Returns:
+            dict: universe size, match count and the ranked rows
+        """
+        arrays = self._arrays_snapshot()
+        if sort_by is not None and sort_by not in NUMERIC_FIELDS:
+            raise ValueError(f"Cannot sort by {sort_by}: not a numeric screener field")
+        # Every row carries its ticker, so asking for it is accepted and needs nothing extra
+        fields = [field for field in fields if field != "ticker"] if fields else list(TEXT_FIELDS) + list(NUMERIC_FIELDS)
+        unknown = [field for field in fields if field not in NUMERIC_FIELDS and field not in TEXT_FIELDS]
+        if unknown:
+            raise ValueError(f"Unknown screener fields: {', '.join(unknown)}")
+
+        mask = np.ones(len(arrays["ticker"]), dtype=bool)
+        for condition in filters or []:
+            mask &= self._filter_mask(arrays, condition)
+        matches = np.flatnonzero(mask)
+
+        if sort_by is not None:
+            keys = arrays[sort_by][matches]
+            # argsort puts NaN last; negate for descending so they stay last
+            order = np.argsort(-keys if descending else keys, kind="stable")
+            matches = matches[order]
+        selected = matches[:limit]
+
+        results = []
+        for rank, index in enumerate(selected, start=1):
+            row = {"rank": rank, "ticker": arrays["ticker"][index]}
+            for field in fields:
+                value = arrays[field][index]
+                if field in NUMERIC_FIELDS:
+                    value = None if np.isnan(value) else float(value)
+                row[field] = value
+            results.append(row)
+
+        return {
+            "universe": len(arrays["ticker"]),
+            "matches": int(mask.sum()),
+            "sort_by": sort_by,
+            "descending": descending,
+            "results": results
+        }
+
+
+_screener_table = None
+_screener_table_lock = threading.Lock()
+
+
+def get_screener_table():
+    """Return the process-wide screener table"""
+    global _screener_table
+    with _screener_table_lock:
+        if _screener_table is None:
+            _screener_table = ScreenerTable()
+        return _screener_table